@@ -0,0 +1,89 @@
+# bench_channel_engines.py
+"""
+Compare the regression and peak-based channel engines.
+
+Usage:
+    python benchmarks/bench_channel_engines.py --tickers 500 --bars 1260
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add src directory to path (parent directory of benchmarks)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from channel_scoring import as_buffers, batch_channels, batch_quality
+from market_analysis import MarketAnalysis
+from peak_engine import peak_channels_many, numba
+from trend_engine import TrendEngine
+from synthetic import synthetic_universe
+
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def regression_lines(frames, window_size, step):
+    for data in frames.values():
+        buffers = as_buffers(data)
+        stats = TrendEngine.from_data(data).scan(window_size, step)
+        upper, lower = batch_channels(*buffers, stats['start'], window_size,
+                                      stats['slope'], stats['intercept'])
+        batch_quality(*buffers, stats['start'], window_size, stats['slope'], upper, lower)
+
+
+def peak_lines(frames, window_size, step, jit):
+    results = peak_channels_many(frames, window_size, step, jit=jit)
+    for ticker, data in frames.items():
+        fit = results[ticker]
+        valid = fit['valid']
+        batch_quality(*as_buffers(data), fit['start'][valid], window_size, fit['slope'][valid],
+                      fit['upper_intercept'][valid], fit['lower_intercept'][valid])
+
+
+def identify_all(frames, window_size, step, engine):
+    market = MarketAnalysis(channel_engine=engine)
+    for data in frames.values():
+        market.identify_channels(data, window_size, step, window_sizes=[])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=252)
+    parser.add_argument('--window', type=int, default=40)
+    parser.add_argument('--step', type=int, default=1)
+    parser.add_argument('--regime', default='random_walk')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames = dict(synthetic_universe(args.tickers, args.bars, args.regime))
+    windows = args.tickers * len(range(0, args.bars - args.window, args.step))
+    cases = {
+        'regression_lines': lambda: regression_lines(frames, args.window, args.step),
+        'peak_lines_numpy': lambda: peak_lines(frames, args.window, args.step, jit=False),
+        'identify_channels_regression': lambda: identify_all(frames, args.window, args.step, 'regression'),
+        'identify_channels_peaks': lambda: identify_all(frames, args.window, args.step, 'peaks'),
+    }
+    if numba is not None:
+        peak_lines(frames, args.window, args.step, jit=True)  # compile outside the timing
+        cases['peak_lines_numba'] = lambda: peak_lines(frames, args.window, args.step, jit=True)
+
+    report = {'tickers': args.tickers, 'bars': args.bars, 'window': args.window,
+              'step': args.step, 'numba': numba is not None, 'results': {}}
+    for name, case in cases.items():
+        seconds = timed(case, args.repeat)
+        report['results'][name] = {'seconds': round(seconds, 6),
+                                   'windows_per_second': round(windows / seconds)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
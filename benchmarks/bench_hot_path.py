@@ -0,0 +1,197 @@
+# bench_hot_path.py
+"""
+Time the technical-analysis hot path on synthetic OHLCV data.
+
+Every function is timed on its own over a grid of regimes, series lengths
+and universe sizes, and the report (throughput and peak traced memory) is
+written as JSON.
+
+Usage:
+    python benchmarks/bench_hot_path.py --output bench.json
+    python benchmarks/bench_hot_path.py --lengths 1y --tickers 1,10 --quick
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Add src directory to path (parent directory of benchmarks)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from market_analysis import MarketAnalysis
+from trend_engine import window_starts
+from synthetic import LENGTHS, REGIMES, synthetic_universe
+
+WINDOW_SIZE = 40
+STEP = 20
+
+
+def _windows(data):
+    return [int(i) for i in window_starts(len(data), WINDOW_SIZE, STEP)]
+
+
+# Each case is (setup, run): setup(market, data) builds the untimed inputs,
+# run(market, data, inputs) does the timed work and returns its operation count
+
+def _run_validate_trend(market, data, starts):
+    for i in starts:
+        market.validate_trend(data, i, i + WINDOW_SIZE, is_recent=(i > len(data) * 2/3))
+    return len(starts)
+
+
+def _run_calculate_channel(market, data, starts):
+    for i in starts:
+        market.calculate_channel(data, i, i + WINDOW_SIZE)
+    return len(starts)
+
+
+def _setup_quality(market, data):
+    channels = []
+    for i in _windows(data):
+        validation = market.validate_trend(data, i, i + WINDOW_SIZE)
+        validation['isTrend'] = True  # Score every window, trending or not
+        channels.append((i, market.calculate_channel(data, i, i + WINDOW_SIZE, validation=validation)))
+    return channels
+
+
+def _run_quality(market, data, channels):
+    for i, channel in channels:
+        market.calculate_channel_quality(data, i, i + WINDOW_SIZE, channel)
+    return len(channels)
+
+
+def _run_identify_channels(market, data, _):
+    market.identify_channels(data, WINDOW_SIZE, STEP, window_sizes=[])
+    return 1
+
+
+def _run_plot(market, data, channels):
+    market.plot_with_channels(data, 'SYN', *channels, in_memory=True)
+    return 1
+
+
+CASES = {
+    'validate_trend': (lambda market, data: _windows(data), _run_validate_trend, 'windows'),
+    'calculate_channel': (lambda market, data: _windows(data), _run_calculate_channel, 'windows'),
+    'calculate_channel_quality': (_setup_quality, _run_quality, 'windows'),
+    'identify_channels': (lambda market, data: None, _run_identify_channels, 'tickers'),
+    'plot_with_channels': (lambda market, data: market.identify_channels(data, window_sizes=[]),
+                           _run_plot, 'charts'),
+}
+
+
+def bench_case(name, regime, length, tickers, limit, memory, seed=0):
+    """Time one function over a synthetic universe; returns one report row."""
+    setup, run, unit = CASES[name]
+    market = MarketAnalysis()
+    bars = LENGTHS[length]
+    timed = min(tickers, limit) if limit else tickers
+
+    seconds = 0.0
+    operations = 0
+    peak_memory = 0
+    for _, data in synthetic_universe(timed, bars, regime, seed):
+        inputs = setup(market, data)
+        started = time.perf_counter()
+        operations += run(market, data, inputs)
+        seconds += time.perf_counter() - started
+
+        if memory:
+            tracemalloc.start()
+            run(market, data, inputs)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    return {
+        'function': name,
+        'regime': regime,
+        'length': length,
+        'bars': bars,
+        'tickers': tickers,
+        'tickers_timed': timed,
+        'unit': unit,
+        'operations': operations,
+        'seconds': round(seconds, 6),
+        'ops_per_second': round(operations / seconds, 2) if seconds else None,
+        'bars_per_second': round(timed * bars / seconds) if seconds else None,
+        'peak_memory_bytes': peak_memory if memory else None,
+    }
+
+
+def run_suite(functions, regimes, lengths, ticker_counts, window_limit=50, render_limit=5,
+              memory=True, seed=0):
+    """
+    Run the benchmark grid.
+
+    Args:
+        functions, regimes, lengths, ticker_counts: Grid axes
+        window_limit: Max tickers timed for the per-window functions
+        render_limit: Max tickers timed for plot_with_channels
+        memory: Also measure peak traced memory (a second, untimed pass)
+
+    Returns:
+        Report dict ready for json.dump
+    """
+    limits = {'validate_trend': window_limit, 'calculate_channel': window_limit,
+              'calculate_channel_quality': window_limit, 'plot_with_channels': render_limit}
+    results = []
+    for name in functions:
+        for regime in regimes:
+            for length in lengths:
+                for tickers in ticker_counts:
+                    results.append(bench_case(name, regime, length, tickers,
+                                              limits.get(name), memory, seed))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'config': {'window_size': WINDOW_SIZE, 'step': STEP, 'seed': seed,
+                   'window_limit': window_limit, 'render_limit': render_limit},
+        'results': results,
+    }
+
+
+def _list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the technical-analysis hot path.")
+    parser.add_argument('--functions', default=','.join(CASES))
+    parser.add_argument('--regimes', default=','.join(REGIMES))
+    parser.add_argument('--lengths', default=','.join(LENGTHS))
+    parser.add_argument('--tickers', default='1,100,1000,5000')
+    parser.add_argument('--window-limit', type=int, default=50,
+                        help='max tickers timed for the per-window functions')
+    parser.add_argument('--render-limit', type=int, default=5,
+                        help='max tickers timed for plot_with_channels')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--quick', action='store_true', help='1y series, 1 and 10 tickers')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    lengths, tickers = _list(args.lengths), [int(t) for t in _list(args.tickers)]
+    if args.quick:
+        lengths, tickers = ['1y'], [1, 10]
+
+    report = run_suite(_list(args.functions), _list(args.regimes), lengths, tickers,
+                       args.window_limit, args.render_limit, not args.no_memory, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# synthetic.py
+"""Reproducible synthetic daily OHLCV series for the benchmarks."""
+import numpy as np
+import pandas as pd
+
+LENGTHS = {'1y': 252, '5y': 1260, '20y': 5040}
+REGIMES = ('random_walk', 'trending')
+
+
+def synthetic_ohlcv(bars, regime='random_walk', seed=0):
+    """
+    One daily OHLCV DataFrame shaped like the yfinance output.
+
+    Args:
+        bars: Number of business days
+        regime: 'random_walk' (no drift) or 'trending' (alternating up/down
+            drift segments of 60-250 bars with lower noise)
+        seed: Random seed; the same seed always gives the same series
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume and a tz-aware 'Date' index
+    """
+    if regime not in REGIMES:
+        raise ValueError(f"Unknown regime: {regime}")
+    rng = np.random.default_rng(seed)
+
+    if regime == 'trending':
+        lengths = rng.integers(60, 250, bars // 60 + 1)
+        signs = np.where(np.arange(len(lengths)) % 2 == 0, 1.0, -1.0) * rng.choice([-1.0, 1.0])
+        drift = np.repeat(signs * rng.uniform(0.001, 0.003, len(lengths)), lengths)[:bars]
+        volatility = 0.008
+    else:
+        drift = np.zeros(bars)
+        volatility = 0.015
+
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, volatility, bars)))
+    open_ = close * np.exp(rng.normal(0, volatility / 3, bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, bars)))
+
+    index = pd.bdate_range(end='2025-12-31', periods=bars, tz='America/New_York', name='Date')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': rng.integers(100_000, 10_000_000, bars),
+    }, index=index)
+
+
+def synthetic_universe(tickers, bars, regime='random_walk', seed=0):
+    """Yield (ticker, DataFrame) pairs one at a time so large universes stay out of memory."""
+    for t in range(tickers):
+        yield f'SYN{t:04d}', synthetic_ohlcv(bars, regime, seed * 100_003 + t)
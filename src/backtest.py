@@ -0,0 +1,303 @@
+# backtest.py
+"""
+Walk-forward backtest of channel signals on cached OHLCV history.
+
+Channels are re-detected every `step` bars from the `lookback` bars before
+that point only, and their lines are projected over the next `step` bars.
+Entries and exits are then simulated for all tickers and bars at once on
+(tickers x bars) matrices.
+
+Usage:
+    python src/backtest.py --years 10 --universe --output backtest.json
+    python src/backtest.py --tickers ^GSPC ^NDX --data-dir data/ --years 5
+"""
+import argparse
+import json
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from breakout_alerts import active_channel, project_channel
+from config import Settings
+from data_sources import LocalFileSource, YFinanceSource
+from market_analysis import MarketAnalysis
+from ohlcv_cache import OHLCVCache
+from shared_ohlcv import map_tickers
+
+logger = logging.getLogger(__name__)
+
+BARS_PER_YEAR = 252
+
+# Signal rules, see signals()
+STRATEGIES = ('touch', 'breakout')
+
+
+def walk_forward_lines(data, lookback=None, step=None, max_age=None):
+    """
+    Channel lines known at every bar without look-ahead.
+
+    Args:
+        data: OHLC DataFrame of one ticker
+        lookback: Bars used for each detection (default Settings.BACKTEST_LOOKBACK)
+        step: Bars between detections (default Settings.BACKTEST_STEP)
+        max_age: Bars since an intermediate channel ended for it to stay active
+
+    Returns:
+        (upper, lower) arrays of len(data); bar j holds the lines of a channel
+        detected on bars before j, NaN where no channel was active
+    """
+    lookback = lookback or Settings.BACKTEST_LOOKBACK
+    step = step or Settings.BACKTEST_STEP
+    max_age = Settings.ALERT_MAX_CHANNEL_AGE if max_age is None else max_age
+    market = MarketAnalysis(cache=False, channel_store=False)
+    upper = np.full(len(data), np.nan)
+    lower = np.full(len(data), np.nan)
+    for t in range(lookback, len(data), step):
+        history = data.iloc[t - lookback:t]
+        channel = active_channel(history, *market.identify_channels(history, window_sizes=[]), max_age)
+        if channel is None:
+            continue
+        # Index 0 of the projection is the last history bar (t - 1)
+        ahead = min(step, len(data) - t)
+        projected_upper, projected_lower = project_channel(history, channel, ahead + 1)
+        upper[t:t + ahead] = projected_upper[1:]
+        lower[t:t + ahead] = projected_lower[1:]
+    return upper, lower
+
+
+def _ticker_lines(item, lookback, step, max_age):
+    """Worker: walk-forward lines of one ticker."""
+    ticker, data = item
+    try:
+        return ticker, walk_forward_lines(data, lookback, step, max_age)
+    except Exception as e:
+        logger.error(f"Error detecting channels for {ticker}: {e}")
+        return ticker, None
+
+
+def align_frames(frames):
+    """
+    Stack per-ticker frames on their union calendar.
+
+    Returns:
+        (tickers, index, {'High', 'Low', 'Close'} -> (tickers x bars) arrays, NaN where missing)
+    """
+    tickers = list(frames)
+    index = frames[tickers[0]].index
+    for ticker in tickers[1:]:
+        index = index.union(frames[ticker].index)
+    matrices = {
+        column: np.vstack([frames[ticker][column].reindex(index).to_numpy(dtype=np.float64)
+                           for ticker in tickers])
+        for column in ('High', 'Low', 'Close')
+    }
+    return tickers, index, matrices
+
+
+def signals(strategy, high, low, close, upper, lower, stop_margin=None):
+    """
+    Entry and exit masks, decided at the close of each bar.
+
+    'touch': buy when the low touches the lower line and the close holds above
+    it; sell when the high reaches the upper line, or stop out when the close
+    falls below the lower line by `stop_margin` of the width.
+    'breakout': buy when the close is above the upper line; sell when it falls
+    back below it.
+    Every position is closed where no channel is active.
+
+    Returns:
+        (entry, exit) boolean arrays shaped like close
+    """
+    stop_margin = Settings.BACKTEST_STOP_MARGIN if stop_margin is None else stop_margin
+    no_channel = np.isnan(upper) | np.isnan(close)
+    with np.errstate(invalid='ignore'):
+        if strategy == 'touch':
+            entry = (low <= lower) & (close >= lower)
+            exit_ = (high >= upper) | (close < lower - stop_margin * (upper - lower))
+        elif strategy == 'breakout':
+            entry = close > upper
+            exit_ = close < upper
+        else:
+            raise ValueError(f"Unknown strategy {strategy}, use one of {', '.join(STRATEGIES)}")
+    return entry & ~no_channel, exit_ | no_channel
+
+
+def positions(entry, exit_):
+    """
+    Long (1) or flat (0) after each bar's close: an entry opens a position
+    that is held until the next exit. Exits win over entries on the same bar.
+    """
+    state = np.where(exit_, 0, np.where(entry, 1, -1))
+    bars = np.arange(state.shape[1])
+    # Index of the last bar with a decision, carried forward along time
+    last = np.maximum.accumulate(np.where(state >= 0, bars, -1), axis=1)
+    held = np.take_along_axis(state, np.maximum(last, 0), axis=1)
+    return np.where(last >= 0, held, 0).astype(np.int8)
+
+
+def trades(position, close, cost=0.0):
+    """
+    Every round trip of a position matrix.
+
+    Args:
+        position: (tickers x bars) 0/1 array from positions()
+        close: Close prices of the same shape
+        cost: Cost per side as a fraction of the price
+
+    Returns:
+        Dict of arrays 'ticker', 'entry', 'exit' (bar indices) and 'return' (net, compounded)
+    """
+    flat = np.zeros((position.shape[0], 1), dtype=np.int8)
+    change = np.diff(np.hstack([flat, position, flat]), axis=1)
+    rows, entries = np.nonzero(change == 1)
+    _, exits = np.nonzero(change == -1)
+    # A position held after bar j earns close[j + 1] / close[j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.nan_to_num(np.diff(np.log(close), axis=1))
+    cumulative = np.hstack([np.zeros((close.shape[0], 1)), np.cumsum(log_returns, axis=1)])
+    last = close.shape[1] - 1
+    exits = np.minimum(exits, last)
+    gross = np.expm1(cumulative[rows, exits] - cumulative[rows, entries])
+    return {
+        'ticker': rows,
+        'entry': entries,
+        'exit': exits,
+        'return': (1 + gross) * (1 - cost) ** 2 - 1,
+    }
+
+
+def equity_curve(position, close, cost=0.0):
+    """Equal-weight portfolio value: each ticker gets the same share of capital, idle cash earns nothing."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.nan_to_num(close[:, 1:] / close[:, :-1] - 1)
+    held = position[:, :-1] * returns
+    # A position change at bar j is paid for in the period after it
+    turnover = np.abs(np.diff(position, axis=1, prepend=0))[:, :-1] * cost
+    portfolio = (held - turnover).mean(axis=0)
+    return np.concatenate(([1.0], np.cumprod(1 + portfolio)))
+
+
+def max_drawdown(equity):
+    """Largest peak-to-trough loss of an equity curve, as a positive fraction."""
+    peaks = np.maximum.accumulate(equity)
+    return float(np.max(1 - equity / peaks)) if len(equity) else 0.0
+
+
+def evaluate(position, close, cost=0.0, round_trips=None):
+    """Hit rate, trade returns, portfolio return and drawdown of one strategy."""
+    if round_trips is None:
+        round_trips = trades(position, close, cost)
+    returns = round_trips['return']
+    equity = equity_curve(position, close, cost)
+    years = max(close.shape[1] - 1, 1) / BARS_PER_YEAR
+    return {
+        'trades': int(len(returns)),
+        'hit_rate': float(np.mean(returns > 0)) if len(returns) else 0.0,
+        'avg_trade_return': float(np.mean(returns)) if len(returns) else 0.0,
+        'avg_bars_held': float(np.mean(round_trips['exit'] - round_trips['entry'])) if len(returns) else 0.0,
+        'total_return': float(equity[-1] - 1),
+        'annual_return': float(equity[-1] ** (1 / years) - 1),
+        'max_drawdown': max_drawdown(equity),
+        'exposure': float(position.mean()),
+    }
+
+
+def run_backtest(frames, strategies=STRATEGIES, lookback=None, step=None, max_age=None,
+                 workers=None, cost_bps=None):
+    """
+    Walk-forward backtest over a universe.
+
+    Args:
+        frames: {ticker: OHLC DataFrame}
+        strategies: Signal rules to evaluate, see signals()
+        lookback, step, max_age: Channel detection settings, see walk_forward_lines()
+        workers: Processes for channel detection (1 runs in this process)
+        cost_bps: Cost per side in basis points (default Settings.BACKTEST_COST_BPS)
+
+    Returns:
+        Dict with 'summary' (strategy -> metrics) and 'trades' (DataFrame of round trips)
+    """
+    workers = workers or Settings.SCAN_WORKERS
+    cost = (Settings.BACKTEST_COST_BPS if cost_bps is None else cost_bps) / 10_000
+    items = list(frames.items())
+    detect = partial(_ticker_lines, lookback=lookback, step=step, max_age=max_age)
+    logger.info(f"Detecting channels walk-forward for {len(items)} tickers with {workers} workers...")
+    if workers == 1:
+        results = [detect(item) for item in items]
+    else:
+        # Workers read the bars from shared memory instead of unpickling every frame
+        results = map_tickers(detect, frames, workers)
+    lines = {ticker: result for ticker, result in results if result is not None}
+    if not lines:
+        return {'summary': {}, 'trades': pd.DataFrame()}
+
+    tickers, index, prices = align_frames({ticker: frames[ticker] for ticker in lines})
+    upper = np.vstack([pd.Series(lines[t][0], frames[t].index).reindex(index).to_numpy() for t in tickers])
+    lower = np.vstack([pd.Series(lines[t][1], frames[t].index).reindex(index).to_numpy() for t in tickers])
+
+    summary = {}
+    trade_tables = []
+    for strategy in strategies:
+        entry, exit_ = signals(strategy, prices['High'], prices['Low'], prices['Close'], upper, lower)
+        position = positions(entry, exit_)
+        round_trips = trades(position, prices['Close'], cost)
+        summary[strategy] = evaluate(position, prices['Close'], cost, round_trips)
+        trade_tables.append(pd.DataFrame({
+            'strategy': strategy,
+            'ticker': np.array(tickers)[round_trips['ticker']],
+            'entry': index[round_trips['entry']],
+            'exit': index[round_trips['exit']],
+            'return': round_trips['return'],
+        }))
+    return {'summary': summary, 'trades': pd.concat(trade_tables, ignore_index=True)}
+
+
+def load_history(tickers, years, data_dir=None):
+    """Daily OHLCV for `years` years, from a local directory or the OHLCV cache (filled from yfinance)."""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=int(365.25 * years))
+    if data_dir:
+        return LocalFileSource(data_dir).fetch_many(tickers, start_date, end_date)
+    source = YFinanceSource()
+    if not Settings.DATA_CACHE_ENABLED:
+        return source.fetch_many(tickers, start_date, end_date)
+    return OHLCVCache().get_many(tickers, start_date, end_date, source.fetch_many)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of channel signals")
+    parser.add_argument('--tickers', nargs='+', default=list(Settings.INDICES), help="Symbols to test")
+    parser.add_argument('--universe', action='store_true', help="Test the index constituents instead")
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--data-dir', help="Read <ticker>.csv/.parquet files instead of the cache")
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="Write the summary and trades as JSON")
+    args = parser.parse_args()
+
+    tickers = args.tickers
+    if args.universe:
+        from universe_scanner import load_universes
+        tickers = load_universes()
+    frames = load_history(tickers, args.years, args.data_dir)
+    logger.info(f"Loaded history for {len(frames)}/{len(tickers)} tickers")
+    result = run_backtest(frames, args.strategies, workers=args.workers)
+    for strategy, metrics in result['summary'].items():
+        logger.info(
+            f"{strategy}: {metrics['trades']} trades, hit rate {metrics['hit_rate']:.1%}, "
+            f"avg trade {metrics['avg_trade_return']:.2%}, annual {metrics['annual_return']:.2%}, "
+            f"max drawdown {metrics['max_drawdown']:.1%}"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': result['summary'],
+                       'trades': json.loads(result['trades'].to_json(orient='records', date_format='iso'))},
+                      f, indent=2)
+        logger.info(f"Results written to {args.output}")
@@ -0,0 +1,335 @@
+# breakout_alerts.py
+"""Channel breakout alerts across the ticker universe, checked in one vectorized pass per tick."""
+import asyncio
+import logging
+import time
+from datetime import date
+
+import numpy as np
+
+from config import Settings
+from data_sources import YFinanceSource
+from market_analysis import MarketAnalysis
+from metrics import get_metrics
+from shared_ohlcv import map_tickers
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+
+
+def active_channel(data, long_term_channel, intermediate_channels, max_age):
+    """
+    The channel price should currently respect: the intermediate channel that
+    ends last if it ended at most `max_age` bars ago, else the long-term one.
+    """
+    last = len(data) - 1
+    recent = [channel for channel in intermediate_channels
+              if last - data.index.get_loc(channel[2][1]) <= max_age]
+    if recent:
+        return max(recent, key=lambda channel: channel[2][1])
+    return long_term_channel
+
+
+def session_dates(index):
+    """Exchange-local trading dates of bar timestamps, as datetime64[D]."""
+    return np.array([ts.date() for ts in index], dtype='datetime64[D]')
+
+
+def session_offsets(last_dates, quote_dates, sessions):
+    """
+    Trading sessions from each ticker's last daily bar to the session of its
+    quote (0 when the quote is from the last bar's session).
+
+    Sessions are counted on the dates that actually have bars: `sessions`
+    (recent daily bar dates across the universe) plus the quote dates, so
+    holidays are skipped and a ticker whose data lags the others gets a
+    larger offset. Tickers without a quote (NaT) get 0.
+
+    Args:
+        last_dates: datetime64[D] per ticker, date of its last daily bar
+        quote_dates: datetime64[D] per ticker, session of its latest price (NaT if none)
+        sessions: datetime64[D] trading dates seen in the daily data
+
+    Returns:
+        int64 array of bar offsets into the projected channel lines
+    """
+    last_dates = np.asarray(last_dates, dtype='datetime64[D]')
+    quote_dates = np.asarray(quote_dates, dtype='datetime64[D]')
+    quoted = ~np.isnat(quote_dates)
+    calendar = np.unique(np.concatenate([np.asarray(sessions, dtype='datetime64[D]'),
+                                         last_dates, quote_dates[quoted]]))
+    offsets = (np.searchsorted(calendar, quote_dates, side='right')
+               - np.searchsorted(calendar, last_dates, side='right'))
+    return np.where(quoted, np.maximum(offsets, 0), 0).astype(np.int64)
+
+
+def project_channel(data, channel, horizon):
+    """
+    Upper and lower lines of a channel from the last bar of `data` onwards.
+
+    Returns:
+        (upper, lower) arrays of `horizon` values; index k is k bars after the last bar
+    """
+    (slope, upper_intercept), (_, lower_intercept), (start_date, _) = channel
+    x = len(data) - 1 - data.index.get_loc(start_date) + np.arange(horizon)
+    return slope * x + upper_intercept, slope * x + lower_intercept
+
+
+class BreakoutAlertEngine:
+    """
+    Holds the projected channel lines of every ticker as (tickers x bars)
+    matrices and checks a vector of new closes against them in one pass.
+
+    A ticker alerts when its close is beyond a line by more than `margin`
+    times the channel width. The same direction does not alert again until
+    the close has been back inside the channel, and no ticker alerts twice
+    within `cooldown` seconds.
+    """
+
+    def __init__(self, tickers, upper, lower, margin=None, cooldown=None, clock=time.time,
+                 last_dates=None):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.upper = np.asarray(upper, dtype=np.float64).reshape(len(self.tickers), -1)
+        self.lower = np.asarray(lower, dtype=np.float64).reshape(len(self.tickers), -1)
+        # Date of the daily bar each ticker's lines start from (bar 0)
+        self.last_dates = (np.full(len(self.tickers), np.datetime64('NaT'), dtype='datetime64[D]')
+                           if last_dates is None else np.asarray(last_dates, dtype='datetime64[D]'))
+        self.margin = Settings.ALERT_BREAKOUT_MARGIN if margin is None else margin
+        self.cooldown = Settings.ALERT_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self.clock = clock
+        # armed[:, 0] for breakouts above the channel, armed[:, 1] below
+        self.armed = np.ones((len(self.tickers), 2), dtype=bool)
+        self.last_alert = np.full(len(self.tickers), -np.inf)
+
+    @classmethod
+    def from_channels(cls, results, horizon=None, max_age=None, **options):
+        """
+        Build the engine from identify_channels output.
+
+        Args:
+            results: {ticker: (data, long_term_channel, intermediate_channels)}
+            horizon: Bars the lines are projected past the last bar (default Settings.ALERT_HORIZON_BARS)
+            max_age: Bars since the end of an intermediate channel for it to stay active
+                (default Settings.ALERT_MAX_CHANNEL_AGE)
+            **options: Passed to the constructor (margin, cooldown, clock)
+
+        Returns:
+            BreakoutAlertEngine over the tickers that have an active channel
+        """
+        horizon = horizon or Settings.ALERT_HORIZON_BARS
+        max_age = Settings.ALERT_MAX_CHANNEL_AGE if max_age is None else max_age
+        tickers, upper, lower, last_dates = [], [], [], []
+        for ticker, (data, long_term_channel, intermediate_channels) in results.items():
+            channel = active_channel(data, long_term_channel, intermediate_channels, max_age)
+            if channel is None:
+                continue
+            lines = project_channel(data, channel, horizon)
+            tickers.append(ticker)
+            upper.append(lines[0])
+            lower.append(lines[1])
+            last_dates.append(session_dates(data.index[-1:])[0])
+        return cls(tickers, np.reshape(upper, (len(tickers), horizon)),
+                   np.reshape(lower, (len(tickers), horizon)),
+                   last_dates=np.array(last_dates, dtype='datetime64[D]'), **options)
+
+    @property
+    def horizon(self):
+        return self.upper.shape[1]
+
+    def carry_state(self, previous):
+        """Keep de-duplication and cooldown state of tickers also in a previous engine."""
+        for ticker, i in self.index.items():
+            j = previous.index.get(ticker)
+            if j is not None:
+                self.armed[i] = previous.armed[j]
+                self.last_alert[i] = previous.last_alert[j]
+
+    def align(self, closes):
+        """Closes as an array in engine order; tickers without a close are NaN."""
+        aligned = np.full(len(self.tickers), np.nan)
+        for ticker, close in closes.items():
+            i = self.index.get(ticker)
+            if i is not None:
+                aligned[i] = close
+        return aligned
+
+    def check(self, closes, bar=0):
+        """
+        Check one tick of closes for breakouts.
+
+        Args:
+            closes: Array in engine order (NaN for no quote) or {ticker: close}
+            bar: Bars since the last bar the channels were built from, one for
+                all tickers or an array in engine order (see session_offsets)
+
+        Returns:
+            List of alert dicts ('ticker', 'direction', 'close', 'line'), most extreme first
+        """
+        bars = np.broadcast_to(np.asarray(bar, dtype=np.int64), (len(self.tickers),))
+        past = bars >= self.horizon
+        if past.size and past.all():
+            logger.warning(f"Bar {bars.min()} is past the {self.horizon}-bar channel projection, rebuild the engine")
+            return []
+        if past.any():
+            logger.warning(f"{int(past.sum())} tickers are past the {self.horizon}-bar channel projection, skipping them")
+        closes = self.align(closes) if isinstance(closes, dict) else np.asarray(closes, dtype=np.float64)
+        closes = np.where(past, np.nan, closes)
+        rows = np.arange(len(self.tickers))
+        columns = np.minimum(bars, self.horizon - 1)
+        upper = self.upper[rows, columns]
+        lower = self.lower[rows, columns]
+        margin = (upper - lower) * self.margin
+
+        with np.errstate(invalid='ignore'):
+            above = closes > upper + margin
+            below = closes < lower - margin
+            inside = (closes <= upper) & (closes >= lower)
+        # Back inside the channel re-arms both directions
+        self.armed |= inside[:, None]
+
+        now = self.clock()
+        cooled = now - self.last_alert >= self.cooldown
+        fire_up = above & self.armed[:, 0] & cooled
+        fire_down = below & self.armed[:, 1] & cooled
+        fired = fire_up | fire_down
+        self.armed[fire_up, 0] = False
+        self.armed[fire_down, 1] = False
+        self.last_alert[fired] = now
+
+        indices = np.flatnonzero(fired)
+        lines = np.where(fire_up, upper, lower)[indices]
+        distance = np.abs(closes[indices] - lines) / (upper - lower)[indices]
+        return [
+            {
+                'ticker': self.tickers[i],
+                'direction': 'up' if fire_up[i] else 'down',
+                'close': float(closes[i]),
+                'line': float(line),
+            }
+            for _, i, line in sorted(zip(-distance, indices, lines))
+        ]
+
+
+def format_alerts(alerts):
+    """Alert lines packed into as few Telegram messages as possible."""
+    messages = []
+    current = ""
+    for alert in alerts:
+        if alert['direction'] == 'up':
+            line = f"🚀 {alert['ticker']} broke above its channel: {alert['close']:.2f} > {alert['line']:.2f}"
+        else:
+            line = f"🔻 {alert['ticker']} broke below its channel: {alert['close']:.2f} < {alert['line']:.2f}"
+        if current and len(current) + 1 + len(line) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
+
+
+def send_alerts(telegram, alerts):
+    """Queue the alerts on the private channel; returns the message futures."""
+    return [telegram.queue_text(message) for message in format_alerts(alerts)]
+
+
+def _ticker_channels(item):
+    """
+    Worker: detect channels for one (ticker, data) item.
+
+    Returns:
+        (session dates of the last horizon bars, upper line, lower line) or None
+    """
+    ticker, data = item
+    if data.empty:
+        return None
+    try:
+        channel = active_channel(data, *MarketAnalysis().identify_channels(data, ticker=ticker),
+                                 Settings.ALERT_MAX_CHANNEL_AGE)
+        if channel is None:
+            return None
+        upper, lower = project_channel(data, channel, Settings.ALERT_HORIZON_BARS)
+        return session_dates(data.index[-Settings.ALERT_HORIZON_BARS:]), upper, lower
+    except Exception as e:
+        logger.error(f"Error detecting channels for {ticker}: {e}")
+        return None
+
+
+def build_engine(tickers, workers=None, **options):
+    """
+    Detect channels for every ticker in a process pool and build the engine.
+    The bars are bulk-downloaded once here and shared with the workers;
+    only the projected lines come back.
+
+    Returns:
+        (BreakoutAlertEngine, datetime64[D] trading dates seen in the recent daily bars)
+    """
+    workers = workers or Settings.SCAN_WORKERS
+    frames = MarketAnalysis().fetch_many(tickers)
+    logger.info(f"Bulk-fetched data for {len(frames)}/{len(tickers)} tickers")
+    results = dict(zip(frames, map_tickers(_ticker_channels, frames, workers))) if frames else {}
+    names = [ticker for ticker in tickers if results.get(ticker) is not None]
+    horizon = Settings.ALERT_HORIZON_BARS
+    upper = np.reshape([results[ticker][1] for ticker in names], (len(names), horizon))
+    lower = np.reshape([results[ticker][2] for ticker in names], (len(names), horizon))
+    last_dates = np.array([results[ticker][0][-1] for ticker in names], dtype='datetime64[D]')
+    sessions = np.unique(np.concatenate([results[ticker][0] for ticker in names]
+                                        or [np.array([], dtype='datetime64[D]')]))
+    logger.info(f"Breakout engine built for {len(names)}/{len(tickers)} tickers with an active channel")
+    return BreakoutAlertEngine(names, upper, lower, last_dates=last_dates, **options), sessions
+
+
+def latest_quotes(tickers, source=None):
+    """
+    Latest traded price of every ticker (default source: one intraday yfinance download).
+
+    Returns:
+        {ticker: (close, exchange-local session date of the price)}
+    """
+    return (source or YFinanceSource()).latest_quotes(tickers)
+
+
+class BreakoutWatcher:
+    """
+    Keeps an engine between ticks: channels are rebuilt once a day, and
+    every tick downloads the latest prices and sends the new alerts.
+    """
+
+    def __init__(self, load_tickers, telegram, source=None):
+        self.load_tickers = load_tickers
+        self.telegram = telegram
+        self.source = source
+        self.engine = None
+        self.sessions = None
+        self.built_on = None
+
+    async def tick(self):
+        """Check the universe once; returns the alerts sent."""
+        today = date.today()
+        if self.engine is None or self.built_on != today:
+            tickers = await asyncio.to_thread(self.load_tickers)
+            engine, self.sessions = await asyncio.to_thread(build_engine, tickers)
+            if self.engine is not None:
+                engine.carry_state(self.engine)
+            self.engine, self.built_on = engine, today
+        if not self.engine.tickers:
+            return []
+
+        quotes = await asyncio.to_thread(latest_quotes, self.engine.tickers, self.source)
+        closes = {ticker: close for ticker, (close, _) in quotes.items()}
+        quote_dates = np.full(len(self.engine.tickers), np.datetime64('NaT'), dtype='datetime64[D]')
+        for ticker, (_, session) in quotes.items():
+            quote_dates[self.engine.index[ticker]] = session
+        # Sessions between each ticker's own last daily bar and its quote (0 if today's bar is already in)
+        bars = session_offsets(self.engine.last_dates, quote_dates, self.sessions)
+        with get_metrics().stage('alerts', tickers=len(self.engine.tickers)) as stage:
+            alerts = self.engine.check(closes, bars)
+            stage.add(alerts=len(alerts))
+        logger.info(f"{len(alerts)} breakout alerts from {len(closes)} prices")
+        if alerts:
+            send_alerts(self.telegram, alerts)
+            await self.telegram.flush()
+        return alerts
@@ -0,0 +1,98 @@
+# channel_scoring.py
+"""Batched channel construction and quality scoring over strided window views."""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def as_buffers(data):
+    """High/Low/Close columns as contiguous float64 arrays."""
+    return tuple(np.ascontiguousarray(data[column].values, dtype=np.float64)
+                 for column in ('High', 'Low', 'Close'))
+
+
+def _windows(values, starts, length):
+    """Rows of `values` for windows [start, start + length), read through a strided view."""
+    return sliding_window_view(values, length)[starts]
+
+
+def batch_channels(highs, lows, closes, starts, length, slope, intercept, is_long_term=False):
+    """
+    Vectorized calculate_channel for windows of one length.
+
+    Args:
+        highs, lows, closes: float64 price buffers
+        starts: Window start indices
+        length: Window length in bars
+        slope, intercept: Regression line of each window
+        is_long_term: Use the fixed long-term width multiplier
+
+    Returns:
+        (upper_intercept, lower_intercept) arrays
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    slope = np.asarray(slope, dtype=np.float64)
+    intercept = np.asarray(intercept, dtype=np.float64)
+    if len(starts) == 0:
+        return np.empty(0), np.empty(0)
+
+    x = np.arange(length)
+    trend_line = slope[:, None] * x + intercept[:, None]
+    high = _windows(highs, starts, length)
+    low = _windows(lows, starts, length)
+
+    if is_long_term:
+        width_multiplier = np.full(len(starts), 1.5)
+    else:
+        volatility = np.std(high - low, axis=1)
+        avg_price = np.mean(_windows(closes, starts, length), axis=1)
+        width_multiplier = np.clip(volatility / avg_price * 20, 1.0, 1.5)
+
+    channel_width = (np.std(high - trend_line, axis=1) +
+                     np.std(low - trend_line, axis=1)) * width_multiplier
+    return intercept + channel_width / 2, intercept - channel_width / 2
+
+
+def batch_quality(highs, lows, closes, starts, length, slope, upper_intercept, lower_intercept):
+    """
+    Vectorized calculate_channel_quality for windows of one length.
+
+    Returns:
+        Dict of arrays: 'touch', 'containment', 'trend' and the weighted 'score'
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    if len(starts) == 0:
+        empty = np.empty(0)
+        return {'touch': empty, 'containment': empty, 'trend': empty, 'score': empty}
+
+    x = np.arange(length)
+    slope = np.asarray(slope, dtype=np.float64)[:, None]
+    upper_line = slope * x + np.asarray(upper_intercept, dtype=np.float64)[:, None]
+    lower_line = slope * x + np.asarray(lower_intercept, dtype=np.float64)[:, None]
+
+    high = _windows(highs, starts, length)
+    low = _windows(lows, starts, length)
+    close = _windows(closes, starts, length)
+
+    # 1. Channel touches
+    tolerance = np.mean(upper_line - lower_line, axis=1, keepdims=True) * 0.05
+    touches = (np.sum(np.abs(high - upper_line) < tolerance, axis=1) +
+               np.sum(np.abs(low - lower_line) < tolerance, axis=1))
+
+    # 2. Price containment
+    contains_price = np.sum((low > lower_line) & (high < upper_line), axis=1)
+
+    # 3. Trend strength
+    price_range = np.max(high, axis=1) - np.min(low, axis=1)
+    trend_movement = np.abs(close[:, -1] - close[:, 0])
+
+    touch_score = touches / length
+    containment_score = contains_price / length
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_score = trend_movement / price_range
+
+    return {
+        'touch': touch_score,
+        'containment': containment_score,
+        'trend': trend_score,
+        'score': 0.3 * touch_score + 0.4 * containment_score + 0.3 * trend_score,
+    }
@@ -0,0 +1,53 @@
+# channel_store.py
+"""Persisted per-window channel detection results for incremental runs."""
+import json
+import logging
+import os
+import tempfile
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelStore:
+    """
+    One JSON file per ticker and window size holding the window parameters,
+    the last bar seen, and for every scanned window its regression stats,
+    channel and score.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or Settings.CHANNEL_STORE_DIR
+
+    def _path(self, ticker, window_size):
+        name = ticker.replace('^', '_').replace('/', '_')
+        return os.path.join(self.directory, f'{name}_{window_size}.json')
+
+    def load(self, ticker, window_size, step, engine='regression'):
+        """Return the stored state, or None if missing or built with other parameters."""
+        try:
+            with open(self._path(ticker, window_size)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get('window_size') != window_size or state.get('step') != step
+                or state.get('engine', 'regression') != engine):
+            logger.info(f"Stored channels for {ticker} use other window parameters, recomputing")
+            return None
+        return state
+
+    def save(self, ticker, state):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(ticker, state['window_size'])
+        # A unique temp file per writer, so concurrent saves never share one
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump(state, f)
+        except Exception:
+            if tmp_path:
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
@@ -0,0 +1,310 @@
+# channel_stream.py
+"""
+Streaming channel tracker: bars arrive one at a time (live intraday feed or
+a replay file) and the rolling regression channel is updated in O(1) per bar.
+
+Usage:
+    python src/channel_stream.py ^GSPC --interval 5m
+    python src/channel_stream.py ^GSPC --interval 1h --replay data/GSPC_1m.csv
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+from collections import namedtuple
+from datetime import timezone
+
+import pandas as pd
+
+from config import Settings
+from data_sources import YFinanceSource
+from trend_engine import TREND_THRESHOLDS
+
+logger = logging.getLogger(__name__)
+
+# Intervals yfinance serves intraday, with how far back each can be fetched
+INTRADAY_INTERVALS = {
+    '1m': '5d', '2m': '30d', '5m': '30d', '15m': '30d',
+    '30m': '30d', '60m': '30d', '90m': '30d', '1h': '30d',
+}
+
+Bar = namedtuple('Bar', ['time', 'high', 'low', 'close'])
+
+
+class StreamingChannel:
+    """
+    Rolling-window version of validate_trend + calculate_channel. Running
+    sums of the last `window_size` closes, highs, lows and bar ranges (and
+    their products with the bar position) give slope, intercept, R-squared,
+    movement significance and band width without touching the window.
+
+    Floating-point drift from adding and removing bars is bounded by
+    rebuilding the sums from the window every `refresh_every` bars, which
+    keeps the cost amortized O(1).
+    """
+
+    # Summed per bar: y, x*y, y*y for close, high and low, plus range and range^2
+    _FIELDS = 11
+
+    def __init__(self, window_size=40, is_long_term=False, refresh_every=None):
+        if window_size < 2:
+            raise ValueError("window_size must be at least 2")
+        self.window_size = window_size
+        self.is_long_term = is_long_term
+        self.refresh_every = refresh_every or max(1000, 10 * window_size)
+        self.bars = 0
+        self._ring = [None] * window_size
+        self._sums = [0.0] * self._FIELDS
+        self._offset = None  # First price, subtracted to keep the sums well conditioned
+        self._base = 0       # Bar number that x is measured from
+        self._since_refresh = 0
+
+    @property
+    def ready(self):
+        return self.bars >= self.window_size
+
+    def _terms(self, position, high, low, close):
+        x = position - self._base
+        y, h, l = close - self._offset, high - self._offset, low - self._offset
+        r = high - low
+        return (y, x * y, y * y, h, x * h, h * h, l, x * l, l * l, r, r * r)
+
+    def _refresh(self):
+        """Rebuild the sums from the bars in the window, measuring x from its first bar."""
+        count = min(self.bars, self.window_size)
+        first = self.bars - count
+        self._base = first
+        sums = [0.0] * self._FIELDS
+        for position in range(first, self.bars):
+            _, high, low, close = self._ring[position % self.window_size]
+            for k, term in enumerate(self._terms(position, high, low, close)):
+                sums[k] += term
+        self._sums = sums
+        self._since_refresh = 0
+
+    def update(self, high, low, close, time=None):
+        """
+        Add one bar.
+
+        Args:
+            high, low, close: Bar prices
+            time: Optional bar timestamp, reported as the channel's time range
+
+        Returns:
+            Current state dict (see state()), or None until the window is full
+        """
+        high, low, close = float(high), float(low), float(close)
+        if self._offset is None:
+            self._offset = close
+        slot = self.bars % self.window_size
+        old = self._ring[slot]
+        sums = self._sums
+        if old is not None:
+            for k, term in enumerate(self._terms(self.bars - self.window_size, old[1], old[2], old[3])):
+                sums[k] -= term
+        for k, term in enumerate(self._terms(self.bars, high, low, close)):
+            sums[k] += term
+        self._ring[slot] = (time, high, low, close)
+        self.bars += 1
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._refresh()
+        return self.state() if self.ready else None
+
+    def update_bar(self, bar):
+        """Add a Bar (or any row with time/high/low/close attributes)."""
+        return self.update(bar.high, bar.low, bar.close, bar.time)
+
+    def state(self):
+        """
+        Channel of the current window, in local coordinates (x = 0 at its first bar).
+
+        Returns:
+            validate_trend-style dict ('isTrend', 'slope', 'intercept', 'r_squared',
+            'movement_significance') plus 'width', 'upper' and 'lower' at the
+            latest bar and 'start'/'end' times; None until the window is full
+        """
+        if not self.ready:
+            return None
+        n = self.window_size
+        first = self.bars - n
+        # x of the window's first bar relative to the sums' base
+        shift = first - self._base
+        sy, sxy, syy, sh, sxh, shh, sl, sxl, sll, sr, srr = self._sums
+
+        # Moments of local x = 0..n-1
+        sx = n * (n - 1) / 2
+        var_x = (n * n - 1) / 12
+
+        def covariance(s, sx_s):
+            # Sums use x = local + shift, so sum(local * s) = sx_s - shift * s
+            return (sx_s - shift * s) / n - (sx / n) * (s / n)
+
+        def variance(s, ss):
+            return max(ss / n - (s / n) ** 2, 0.0)
+
+        cov_y = covariance(sy, sxy)
+        var_y = variance(sy, syy)
+        slope = cov_y / var_x
+        intercept = (sy - slope * sx) / n + self._offset
+        r_squared = 1 - max(var_y - slope * cov_y, 0.0) / var_y if var_y > 0 else float('nan')
+
+        avg_price = sy / n + self._offset
+        first_close = self._ring[first % n][3]
+        last_time, _, _, last_close = self._ring[(self.bars - 1) % n]
+        movement_significance = abs(last_close - first_close) / avg_price
+
+        r2_threshold, slope_threshold, movement_threshold = TREND_THRESHOLDS[not self.is_long_term]
+        is_trend = (r_squared > r2_threshold and abs(slope) > slope_threshold and
+                    movement_significance > movement_threshold)
+
+        # calculate_channel: std of high and low residuals around the trend line
+        std_high = math.sqrt(max(variance(sh, shh) - 2 * slope * covariance(sh, sxh) + slope ** 2 * var_x, 0.0))
+        std_low = math.sqrt(max(variance(sl, sll) - 2 * slope * covariance(sl, sxl) + slope ** 2 * var_x, 0.0))
+        if self.is_long_term:
+            width_multiplier = 1.5
+        else:
+            relative_volatility = math.sqrt(variance(sr, srr)) / avg_price
+            width_multiplier = max(1.0, min(1.5, relative_volatility * 20))
+        width = (std_high + std_low) * width_multiplier
+
+        center = intercept + slope * (n - 1)
+        return {
+            'isTrend': is_trend,
+            'slope': slope,
+            'intercept': intercept,
+            'r_squared': r_squared,
+            'movement_significance': movement_significance,
+            'width': width,
+            'upper': center + width / 2,
+            'lower': center - width / 2,
+            'start': self._ring[first % n][0],
+            'end': last_time,
+        }
+
+    def channel(self):
+        """Current channel in the calculate_channel format, or None if there is no trend."""
+        state = self.state()
+        if state is None or not state['isTrend']:
+            return None
+        return (
+            (state['slope'], state['intercept'] + state['width'] / 2),
+            (state['slope'], state['intercept'] - state['width'] / 2),
+            (state['start'], state['end'])
+        )
+
+
+def _as_bars(data):
+    for row in data.itertuples():
+        yield Bar(row.Index, row.High, row.Low, row.Close)
+
+
+def resample(data, interval):
+    """Aggregate OHLCV bars to a coarser interval such as '5m' or '1h'."""
+    rule = interval.replace('m', 'min') if interval.endswith('m') else interval
+    aggregated = data.resample(rule, label='left', closed='left').agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+    return aggregated.dropna(subset=['Close'])
+
+
+def replay_bars(path, interval=None):
+    """
+    Bars from a local CSV or parquet file, oldest first.
+
+    Args:
+        path: File with a datetime index and High/Low/Close columns
+        interval: Optional coarser interval to resample to, e.g. '1h'
+
+    Returns:
+        Generator of Bar tuples
+    """
+    if path.endswith('.parquet'):
+        data = pd.read_parquet(path)
+    else:
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+    data = data.sort_index()
+    if interval:
+        data = resample(data, interval)
+    return _as_bars(data)
+
+
+async def poll_bars(ticker, interval=None, poll_seconds=None, source=None):
+    """
+    Live intraday bars: the recent history first, then every bar as it
+    completes. The bar still forming is never yielded.
+
+    Args:
+        ticker: Symbol, e.g. '^GSPC'
+        interval: One of INTRADAY_INTERVALS (default Settings.STREAM_INTERVAL)
+        poll_seconds: Delay between polls (default Settings.STREAM_POLL_SECONDS)
+        source: DataSource with fetch_intraday (default YFinanceSource)
+    """
+    source = source or YFinanceSource()
+    interval = interval or Settings.STREAM_INTERVAL
+    if interval not in INTRADAY_INTERVALS:
+        raise ValueError(f"Unsupported intraday interval {interval}, use one of {', '.join(INTRADAY_INTERVALS)}")
+    poll_seconds = poll_seconds or Settings.STREAM_POLL_SECONDS
+    bar_length = pd.Timedelta(interval.replace('m', 'min') if interval.endswith('m') else interval)
+    period = INTRADAY_INTERVALS[interval]
+    last_time = None
+    while True:
+        try:
+            data = await asyncio.to_thread(source.fetch_intraday, ticker, period, interval)
+            if data is not None and not data.empty:
+                now = pd.Timestamp.now(tz=timezone.utc)
+                if data.index.tz is None:
+                    # Naive bar times (e.g. local files) are taken as UTC
+                    now = now.tz_localize(None)
+                for bar in _as_bars(data):
+                    if last_time is not None and bar.time <= last_time:
+                        continue
+                    if bar.time + bar_length > now:
+                        break
+                    last_time = bar.time
+                    yield bar
+        except Exception as e:
+            logger.error(f"Error polling {interval} bars for {ticker}: {e}")
+        # After the first poll only the latest bars are needed
+        period = '1d'
+        await asyncio.sleep(poll_seconds)
+
+
+async def track(ticker, interval=None, window_size=None, replay=None, source=None):
+    """Log the streaming channel of a ticker whenever its trend state changes."""
+    tracker = StreamingChannel(window_size or Settings.STREAM_WINDOW_SIZE)
+    was_trend = None
+
+    def on_bar(bar):
+        nonlocal was_trend
+        state = tracker.update_bar(bar)
+        if state is not None and state['isTrend'] != was_trend:
+            was_trend = state['isTrend']
+            logger.info(
+                f"{ticker} {bar.time}: {'trend' if was_trend else 'no trend'}, slope {state['slope']:.4f}, "
+                f"R² {state['r_squared']:.2f}, channel {state['lower']:.2f} - {state['upper']:.2f}"
+            )
+
+    if replay:
+        for bar in replay_bars(replay, interval):
+            on_bar(bar)
+        logger.info(f"Replayed {tracker.bars} bars, last state: {tracker.state()}")
+        return
+    async for bar in poll_bars(ticker, interval, source=source):
+        on_bar(bar)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Track a rolling regression channel bar by bar")
+    parser.add_argument('ticker')
+    parser.add_argument('--interval', help="Bar interval, e.g. 5m or 1h (default STREAM_INTERVAL)")
+    parser.add_argument('--window', type=int, help="Bars in the rolling window (default STREAM_WINDOW_SIZE)")
+    parser.add_argument('--replay', help="CSV/parquet file to replay instead of polling yfinance")
+    args = parser.parse_args()
+    if args.replay and not os.path.exists(args.replay):
+        parser.error(f"Replay file not found: {args.replay}")
+    asyncio.run(track(args.ticker, args.interval, args.window, args.replay))
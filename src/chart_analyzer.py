@@ -1,70 +1,117 @@
 # chart_analyzer.py
-from anthropic import Anthropic
-from config import Settings
-import base64
+from chart_image import ChartImage
+from llm_client import get_llm_client, cacheable_system
+from metrics import get_metrics
 import logging
-from PIL import Image
-import io
 
 logger = logging.getLogger(__name__)
 
 class ChartAnalyzer:
-    def __init__(self):
-        self.anthropic = Anthropic(api_key=Settings.ANTHROPIC_API_KEY)
+    def __init__(self, llm=None):
+        self.llm = llm or get_llm_client()
 
-    def analyze_chart(self, image_path, character_description, prompt):
-        """Analyze chart using Claude Vision."""
+    async def analyze_chart(self, image, character_description, prompt, format_rules=None):
+        """
+        Analyze chart using Claude Vision. `image` is a ChartImage or a file path.
+        The persona and optional format rules form a cached system prefix, so only
+        the image and the per-chart prompt are new on each call.
+        """
         try:
-            base64_image = self._encode_image(image_path)
-            if not base64_image:
+            image = self._load_image(image)
+            if not image:
                 return None
                 
-            message = self.anthropic.messages.create(
-                model="claude-sonnet-4-5",
-                max_tokens=1000,
-                temperature=0,
-                system=character_description,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": base64_image
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
+            message = await self.llm.create_message(
+                call_type="chart_analysis",
+                **self._build_request(image, character_description, prompt, format_rules)
             )
             return self._format_response(message)
         except Exception as e:
             logger.error(f"Error in chart analysis: {e}")
             return None
 
-    def _encode_image(self, image_path):
-        """Encode image to base64."""
+    async def analyze_charts_batch(self, charts, character_description, format_rules=None):
+        """
+        Analyze many charts with one Message Batches submission.
+        Charts the batch could not answer are retried with direct calls; charts
+        whose image could not be prepared are logged and left without a result.
+
+        Args:
+            charts: Dict of name -> (image, prompt)
+            character_description: Persona system prompt
+            format_rules: Optional stable format rules appended to the system prompt
+
+        Returns:
+            Dict of name -> analysis text (None on failure)
+        """
+        batch_requests = {}
+        for name, (image, prompt) in charts.items():
+            try:
+                image = self._load_image(image)
+                if image:
+                    batch_requests[name] = self._build_request(image, character_description, prompt,
+                                                               format_rules)
+            except Exception as e:
+                logger.error(f"Error building the analysis request for {name}: {e}")
+
+        try:
+            messages = await self.llm.create_message_batch(batch_requests, call_type="chart_analysis")
+        except Exception as e:
+            logger.error(f"Error in batch chart analysis: {e}")
+            messages = {}
+
+        results = {}
+        for name, (image, prompt) in charts.items():
+            results[name] = self._format_response(messages.get(name))
+            if results[name] is not None:
+                continue
+            if name not in batch_requests:
+                # Its image could not be loaded or encoded, so a direct call would fail the same way
+                logger.error(f"No analysis for {name}: its chart could not be prepared")
+                continue
+            logger.warning(f"No batch result for {name}, falling back to a direct call")
+            results[name] = await self.analyze_chart(image, character_description, prompt, format_rules)
+        return results
+
+    @staticmethod
+    def _build_request(image, character_description, prompt, format_rules=None):
+        """messages.create parameters for one chart analysis."""
+        with get_metrics().stage('encode', bytes=len(image)):
+            data = image.base64
+        return {
+            "model": "claude-sonnet-4-5",
+            "max_tokens": 1000,
+            "temperature": 0,
+            "system": cacheable_system(character_description, format_rules),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": image.media_type,
+                                "data": data
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": prompt
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def _load_image(self, image):
+        """Accept an in-memory ChartImage or load one from disk."""
+        if isinstance(image, ChartImage):
+            return image
         try:
-            with Image.open(image_path) as img:
-                # Convert to JPEG if it's not already
-                if img.format != 'JPEG':
-                    rgb_im = img.convert('RGB')
-                    jpeg_buffer = io.BytesIO()
-                    rgb_im.save(jpeg_buffer, format="JPEG")
-                    img_str = base64.b64encode(jpeg_buffer.getvalue()).decode('utf-8')
-                else:
-                    with open(image_path, "rb") as image_file:
-                        img_str = base64.b64encode(image_file.read()).decode('utf-8')
-            return img_str
+            return ChartImage.from_file(image)
         except Exception as e:
-            logger.error(f"Error encoding image: {e}")
+            logger.error(f"Error loading image: {e}")
             return None
 
     def _format_response(self, result):
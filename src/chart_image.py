@@ -0,0 +1,73 @@
+# chart_image.py
+"""In-memory chart image shared by the Telegram and Claude consumers."""
+import base64
+import functools
+import hashlib
+import io
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Image formats accepted by Claude vision, keyed by PIL format name
+MEDIA_TYPES = {
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+
+class ChartImage:
+    """Encoded image bytes plus media type; encodings are computed once and reused."""
+
+    def __init__(self, data, media_type, name='chart.png'):
+        self.data = data
+        self.media_type = media_type
+        self.name = name
+
+    @classmethod
+    def from_format(cls, data, image_format, name):
+        """Wrap bytes rendered in a matplotlib/PIL format such as 'png' or 'jpg'."""
+        image_format = image_format.upper().replace('JPG', 'JPEG')
+        return cls(data, MEDIA_TYPES[image_format], name)
+
+    @classmethod
+    def from_file(cls, image_path):
+        """Load an image file, converting to PNG if Claude cannot read its format."""
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format in MEDIA_TYPES:
+                return cls(data, MEDIA_TYPES[img.format], image_path)
+            buffer = io.BytesIO()
+            img.convert('RGB').save(buffer, format='PNG')
+        return cls(buffer.getvalue(), MEDIA_TYPES['PNG'], image_path)
+
+    @functools.cached_property
+    def base64(self):
+        """Base64 text for the Anthropic image content block."""
+        return base64.b64encode(self.data).decode('utf-8')
+
+    @functools.cached_property
+    def sha256(self):
+        """Content hash, used to recognise the same image across sends."""
+        return hashlib.sha256(self.data).hexdigest()
+
+    def __len__(self):
+        return len(self.data)
+
+    def downscaled(self, max_size):
+        """
+        Copy of the image fitted inside max_size=(width, height) pixels, in
+        the same format; the image itself if it already fits.
+        """
+        with Image.open(io.BytesIO(self.data)) as img:
+            if img.width <= max_size[0] and img.height <= max_size[1]:
+                return self
+            image_format = img.format
+            img.thumbnail(max_size, Image.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, format=image_format)
+        return ChartImage(buffer.getvalue(), self.media_type, self.name)
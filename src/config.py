@@ -19,13 +19,122 @@ class Settings:
     INSTAGRAM_USERNAME = os.getenv('INSTAGRAM_USERNAME')
     INSTAGRAM_PASSWORD = os.getenv('INSTAGRAM_PASSWORD')
     
+    # Claude Client Configuration
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))  # Requests in flight
+    LLM_MAX_RETRIES = 5  # Retries on 429 (rate limit) / 529 (overloaded)
+    LLM_BACKOFF_SECONDS = 1.0  # Base delay, doubled per retry with full jitter
+    LLM_MAX_BACKOFF_SECONDS = 30.0
+    LLM_TIMEOUT_SECONDS = 120.0  # Per-call timeout
+    LLM_WEB_SEARCH_TIMEOUT_SECONDS = 300.0  # Macro analysis runs several web searches
+    LLM_PROMPT_CACHING = os.getenv('LLM_PROMPT_CACHING', 'true').lower() == 'true'  # Cache persona prefix
+    LLM_BATCH_MODE = os.getenv('LLM_BATCH_MODE', 'false').lower() == 'true'  # Weekly charts via Message Batches
+    LLM_BATCH_DEADLINE_SECONDS = float(os.getenv('LLM_BATCH_DEADLINE_SECONDS', 3 * 3600))
+    LLM_BATCH_POLL_SECONDS = 30.0
+    
+    # Claude Response Cache Configuration
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_BYPASS = os.getenv('LLM_CACHE_BYPASS', 'false').lower() == 'true'  # Skip lookups and writes
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join('.cache', 'llm_responses.sqlite3'))
+    LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024  # LRU eviction above this size
+    LLM_CACHE_TTLS = {  # Seconds per call type
+        'chart_analysis': 7 * 24 * 3600,
+        'macro_analysis': 12 * 3600,  # Web search results go stale quickly
+        'hebrew_fix': 30 * 24 * 3600,
+        'default': 24 * 3600
+    }
+    LLM_STUB_MODE = os.getenv('LLM_STUB_MODE', 'false').lower() == 'true'  # Local stand-in, no API calls
+    
     # Market Data Configuration
     INDICES = {
         '^GSPC': 'S&P 500',
         '^NDX': 'NASDAQ-100'
     }
     
+    # Market Data Cache Configuration
+    DATA_CACHE_ENABLED = os.getenv('DATA_CACHE_ENABLED', 'true').lower() == 'true'
+    DATA_CACHE_DIR = os.getenv('DATA_CACHE_DIR', os.path.join('.cache', 'ohlcv'))
+    DATA_CACHE_TTL_HOURS = float(os.getenv('DATA_CACHE_TTL_HOURS', 12))  # Serve cache without refresh
+    OFFLINE_MODE = os.getenv('OFFLINE_MODE', 'false').lower() == 'true'  # Cache only, no network
+    
+    # Bulk Download Configuration
+    DOWNLOAD_CHUNK_SIZE = 100  # Symbols per yf.download request
+    DOWNLOAD_CONCURRENCY = 4  # Chunks downloaded at the same time
+    DOWNLOAD_RETRIES = 3  # Retries for symbols missing from a bulk response
+    DOWNLOAD_BACKOFF_SECONDS = 2.0  # Base delay, doubled per retry
+    
+    # Channel Detection Configuration
+    INCREMENTAL_CHANNELS = os.getenv('INCREMENTAL_CHANNELS', 'true').lower() == 'true'  # Reuse last run's windows
+    CHANNEL_STORE_DIR = os.getenv('CHANNEL_STORE_DIR', os.path.join('.cache', 'channels'))
+    CHANNEL_ENGINE = os.getenv('CHANNEL_ENGINE', 'regression')  # 'regression' or 'peaks' (pivot-fitted lines)
+    # Window pyramid for multi-scale detection, e.g. "20,40,80,160"; empty keeps the single 40-bar scan
+    CHANNEL_WINDOW_SIZES = [int(size) for size in os.getenv('CHANNEL_WINDOW_SIZES', '').split(',') if size.strip()]
+    
+    # Streaming Channel Configuration (src/channel_stream.py)
+    STREAM_INTERVAL = os.getenv('STREAM_INTERVAL', '5m')  # Intraday bar interval, e.g. 5m or 1h
+    STREAM_WINDOW_SIZE = int(os.getenv('STREAM_WINDOW_SIZE', 40))  # Bars in the rolling regression
+    STREAM_POLL_SECONDS = float(os.getenv('STREAM_POLL_SECONDS', 30))  # Live feed polling delay
+    
+    # Breakout Alerts Configuration (src/breakout_alerts.py)
+    ALERT_TIMES = os.getenv('ALERT_TIMES', '17:00,19:00,21:00,22:45').split(',')  # Checks per day (scheduler)
+    ALERT_BREAKOUT_MARGIN = float(os.getenv('ALERT_BREAKOUT_MARGIN', 0.05))  # Beyond the line by this share of the width
+    ALERT_COOLDOWN_SECONDS = float(os.getenv('ALERT_COOLDOWN_SECONDS', 4 * 3600))  # Per ticker
+    ALERT_HORIZON_BARS = 20  # Bars the channel lines are projected ahead
+    ALERT_MAX_CHANNEL_AGE = 40  # Bars since an intermediate channel ended for it to stay active
+    
+    # Backtest Configuration (src/backtest.py)
+    BACKTEST_LOOKBACK = 252  # Bars of history each walk-forward detection sees
+    BACKTEST_STEP = 20  # Bars between re-detections
+    BACKTEST_STOP_MARGIN = 0.1  # Touch strategy stops below the lower line by this share of the width
+    BACKTEST_COST_BPS = float(os.getenv('BACKTEST_COST_BPS', 5))  # Cost per side
+    
+    # Parameter Sweep Configuration (src/parameter_sweep.py)
+    SWEEP_HORIZON = int(os.getenv('SWEEP_HORIZON', 20))  # Bars after a channel used to score it
+    
+    # Telegram Send Queue Configuration
+    TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))  # Requests per second across all chats
+    TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 0.33))  # Per chat; channels allow ~20/minute
+    TELEGRAM_MAX_RETRIES = 5
+    TELEGRAM_BACKOFF_SECONDS = 1.0  # Base delay for timeouts and network errors, doubled per retry
+    TELEGRAM_FILE_ID_REUSE = os.getenv('TELEGRAM_FILE_ID_REUSE', 'true').lower() == 'true'  # Resend media by file_id
+    TELEGRAM_FILE_ID_CACHE = os.getenv('TELEGRAM_FILE_ID_CACHE', os.path.join('.cache', 'telegram_file_ids.json'))
+    TELEGRAM_SCAN_ALBUM = os.getenv('TELEGRAM_SCAN_ALBUM', 'true').lower() == 'true'  # Universe charts as one album
+    
+    # Run Metrics Configuration
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'  # Per-stage timings and counters
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join('.cache', 'metrics'))  # One JSON file per run
+    
+    # Chart Rendering Configuration
+    RENDER_PROFILES = {
+        # Sized for Claude vision, which downscales images above ~1.15 megapixels
+        'vision': {'figsize': (14, 7), 'dpi': 100, 'format': 'png'},
+        # Telegram photos are shown at up to 2560px on the long edge
+        'publish': {'figsize': (20, 10), 'dpi': 128, 'format': 'png'}
+    }
+    CHART_RENDER_PROFILE = os.getenv('CHART_RENDER_PROFILE', 'publish')
+    
+    # Universe Scan Configuration
+    SCAN_UNIVERSE = os.getenv('SCAN_UNIVERSE', 'false').lower() == 'true'
+    UNIVERSES = {
+        'S&P 500': 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies',
+        'NASDAQ-100': 'https://en.wikipedia.org/wiki/Nasdaq-100'
+    }
+    SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', os.cpu_count() or 4))
+    SCAN_TOP_N = int(os.getenv('SCAN_TOP_N', 5))  # Tickers sent to vision analysis
+    
     # Schedule Configuration
     MACRO_ANALYSIS_DAY = 18  # Day of month for macro analysis
     TECHNICAL_ANALYSIS_DAY = 6  # Sunday (0 = Monday, 6 = Sunday)
-    MOTIVATION_POST_TIMES = ["09:00", "15:00", "19:00"]  # Times for motivation posts
\ No newline at end of file
+    MOTIVATION_POST_TIMES = ["09:00", "15:00", "19:00"]  # Times for motivation posts
+    
+    # Scheduler daemon (src/scheduler.py): job -> when it runs. A job runs at each
+    # of its times on the days matching 'day' (of month) and 'weekday', if given.
+    SCHEDULE = {
+        'macro_analysis': {'day': MACRO_ANALYSIS_DAY, 'times': ["10:00"]},
+        'technical_analysis': {'weekday': TECHNICAL_ANALYSIS_DAY, 'times': ["10:00"]},
+        'motivation_post': {'times': MOTIVATION_POST_TIMES},
+        'breakout_alerts': {'times': ALERT_TIMES},
+    }
+    SCHEDULER_JOBS = [job.strip() for job in os.getenv('SCHEDULER_JOBS', 'macro_analysis,technical_analysis').split(',')]  # Enabled jobs
+    SCHEDULER_JITTER_SECONDS = float(os.getenv('SCHEDULER_JITTER_SECONDS', 120))  # Random delay per run
+    SCHEDULER_CATCHUP_HOURS = float(os.getenv('SCHEDULER_CATCHUP_HOURS', 6))  # Missed runs younger than this are run at startup
+    SCHEDULER_STATE_PATH = os.getenv('SCHEDULER_STATE_PATH', os.path.join('.cache', 'scheduler.json'))
\ No newline at end of file
@@ -0,0 +1,201 @@
+# data_sources.py
+"""Pluggable OHLCV data sources: yfinance bulk download and local files."""
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class DataSource:
+    """Base interface for daily OHLCV providers."""
+
+    def fetch(self, ticker, start_date, end_date):
+        """Return a DataFrame of bars in [start_date, end_date) or None."""
+        raise NotImplementedError
+
+    def fetch_many(self, tickers, start_date, end_date):
+        """Return {ticker: DataFrame} for every ticker that could be loaded."""
+        frames = {}
+        for ticker in tickers:
+            data = self.fetch(ticker, start_date, end_date)
+            if data is not None and not data.empty:
+                frames[ticker] = data
+        return frames
+
+    def latest_quotes(self, tickers):
+        """Return {ticker: (latest price, exchange-local session date)} for tickers with a price."""
+        raise NotImplementedError
+
+    def fetch_intraday(self, ticker, period, interval):
+        """Return intraday bars of the last `period` (e.g. '5d') at `interval` (e.g. '5m'), oldest first."""
+        raise NotImplementedError
+
+
+class YFinanceSource(DataSource):
+    """
+    yfinance-backed source. fetch_many downloads symbols in chunks with
+    yf.download, running a bounded number of chunks concurrently and
+    retrying symbols that came back empty with jittered exponential backoff.
+    """
+
+    def __init__(self, chunk_size=None, max_workers=None, retries=None, backoff=None):
+        self.chunk_size = chunk_size or Settings.DOWNLOAD_CHUNK_SIZE
+        self.max_workers = max_workers or Settings.DOWNLOAD_CONCURRENCY
+        self.retries = Settings.DOWNLOAD_RETRIES if retries is None else retries
+        self.backoff = Settings.DOWNLOAD_BACKOFF_SECONDS if backoff is None else backoff
+
+    def fetch(self, ticker, start_date, end_date):
+        return yf.Ticker(ticker).history(start=start_date, end=end_date)
+
+    def _download_chunk(self, tickers, start_date, end_date):
+        raw = yf.download(
+            tickers, start=start_date, end=end_date, group_by='ticker',
+            auto_adjust=True, actions=False, ignore_tz=False, threads=False, progress=False
+        )
+        return split_download(raw, tickers)
+
+    def _fetch_chunk_with_retry(self, tickers, start_date, end_date):
+        frames = {}
+        pending = list(tickers)
+        for attempt in range(self.retries + 1):
+            try:
+                frames.update(self._download_chunk(pending, start_date, end_date))
+            except Exception as e:
+                logger.warning(f"Bulk download failed for {len(pending)} tickers: {e}")
+            pending = [t for t in pending if t not in frames]
+            if not pending or attempt == self.retries:
+                break
+            delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            logger.info(f"Retrying {len(pending)} tickers in {delay:.1f}s")
+            time.sleep(delay)
+        if pending:
+            logger.error(f"No data after {self.retries + 1} attempts for: {', '.join(pending)}")
+        return frames
+
+    def fetch_intraday(self, ticker, period, interval):
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def latest_quotes(self, tickers):
+        """Latest traded price of every ticker from one 1-minute yf.download."""
+        try:
+            raw = yf.download(tickers, period='1d', interval='1m', group_by='ticker',
+                              auto_adjust=True, progress=False, threads=True)
+        except Exception as e:
+            logger.error(f"Error downloading latest prices: {e}")
+            return {}
+        quotes = {}
+        for ticker in tickers:
+            try:
+                series = raw[ticker]['Close'] if isinstance(raw.columns, pd.MultiIndex) else raw['Close']
+                series = series.dropna()
+                if not series.empty:
+                    quotes[ticker] = (float(series.iloc[-1]), series.index[-1].date())
+            except KeyError:
+                continue
+        return quotes
+
+    def fetch_many(self, tickers, start_date, end_date):
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for result in pool.map(lambda c: self._fetch_chunk_with_retry(c, start_date, end_date), chunks):
+                frames.update(result)
+        return frames
+
+
+class LocalFileSource(DataSource):
+    """
+    Reads `<ticker>.parquet` or `<ticker>.csv` from a directory.
+    Stand-in for yfinance in tests and benchmarks.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _read(self, ticker):
+        base = os.path.join(self.directory, ticker.replace('^', '_'))
+        if os.path.exists(base + '.parquet'):
+            return pd.read_parquet(base + '.parquet')
+        if os.path.exists(base + '.csv'):
+            return pd.read_csv(base + '.csv', index_col=0, parse_dates=True)
+        return None
+
+    def fetch(self, ticker, start_date, end_date):
+        try:
+            data = self._read(ticker)
+            if data is None:
+                logger.error(f"No local data for {ticker}")
+                return None
+            start = align_time(start_date, data.index)
+            end = align_time(end_date, data.index)
+            return data[(data.index >= start) & (data.index < end)][COLUMNS]
+        except Exception as e:
+            logger.error(f"Error reading local data for {ticker}: {e}")
+            return None
+
+    def fetch_intraday(self, ticker, period, interval):
+        """Bars of the file within `period` of its last bar, at the interval they are stored in."""
+        try:
+            data = self._read(ticker)
+            if data is None:
+                logger.error(f"No local data for {ticker}")
+                return None
+            data = data.sort_index()
+            return data[data.index > data.index[-1] - pd.Timedelta(period)]
+        except Exception as e:
+            logger.error(f"Error reading local data for {ticker}: {e}")
+            return None
+
+    def latest_quotes(self, tickers):
+        """The last close of each file as its latest price."""
+        quotes = {}
+        for ticker in tickers:
+            try:
+                data = self._read(ticker)
+            except Exception as e:
+                logger.error(f"Error reading local data for {ticker}: {e}")
+                continue
+            if data is not None and not data.empty:
+                quotes[ticker] = (float(data['Close'].iloc[-1]), data.index[-1].date())
+        return quotes
+
+
+def split_download(raw, tickers):
+    """
+    Split a yf.download frame into per-ticker frames on the shared calendar.
+    Rows where a ticker has no close are dropped.
+    """
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    for ticker in tickers:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if ticker not in raw.columns.get_level_values(0):
+                continue
+            data = raw[ticker]
+        else:
+            data = raw
+        data = data[COLUMNS].dropna(subset=['Close'])
+        if not data.empty:
+            frames[ticker] = data
+    return frames
+
+
+def align_time(value, index):
+    """Make a naive datetime comparable with a (possibly tz-aware) index."""
+    ts = pd.Timestamp(value)
+    if index.tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(index.tz)
+    if index.tz is None and ts.tzinfo is not None:
+        return ts.tz_convert(None)
+    return ts
@@ -0,0 +1,96 @@
+# llm_cache.py
+"""Persistent content-addressed cache for Claude responses."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store keyed by a hash of the full request
+    (model, system prompt, messages including image data, tools, ...).
+
+    Entries expire per call type (Settings.LLM_CACHE_TTLS) and the least
+    recently used entries are evicted once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, path=None, max_bytes=None, ttls=None):
+        self.path = path or Settings.LLM_CACHE_PATH
+        self.max_bytes = max_bytes or Settings.LLM_CACHE_MAX_BYTES
+        self.ttls = ttls if ttls is not None else Settings.LLM_CACHE_TTLS
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, call_type TEXT, value TEXT,"
+            " size INTEGER, created_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+        self._db.commit()
+
+    @staticmethod
+    def key(request):
+        """SHA-256 of the request kwargs in canonical JSON form."""
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _ttl(self, call_type):
+        return self.ttls.get(call_type, self.ttls.get('default'))
+
+    def get(self, key, call_type=None):
+        """Return the cached value, or None if missing or expired."""
+        row = self._db.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        ttl = self._ttl(call_type)
+        now = time.time()
+        if ttl is not None and now - created_at > ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return value
+
+    def put(self, key, value, call_type=None):
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, call_type, value, len(value.encode('utf-8')), now, now)
+        )
+        self._evict()
+        self._db.commit()
+
+    def total_bytes(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        logger.info(f"Evicted {len(victims)} cached responses ({freed} bytes)")
+
+    def clear(self):
+        self._db.execute("DELETE FROM responses")
+        self._db.commit()
@@ -0,0 +1,302 @@
+# llm_client.py
+"""Shared async Anthropic client with concurrency limits, retries and timeouts."""
+import asyncio
+import logging
+import random
+import time
+from types import SimpleNamespace
+
+from anthropic import AsyncAnthropic, APIStatusError
+from anthropic.types import Message
+from config import Settings
+from llm_cache import ResponseCache
+from metrics import get_metrics, NULL_STAGE
+
+logger = logging.getLogger(__name__)
+
+# 429 = rate limited, 529 = overloaded
+RETRY_STATUS_CODES = {429, 529}
+
+USAGE_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+def cacheable_system(*texts):
+    """
+    Build system prompt blocks from stable texts (persona, format rules),
+    marking the end of the prefix as cacheable so repeated calls reuse it.
+    Prefixes shorter than the model minimum (1024 tokens on Sonnet) are not cached.
+    """
+    blocks = [{"type": "text", "text": text} for text in texts if text]
+    if blocks and Settings.LLM_PROMPT_CACHING:
+        blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    return blocks
+
+
+class LLMClient:
+    """
+    Wraps AsyncAnthropic so that at most `max_concurrency` requests are in
+    flight, 429/529 responses are retried with jittered exponential backoff
+    (honouring retry-after when present), and every call has a timeout.
+    Responses are served from / stored in a ResponseCache when one is set.
+    """
+
+    def __init__(self, client=None, max_concurrency=None, max_retries=None,
+                 backoff=None, max_backoff=None, timeout=None, cache=None):
+        # Retries are handled here, so the SDK's own retry loop is disabled
+        self.client = client or AsyncAnthropic(api_key=Settings.ANTHROPIC_API_KEY, max_retries=0)
+        # cache=False disables response caching; None uses the configured default
+        if cache is None and Settings.LLM_CACHE_ENABLED:
+            cache = ResponseCache()
+        self.cache = cache or None
+        self.max_concurrency = max_concurrency or Settings.LLM_MAX_CONCURRENCY
+        self.max_retries = Settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Settings.LLM_BACKOFF_SECONDS if backoff is None else backoff
+        self.max_backoff = max_backoff or Settings.LLM_MAX_BACKOFF_SECONDS
+        self.timeout = timeout or Settings.LLM_TIMEOUT_SECONDS
+        self._semaphore = None
+        self.usage = {}
+
+    @property
+    def semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _retry_delay(self, error, attempt):
+        retry_after = error.response.headers.get('retry-after') if error.response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.max_backoff)
+        except ValueError:
+            pass
+        # Full jitter: uniform over [0, backoff * 2^attempt]
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def create_message(self, timeout=None, call_type=None, use_cache=True, **kwargs):
+        """
+        Call messages.create with response caching, concurrency control and retries.
+
+        Args:
+            timeout: Per-call timeout in seconds (defaults to Settings.LLM_TIMEOUT_SECONDS)
+            call_type: Name used to pick the cache TTL (see Settings.LLM_CACHE_TTLS)
+            use_cache: False to bypass the response cache for this call
+            **kwargs: Passed through to messages.create
+
+        Returns:
+            The Anthropic Message response
+        """
+        use_cache = use_cache and self.cache is not None and not Settings.LLM_CACHE_BYPASS
+        with get_metrics().stage('llm', call_type=call_type or 'request') as stage:
+            if use_cache:
+                key = self.cache.key(kwargs)
+                cached = self.cache.get(key, call_type)
+                if cached is not None:
+                    logger.info(f"Using cached Claude response for {call_type or 'request'}")
+                    stage.add(cache_hits=1)
+                    return Message.model_validate_json(cached)
+
+            message = await self._create_with_retry(timeout or self.timeout, stage, **kwargs)
+            self._record_usage(call_type, message, stage)
+            if use_cache:
+                self.cache.put(key, message.model_dump_json(), call_type)
+            return message
+
+    async def create_message_batch(self, requests, call_type=None, use_cache=True,
+                                   deadline=None, poll_interval=None):
+        """
+        Run many messages.create requests through the Message Batches API.
+        Cached responses are served directly; only misses are submitted.
+
+        Args:
+            requests: Dict of name -> messages.create kwargs
+            call_type: Name used for cache TTLs and usage tracking
+            use_cache: False to bypass the response cache
+            deadline: Seconds to wait for the batch (defaults to Settings.LLM_BATCH_DEADLINE_SECONDS)
+            poll_interval: Seconds between status checks
+
+        Returns:
+            Dict of name -> Message, or None for requests that failed or missed the deadline
+        """
+        deadline = deadline or Settings.LLM_BATCH_DEADLINE_SECONDS
+        poll_interval = poll_interval or Settings.LLM_BATCH_POLL_SECONDS
+        use_cache = use_cache and self.cache is not None and not Settings.LLM_CACHE_BYPASS
+
+        results = {}
+        pending = {}
+        for name, params in requests.items():
+            cached = self.cache.get(self.cache.key(params), call_type) if use_cache else None
+            if cached is not None:
+                results[name] = Message.model_validate_json(cached)
+            else:
+                pending[name] = params
+        if not pending:
+            return results
+
+        with get_metrics().stage('llm_batch', call_type=call_type or 'request',
+                                 requests=len(pending)) as stage:
+            await self._run_batch(pending, results, call_type, use_cache, deadline, poll_interval, stage)
+
+        for name in pending:
+            results.setdefault(name, None)
+        return results
+
+    async def _run_batch(self, pending, results, call_type, use_cache, deadline, poll_interval, stage):
+        """Submit the uncached requests as one batch and collect its results."""
+        # custom_id must match [a-zA-Z0-9_-]{1,64}, so tickers are mapped to positions
+        names = list(pending)
+        batch = await self.client.messages.batches.create(requests=[
+            {"custom_id": f"req-{i}", "params": pending[name]} for i, name in enumerate(names)
+        ])
+        logger.info(f"Submitted batch {batch.id} with {len(names)} {call_type or 'requests'}")
+
+        started = time.monotonic()
+        while batch.processing_status != 'ended':
+            if time.monotonic() - started > deadline:
+                logger.error(f"Batch {batch.id} missed its {deadline:.0f}s deadline, cancelling")
+                await self.client.messages.batches.cancel(batch.id)
+                break
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+        else:
+            async for entry in await self.client.messages.batches.results(batch.id):
+                name = names[int(entry.custom_id.split('-')[1])]
+                if entry.result.type != 'succeeded':
+                    logger.error(f"Batch request for {name} {entry.result.type}")
+                    continue
+                message = entry.result.message
+                results[name] = message
+                self._record_usage(call_type, message, stage)
+                if use_cache:
+                    self.cache.put(self.cache.key(pending[name]), message.model_dump_json(), call_type)
+
+    def _record_usage(self, call_type, message, stage=NULL_STAGE):
+        """Accumulate token usage, including prompt-cache reads and writes, per call type."""
+        usage = getattr(message, 'usage', None)
+        if usage is None:
+            return
+        totals = self.usage.setdefault(call_type or 'request', dict.fromkeys(('calls',) + USAGE_FIELDS, 0))
+        totals['calls'] += 1
+        for field in USAGE_FIELDS:
+            tokens = getattr(usage, field, None) or 0
+            totals[field] += tokens
+            stage.add(**{field: tokens})
+        logger.info(
+            f"{call_type or 'request'}: {usage.input_tokens} input tokens "
+            f"(+{getattr(usage, 'cache_read_input_tokens', None) or 0} from prompt cache, "
+            f"{getattr(usage, 'cache_creation_input_tokens', None) or 0} written to it), "
+            f"{usage.output_tokens} output tokens"
+        )
+
+    def usage_summary(self):
+        """Token totals across call types, with the share of prompt tokens served from cache."""
+        totals = dict.fromkeys(('calls',) + USAGE_FIELDS, 0)
+        for call_usage in self.usage.values():
+            for field in totals:
+                totals[field] += call_usage[field]
+        prompt_tokens = (totals['input_tokens'] + totals['cache_read_input_tokens'] +
+                         totals['cache_creation_input_tokens'])
+        totals['cache_hit_ratio'] = totals['cache_read_input_tokens'] / prompt_tokens if prompt_tokens else 0.0
+        return totals
+
+    async def _create_with_retry(self, timeout, stage=NULL_STAGE, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    return await self.client.messages.create(timeout=timeout, **kwargs)
+            except APIStatusError as e:
+                if e.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                stage.add(retries=1)
+                logger.warning(f"Claude returned {e.status_code}, retry {attempt}/{self.max_retries} "
+                               f"in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+class StubAsyncAnthropic:
+    """
+    Local stand-in for AsyncAnthropic. Returns text from `responder(request)`
+    without network access, so pipeline runs (and the response cache) can be
+    exercised offline and reproducibly.
+    """
+
+    def __init__(self, responder=None, polls_until_done=1):
+        self.messages = self
+        self.batches = StubBatches(self, polls_until_done)
+        self.requests = []
+        self.responder = responder or (
+            lambda request: f"Stub response {ResponseCache.key(request)[:12]}"
+        )
+
+    async def create(self, timeout=None, **kwargs):
+        self.requests.append(kwargs)
+        return self.make_message(kwargs)
+
+    def make_message(self, kwargs):
+        return Message.model_validate({
+            'id': f"msg_stub_{len(self.requests)}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': kwargs.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': self.responder(kwargs)}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': 0, 'output_tokens': 0},
+        })
+
+
+class StubBatches:
+    """Local stand-in for messages.batches; a batch ends after `polls_until_done` retrieves."""
+
+    def __init__(self, stub, polls_until_done=1):
+        self.stub = stub
+        self.polls_until_done = polls_until_done
+        self.submitted = {}
+        self._polls = {}
+
+    def _batch(self, batch_id, status):
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    async def create(self, requests):
+        batch_id = f"msgbatch_stub_{len(self.submitted) + 1}"
+        self.submitted[batch_id] = list(requests)
+        self._polls[batch_id] = 0
+        return self._batch(batch_id, 'in_progress')
+
+    async def retrieve(self, batch_id):
+        self._polls[batch_id] += 1
+        done = self._polls[batch_id] >= self.polls_until_done
+        return self._batch(batch_id, 'ended' if done else 'in_progress')
+
+    async def cancel(self, batch_id):
+        return self._batch(batch_id, 'canceling')
+
+    async def results(self, batch_id):
+        async def entries():
+            for request in self.submitted[batch_id]:
+                self.stub.requests.append(request['params'])
+                yield SimpleNamespace(
+                    custom_id=request['custom_id'],
+                    result=SimpleNamespace(type='succeeded',
+                                           message=self.stub.make_message(request['params']))
+                )
+        return entries()
+
+
+_shared_client = None
+
+
+def get_llm_client():
+    """Process-wide LLMClient shared by the analyzers."""
+    global _shared_client
+    if _shared_client is None:
+        if Settings.LLM_STUB_MODE:
+            # Keep stub responses out of the real response cache
+            cache = ResponseCache(path=Settings.LLM_CACHE_PATH + '.stub') if Settings.LLM_CACHE_ENABLED else False
+            _shared_client = LLMClient(client=StubAsyncAnthropic(), cache=cache)
+        else:
+            _shared_client = LLMClient()
+    return _shared_client
@@ -1,22 +1,24 @@
 # macro_analyzer.py
-from anthropic import Anthropic
 from config import Settings
+from llm_client import get_llm_client, cacheable_system
 import logging
 from date_filter import filter_search_results, log_filtering_report, extract_filtered_text
 
 logger = logging.getLogger(__name__)
 
 class MacroAnalyzer:
-    def __init__(self):
-        self.anthropic = Anthropic(api_key=Settings.ANTHROPIC_API_KEY)
+    def __init__(self, llm=None):
+        self.llm = llm or get_llm_client()
 
     async def get_macro_analysis(self, system_prompt, user_prompt):
         """Get macro economic analysis using Claude web search with date filtering."""
         try:
-            response = self.anthropic.messages.create(
+            response = await self.llm.create_message(
+                timeout=Settings.LLM_WEB_SEARCH_TIMEOUT_SECONDS,
+                call_type="macro_analysis",
                 model="claude-sonnet-4-5",
                 max_tokens=1024,
-                system=system_prompt,
+                system=cacheable_system(system_prompt),
                 messages=[{"role": "user", "content": user_prompt}],
                 tools=[{"type": "web_search_20250305", "name": "web_search", "max_uses": 5}]
             )
@@ -40,14 +42,15 @@ class MacroAnalyzer:
             logger.error(f"Error in macro analysis: {e}")
             return None
 
-    def fix_hebrew_text(self, text: str, character_description: str) -> str:
+    async def fix_hebrew_text(self, text: str, character_description: str) -> str:
         """Fix Hebrew text formatting using Claude."""
         try:
-            message = self.anthropic.messages.create(
+            message = await self.llm.create_message(
+                call_type="hebrew_fix",
                 model="claude-haiku-4-5",
                 max_tokens=1024,
                 temperature=0,
-                system=character_description,
+                system=cacheable_system(character_description),
                 messages=[{"role": "user", "content": self._create_hebrew_prompt(text)}]
             )
             
@@ -7,10 +7,13 @@ import subprocess
 import random
 from config import Settings
 from market_analysis import MarketAnalysis
+from universe_scanner import load_universes, scan_universe
 from chart_analyzer import ChartAnalyzer
 from macro_analyzer import MacroAnalyzer
 from telegram_bot import TelegramBot
 from instagram_service import InstagramService
+from llm_client import get_llm_client
+from metrics import get_metrics
 from characters_and_prompts import *
 
 # Set up logging
@@ -39,10 +42,11 @@ async def run_macro_analysis(macro_analyzer, telegram):
         dani_perplexity_prompt
     )
     if macro_response:
-        formatted_report = macro_analyzer.fix_hebrew_text(
-            macro_response,
-            dani_financial_description
-        )
+        with get_metrics().stage('hebrew_fix', bytes=len(macro_response.encode())):
+            formatted_report = await macro_analyzer.fix_hebrew_text(
+                macro_response,
+                dani_financial_description
+            )
         if formatted_report:
             await telegram.send_text(formatted_report)
             logger.info("Monthly macro analysis completed and sent")
@@ -50,15 +54,22 @@ async def run_macro_analysis(macro_analyzer, telegram):
 async def run_technical_analysis(market, chart_analyzer, telegram):
     """Run technical analysis for all indices."""
     logger.info("Running technical analysis...")
+    metrics = get_metrics()
+    charts = []
+    rendered = []
     for symbol, name in Settings.INDICES.items():
         # Fetch and analyze data
-        data = market.fetch_data(symbol)
+        with metrics.stage('fetch', ticker=symbol) as stage:
+            data = market.fetch_data(symbol)
+            if data is not None:
+                stage.add(bars=len(data), bytes=int(data.memory_usage().sum()))
         if data is None:
             logger.error(f"Failed to fetch data for {name}")
             continue
 
         # Identify channels
-        long_term_channel, intermediate_channels = market.identify_channels(data)
+        with metrics.stage('detect', ticker=symbol):
+            long_term_channel, intermediate_channels = market.identify_channels(data, ticker=symbol)
         
         # Report channel detection status
         if long_term_channel is None and not intermediate_channels:
@@ -68,25 +79,100 @@ async def run_technical_analysis(market, chart_analyzer, telegram):
                 print("Long-term channel detected")
             print(f"Number of intermediate channels detected: {len(intermediate_channels)}")
 
-        # Create chart
-        if not market.plot_with_channels(data, name, long_term_channel, intermediate_channels):
+        # Create chart in memory
+        with metrics.stage('render', ticker=symbol) as stage:
+            image = market.plot_with_channels(data, name, long_term_channel, intermediate_channels,
+                                              in_memory=True)
+            if image is not None:
+                stage.add(bytes=len(image))
+        if image is None:
             logger.error(f"Failed to create chart for {name}")
             continue
 
-        # Send chart and analysis
-        image_path = f"{name}_analysis.png"
-        await telegram.send_image(image_path)
-        
         last_price = data['Close'].iloc[-1]
-        
-        analysis_text = chart_analyzer.analyze_chart(
-            image_path,
-            dani_financial_description,
-            dani_financial_prompt + f"\nAdded Knowledge:\nLast Price: {last_price:.2f}"
-        )
+        if Settings.LLM_BATCH_MODE:
+            rendered.append((name, image, last_price))
+        else:
+            # Start the analysis now so it overlaps with the remaining charts
+            charts.append((name, image, start_chart_analysis(chart_analyzer, image, last_price)))
+
+    if rendered:
+        charts = start_batch_chart_analysis(chart_analyzer, rendered)
+    await publish_chart_analyses(telegram, charts)
+
+def chart_prompt(last_price):
+    """Per-chart part of the analysis prompt."""
+    return f"Added Knowledge:\nLast Price: {last_price:.2f}"
+
+def start_chart_analysis(chart_analyzer, image, last_price):
+    """Schedule the vision analysis of a chart as a background task."""
+    return asyncio.create_task(chart_analyzer.analyze_chart(
+        MarketAnalysis.vision_image(image),
+        dani_financial_description,
+        chart_prompt(last_price),
+        format_rules=dani_financial_prompt
+    ))
+
+def start_batch_chart_analysis(chart_analyzer, rendered):
+    """Submit all charts as one message batch; returns a task per chart."""
+    batch_task = asyncio.create_task(chart_analyzer.analyze_charts_batch(
+        {name: (MarketAnalysis.vision_image(image), chart_prompt(last_price))
+         for name, image, last_price in rendered},
+        dani_financial_description,
+        format_rules=dani_financial_prompt
+    ))
+
+    async def result_for(name):
+        return (await batch_task).get(name)
+
+    return [(name, image, asyncio.create_task(result_for(name))) for name, image, _ in rendered]
+
+async def publish_chart_analyses(telegram, charts, as_album=False):
+    """
+    Queue each chart followed by its analysis, in order, while analyses run concurrently.
+    With as_album the charts go out first as media groups, then the analyses.
+    """
+    if as_album:
+        telegram.queue_album([image for _, image, _ in charts], captions=[name for name, _, _ in charts])
+    for name, image, analysis_task in charts:
+        if not as_album:
+            telegram.queue_image(image)
+        analysis_text = await analysis_task
         if analysis_text:
-            await telegram.send_text(analysis_text)
-            logger.info(f"Analysis for {name} completed and sent")
+            telegram.queue_text(analysis_text)
+            logger.info(f"Analysis for {name} completed and queued")
+    await telegram.flush()
+
+async def run_universe_scan(chart_analyzer, telegram):
+    """Scan the index constituents and analyze only the strongest channels."""
+    logger.info("Running universe scan...")
+    tickers = await asyncio.to_thread(load_universes)
+    if not tickers:
+        logger.error("No tickers loaded for universe scan")
+        return
+    
+    with get_metrics().stage('scan', tickers=len(tickers)):
+        summary = await asyncio.to_thread(
+            scan_universe, tickers, Settings.SCAN_WORKERS, Settings.SCAN_TOP_N
+        )
+    for rank, result in enumerate(summary, 1):
+        logger.info(
+            f"{rank}. {result['ticker']}: strength {result['strength']:.3f}, "
+            f"{result['channels']} intermediate channels"
+            f"{', long-term channel' if result['long_term'] else ''}"
+        )
+    
+    if Settings.LLM_BATCH_MODE:
+        charts = start_batch_chart_analysis(
+            chart_analyzer, [(r['ticker'], r['image'], r['last_price']) for r in summary]
+        )
+    else:
+        charts = [
+            (result['ticker'], result['image'],
+             start_chart_analysis(chart_analyzer, result['image'], result['last_price']))
+            for result in summary
+        ]
+    await publish_chart_analyses(telegram, charts, as_album=Settings.TELEGRAM_SCAN_ALBUM)
 
 async def run_motivation_post(instagram):
     """Generate and post motivational content."""
@@ -115,6 +201,8 @@ async def main():
     # Weekly Technical Analysis (Sundays)
     if current_time.weekday() == Settings.TECHNICAL_ANALYSIS_DAY:
         await run_technical_analysis(market, chart_analyzer, telegram)
+        if Settings.SCAN_UNIVERSE:
+            await run_universe_scan(chart_analyzer, telegram)
         
     # # Special occasion
     # await run_technical_analysis(market, chart_analyzer, telegram)
@@ -124,6 +212,18 @@ async def main():
     # if current_time_str in Settings.MOTIVATION_POST_TIMES:
     #     await run_motivation_post(instagram)
 
+    usage = get_llm_client().usage_summary()
+    if usage['calls']:
+        logger.info(
+            f"Claude usage: {usage['calls']} calls, {usage['input_tokens']} input tokens, "
+            f"{usage['cache_read_input_tokens']} prompt-cache read tokens "
+            f"({usage['cache_hit_ratio']:.0%} of prompt), {usage['output_tokens']} output tokens"
+        )
+    
+    metrics = get_metrics()
+    metrics.log_summary()
+    metrics.write()
+
 if __name__ == "__main__":
     # Run updates every 1st of month
     update_requirements()
@@ -1,24 +1,69 @@
 # market_analysis.py
-import yfinance as yf
 from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
 from scipy.signal import find_peaks
+import functools
+import io
+import matplotlib
+matplotlib.use('Agg')  # Headless rendering, no GUI backend
 import mplfinance as mpf
 import logging
+from config import Settings
+from chart_image import ChartImage
+from data_sources import YFinanceSource
+from ohlcv_cache import OHLCVCache, REVISION_TOLERANCE
+from overlap_index import OverlapIndex
+from channel_store import ChannelStore
+from trend_engine import TrendEngine, TREND_THRESHOLDS, window_starts
+from channel_scoring import as_buffers, batch_channels, batch_quality
+from peak_engine import PeakEngine
 
 logger = logging.getLogger(__name__)
 
+WINDOW_STAT_FIELDS = ('slope', 'intercept', 'r_squared', 'movement_significance')
+
 class MarketAnalysis:
+    def __init__(self, cache=None, source=None, channel_store=None, channel_engine=None):
+        # cache=False / channel_store=False disable them; None uses the configured default
+        if cache is None and Settings.DATA_CACHE_ENABLED:
+            cache = OHLCVCache()
+        self.cache = cache or None
+        self.source = source if source is not None else YFinanceSource()
+        if channel_store is None and Settings.INCREMENTAL_CHANNELS:
+            channel_store = ChannelStore()
+        self.channel_store = channel_store or None
+        # 'regression' (trend line +/- residual std) or 'peaks' (lines fitted on pivots)
+        self.channel_engine = channel_engine or Settings.CHANNEL_ENGINE
+
+    @staticmethod
+    def _history_range():
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365)
+        return start_date, end_date
+
     def fetch_data(self, ticker, period="1y"):
-        """Fetch data for the given ticker."""
+        """Fetch data for the given ticker, served from the local cache when possible."""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            return yf.Ticker(ticker).history(start=start_date, end=end_date)
+            start_date, end_date = self._history_range()
+            if self.cache is None:
+                return self.source.fetch(ticker, start_date, end_date)
+            return self.cache.get(ticker, start_date, end_date, self.source.fetch)
         except Exception as e:
             logger.error(f"Error fetching data for {ticker}: {e}")
             return None
 
+    def fetch_many(self, tickers):
+        """Fetch data for many tickers with bulk downloads. Returns {ticker: DataFrame}."""
+        try:
+            start_date, end_date = self._history_range()
+            if self.cache is None:
+                return self.source.fetch_many(list(tickers), start_date, end_date)
+            return self.cache.get_many(list(tickers), start_date, end_date, self.source.fetch_many)
+        except Exception as e:
+            logger.error(f"Error fetching data for {len(tickers)} tickers: {e}")
+            return {}
+
     def find_significant_points(self, data, window=20, distance=10):
         """Find significant peaks and troughs in the data."""
         try:
@@ -47,9 +92,10 @@ class MarketAnalysis:
             return None
 
     @staticmethod
-    def validate_trend(data, start_idx, end_idx, is_recent=False):
+    def validate_trend(data, start_idx, end_idx, is_recent=False, thresholds=None):
         """
-        Validate trend with strict criteria
+        Validate trend with strict criteria.
+        thresholds replaces TREND_THRESHOLDS (used by the parameter sweep).
         """
         segment = data.iloc[start_idx:end_idx]
         x = np.arange(len(segment))
@@ -75,14 +121,7 @@ class MarketAnalysis:
         movement_significance = price_range / avg_price
         
         # Adjust thresholds based on period
-        if is_recent:
-            r_squared_threshold = 0.3
-            slope_threshold = 0.008
-            movement_threshold = 0.03
-        else:
-            r_squared_threshold = 0.4
-            slope_threshold = 0.015
-            movement_threshold = 0.05
+        r_squared_threshold, slope_threshold, movement_threshold = (thresholds or TREND_THRESHOLDS)[bool(is_recent)]
         
         is_trend = (
             r_squared > r_squared_threshold and
@@ -99,11 +138,13 @@ class MarketAnalysis:
         }
 
     @staticmethod
-    def calculate_channel(data, start_idx, end_idx, is_long_term=False):
+    def calculate_channel(data, start_idx, end_idx, is_long_term=False, validation=None):
         """
-        Calculate channel with adjusted parameters for recent periods
+        Calculate channel with adjusted parameters for recent periods.
+        A precomputed validation (e.g. from TrendEngine) skips the regression.
         """
-        validation = MarketAnalysis.validate_trend(data, start_idx, end_idx, is_recent=not is_long_term)
+        if validation is None:
+            validation = MarketAnalysis.validate_trend(data, start_idx, end_idx, is_recent=not is_long_term)
         
         if not validation['isTrend']:
             return None
@@ -238,49 +279,289 @@ class MarketAnalysis:
         
         return final_score
 
-    def identify_channels(self, data):
+    def identify_channels(self, data, window_size=None, step=None, offset=None, ticker=None,
+                          window_sizes=None):
         """
-        Identify channels with strict overlap control
+        Identify channels with strict overlap control.
+        With a ticker and a channel store, last run's window results are reused.
+
+        Scales are chosen as follows: an explicit `window_sizes` runs that
+        pyramid; otherwise any explicit window_size/step/offset runs the
+        single-scale scan with them; with none of them given the pyramid of
+        Settings.CHANNEL_WINDOW_SIZES is used, or the 40-bar single scan if
+        it is empty.
+
+        On the incremental path the window grid keeps the phase of the stored
+        windows unless `offset` is given, so new bars do not shift it. An
+        explicit `offset` is always honoured; when it puts the grid on another
+        phase than the stored windows, none of them is reused and the whole
+        scan is recomputed.
+
+        Args:
+            data: OHLC DataFrame
+            window_size: Window length of the single-scale scan (default 40)
+            step: Distance between window starts of the single-scale scan (default 20)
+            offset: First window start of the single-scale scan (default 0)
+            ticker: Symbol used as the channel store key
+            window_sizes: Window pyramid for multi-scale detection, each scale
+                stepping by half its window (empty runs the single-scale scan)
+
+        Returns:
+            (long_term_channel, selected intermediate channels)
         """
+        single_scale = (window_size, step, offset) != (None, None, None)
+        if window_sizes is None:
+            window_sizes = [] if single_scale else Settings.CHANNEL_WINDOW_SIZES
+        if window_sizes:
+            scales = [(size, max(1, size // 2), None) for size in window_sizes]
+        else:
+            scales = [(window_size or 40, step or 20, offset)]
+        
+        # Pivots are found once per series and shared by every window
+        peaks = PeakEngine.from_data(data) if self.channel_engine == 'peaks' else None
+        
         # Identify long-term channel first
-        long_term_validation = self.validate_trend(data, 0, len(data))
-        long_term_channel = None
-        if long_term_validation['isTrend']:
-            long_term_channel = self.calculate_channel(data, 0, len(data), is_long_term=True)
+        long_term_channel = self._long_term_channel(data, peaks)
         
-        # Parameters for intermediate channels
-        window_size = 40  # Base window size
+        # Every scale reads the same prefix sums; candidates are ranked together
+        engine = TrendEngine.from_data(data)
+        potential_channels = []
+        for size, scale_step, scale_offset in scales:
+            if ticker is not None and self.channel_store is not None:
+                potential_channels += self._incremental_candidates(data, engine, ticker, size, scale_step,
+                                                                   peaks, scale_offset)
+            else:
+                potential_channels += self._window_candidates(data, engine, size, scale_step, scale_offset or 0,
+                                                              peaks)
+        
+        return long_term_channel, self.select_channels(potential_channels)
+
+    def _window_candidates(self, data, engine, window_size, step, offset=0, peaks=None):
+        """Scored candidate channels of one window size, validated in one batched pass."""
         data_length = len(data)
+        stats = engine.scan(window_size, step, offset)
+        is_recent = stats['start'] > data_length * 2/3
+        trend_mask = engine.trend_mask(stats, is_recent)
+        
+        # Collect all potential channels, built and scored in one batch
+        indices, slope, upper, lower, scores = self._window_channels(
+            data, stats, np.flatnonzero(trend_mask), window_size, peaks)
         potential_channels = []
+        for k, idx in enumerate(indices):
+            start = int(stats['start'][idx])
+            channel = (
+                (float(slope[k]), float(upper[k])),
+                (float(slope[k]), float(lower[k])),
+                (data.index[start], data.index[start + window_size - 1])
+            )
+            potential_channels.append((channel, float(scores[k]), start))
+        return potential_channels
+
+    def _long_term_channel(self, data, peaks=None):
+        long_term_validation = self.validate_trend(data, 0, len(data))
+        if not long_term_validation['isTrend']:
+            return None
+        if peaks is None:
+            return self.calculate_channel(data, 0, len(data), is_long_term=True)
+        fit = peaks.fit([0], len(data))
+        if not fit['valid'][0]:
+            return None
+        slope = float(fit['slope'][0])
+        return (
+            (slope, float(fit['upper_intercept'][0])),
+            (slope, float(fit['lower_intercept'][0])),
+            (data.index[0], data.index[-1])
+        )
+
+    @staticmethod
+    def _window_channels(data, stats, indices, window_size, peaks=None):
+        """
+        Channels and quality scores for the trending windows of a TrendEngine batch,
+        equivalent to calculate_channel + calculate_channel_quality per window.
+        With a PeakEngine the lines are fitted on pivots instead (construct_channel),
+        and windows without enough pivots are dropped.
+
+        Returns:
+            (indices, slope, upper_intercept, lower_intercept, score) arrays
+        """
+        buffers = as_buffers(data)
+        starts = stats['start'][indices]
+        if peaks is None:
+            slope = stats['slope'][indices]
+            upper, lower = batch_channels(*buffers, starts, window_size, slope,
+                                          stats['intercept'][indices])
+        else:
+            fit = peaks.fit(starts, window_size)
+            valid = fit['valid']
+            indices, starts = indices[valid], starts[valid]
+            slope = fit['slope'][valid]
+            upper, lower = fit['upper_intercept'][valid], fit['lower_intercept'][valid]
+        quality = batch_quality(*buffers, starts, window_size, slope, upper, lower)
+        return indices, slope, upper, lower, quality['score']
+
+    @staticmethod
+    def select_channels(potential_channels, min_score=0.3, max_overlap=0.3):
+        """
+        Greedy selection: best-scoring channels first, skipping any that
+        overlap an already selected channel (same rule as has_significant_overlap).
+        Candidates are held as integer nanosecond intervals, and overlap
+        queries go through an OverlapIndex instead of scanning every selection.
+        """
+        if not potential_channels:
+            return []
         
-        # First, collect all potential channels
-        for i in range(0, data_length - window_size, 20):
-            window_validation = self.validate_trend(data, i, i + window_size, 
-                                            is_recent=(i > data_length * 2/3))
-            
-            if window_validation['isTrend']:
-                channel = self.calculate_channel(data, i, i + window_size, is_long_term=False)
-                if channel is not None:
-                    score = self.calculate_channel_quality(data, i, i + window_size, channel)
-                    potential_channels.append((channel, score, i))
+        scores = np.array([score for _, score, _ in potential_channels], dtype=np.float64)
+        bounds = pd.DatetimeIndex([t for channel, _, _ in potential_channels for t in channel[2]])
+        bounds = bounds.asi8.reshape(-1, 2).tolist()
         
-        # Sort channels by quality score
-        potential_channels.sort(key=lambda x: x[1], reverse=True)
+        # Sort channels by quality score (stable, like list.sort)
+        order = np.argsort(-scores, kind='stable')
         
         # Select non-overlapping channels
+        selected = OverlapIndex(max_overlap)
         selected_channels = []
-        for channel, score, start_idx in potential_channels:
-            if score > 0.3:  # Minimum quality threshold
-                if not any(self.has_significant_overlap(channel, existing) 
-                        for existing in selected_channels):
-                    selected_channels.append(channel)
+        for k in order:
+            if scores[k] > min_score:  # Minimum quality threshold
+                start, end = bounds[k]
+                if not selected.overlaps(start, end):
+                    selected.add(start, end)
+                    selected_channels.append(potential_channels[k][0])
+        
+        return selected_channels
+
+    def _incremental_candidates(self, data, engine, ticker, window_size=40, step=20, peaks=None,
+                                offset=None):
+        """
+        _window_candidates that reuses the per-window results stored by the last run.
+
+        The window grid keeps the phase of the stored window starts, so windows
+        that are still inside the horizon and do not touch new or revised bars
+        are taken from the store. Windows that fell off the horizon are dropped,
+        and the merged set goes through the greedy selection again. An explicit
+        `offset` sets the grid instead; on another phase than the stored windows
+        every window is recomputed.
+        """
+        data_length = len(data)
+        dates = [ts.isoformat() for ts in data.index]
+        position = {date: i for i, date in enumerate(dates)}
+        
+        engine_name = 'peaks' if peaks is not None else 'regression'
+        state = self.channel_store.load(ticker, window_size, step, engine_name)
+        closes = data['Close'].to_numpy(dtype=np.float64)
+        reference = state.get('reference') if state is not None else None
+        if reference is not None and reference[0] in position:
+            # A split or dividend adjustment rescales the whole history, so no stored window is valid
+            close = closes[position[reference[0]]]
+            if not np.isclose(close, reference[1], rtol=REVISION_TOLERANCE, atol=0):
+                logger.info(f"Prices of {ticker} were revised since its channels were stored, recomputing")
+                state = None
+        requested = offset
+        stored = {}
+        offset = offset or 0
+        dirty_from = 0
+        if state is not None:
+            stored = {record['start']: record for record in state['windows']}
+            kept = sorted(position[start] for start in stored if start in position)
+            if kept:
+                offset = kept[0] % step
+            if requested is not None and requested % step != offset:
+                # Stored starts are keyed by date, so none of them lies on the new grid
+                logger.info(f"Offset {requested} of {ticker} does not match the stored window grid, "
+                            f"recomputing")
+            # The last stored bar may have been partial, so it counts as new
+            dirty_from = int(data.index.searchsorted(pd.Timestamp(state['last_bar'])))
+        if requested is not None:
+            offset = requested
+        
+        starts = window_starts(data_length, window_size, step, offset)
+        records = [None] * len(starts)
+        missing = []
+        for k, start in enumerate(starts):
+            record = stored.get(dates[start])
+            end = start + window_size - 1
+            if record is not None and end < dirty_from and record['end'] == dates[end]:
+                records[k] = record
+            else:
+                missing.append(k)
+        
+        # Recompute only the windows touched by new data
+        if missing:
+            stats = engine.window_stats(starts[missing], starts[missing] + window_size)
+            # Recent thresholds are the loosest, so this covers every window that can qualify
+            loose, slope, upper, lower, scores = self._window_channels(
+                data, stats, np.flatnonzero(engine.trend_mask(stats, True)), window_size, peaks)
+            channels = {
+                int(idx): ([float(slope[j]), float(upper[j])],
+                           [float(slope[j]), float(lower[j])], float(scores[j]))
+                for j, idx in enumerate(loose)
+            }
+            for idx, k in enumerate(missing):
+                channel = channels.get(idx)
+                records[k] = {
+                    'start': dates[starts[k]],
+                    'end': dates[starts[k] + window_size - 1],
+                    **{field: float(stats[field][idx]) for field in WINDOW_STAT_FIELDS},
+                    'channel': [channel[0], channel[1]] if channel else None,
+                    'score': channel[2] if channel else None,
+                }
+        logger.info(f"{ticker} ({window_size}-bar windows): reused {len(starts) - len(missing)}, "
+                    f"recomputed {len(missing)}")
+        
+        # Re-apply the position-dependent thresholds to the merged set
+        stats = {field: np.array([r[field] for r in records], dtype=np.float64)
+                 for field in WINDOW_STAT_FIELDS}
+        stats['start'] = starts
+        stats['end'] = starts + window_size
+        trend_mask = TrendEngine.trend_mask(stats, starts > data_length * 2/3)
         
-        return long_term_channel, selected_channels
+        potential_channels = []
+        for k in np.flatnonzero(trend_mask):
+            record = records[k]
+            if record['channel'] is None:
+                continue
+            start = int(starts[k])
+            (slope, upper_intercept), (_, lower_intercept) = record['channel']
+            channel = (
+                (slope, upper_intercept),
+                (slope, lower_intercept),
+                (data.index[start], data.index[start + window_size - 1])
+            )
+            potential_channels.append((channel, record['score'], start))
+        
+        self.channel_store.save(ticker, {
+            'window_size': window_size,
+            'step': step,
+            'engine': engine_name,
+            'last_bar': dates[-1] if dates else None,
+            # Close of the last complete bar, checked against the prices of the next run
+            'reference': [dates[-2], float(closes[-2])] if data_length > 1 else None,
+            'windows': records,
+        })
+        
+        return potential_channels
+
+    @staticmethod
+    def chart_filename(ticker):
+        """File name used when saving the chart for a ticker."""
+        return f'{ticker.replace("^", "")}_analysis.png'
+
+    @staticmethod
+    def vision_image(image):
+        """
+        A rendered chart downscaled in memory to the 'vision' profile's size,
+        so the LLM gets a small image while Telegram keeps the full render.
+        """
+        profile = Settings.RENDER_PROFILES['vision']
+        width, height = profile['figsize']
+        return image.downscaled((int(width * profile['dpi']), int(height * profile['dpi'])))
 
     @staticmethod
-    def plot_with_channels(data, ticker, long_term_channel, intermediate_channels):
+    def plot_with_channels(data, ticker, long_term_channel, intermediate_channels,
+                           profile=None, in_memory=False):
         """
-        Create visualization with long-term and multiple intermediate channels
+        Create visualization with long-term and multiple intermediate channels.
+        `profile` names an entry in Settings.RENDER_PROFILES; with in_memory=True
+        a ChartImage is returned instead of writing the chart to disk.
         """
         apds = []
         
@@ -329,41 +610,52 @@ class MarketAnalysis:
                 mpf.make_addplot(int_lower, color='red', linestyle='-.', width=2.8)
             ])
         
-        # Setup plot style with enhanced settings
-        mc = mpf.make_marketcolors(up='forestgreen', down='crimson',
-                                edge='inherit', wick='inherit', volume='in')
-        
-        # Enhanced style settings
-        s = mpf.make_mpf_style(
-            marketcolors=mc,
-            gridstyle=':',
-            gridcolor='gray',
-            y_on_right=True,  # Move Y-axis to the right
-            rc={
-                'axes.titlesize': 16,
-                'axes.titleweight': 'bold'
-            }
-        )
-        
         # Create plot with enhanced settings
+        profile = Settings.RENDER_PROFILES[profile or Settings.CHART_RENDER_PROFILE]
+        buffer = io.BytesIO() if in_memory else None
         kwargs = {
             'type': 'candle',
-            'style': s,
+            'style': _chart_style(),
             'title': f'{ticker} - Last Year Performance',
-            'figsize': (20, 10),  # Larger graph size
+            'figsize': profile['figsize'],
             'volume': True,
-            'addplot': apds if apds else None,
             'tight_layout': True,
             'savefig': {
-                'fname': f'{ticker.replace("^", "")}_analysis.png',
+                'fname': buffer if in_memory else MarketAnalysis.chart_filename(ticker),
+                'format': profile['format'],
                 'bbox_inches': 'tight',
-                'dpi': 300
+                'dpi': profile['dpi']
             },
             'datetime_format': '%d-%m-%Y',
             'ylabel': ''  # Remove Y-axis label
         }
         
+        if apds:
+            kwargs['addplot'] = apds
+        
         # Create and save the plot
         mpf.plot(data, **kwargs)
         
-        return True
\ No newline at end of file
+        if in_memory:
+            return ChartImage.from_format(buffer.getvalue(), profile['format'],
+                                          MarketAnalysis.chart_filename(ticker))
+        return True
+
+
+@functools.lru_cache(maxsize=None)
+def _chart_style():
+    """Build the mplfinance chart style once per process."""
+    mc = mpf.make_marketcolors(up='forestgreen', down='crimson',
+                            edge='inherit', wick='inherit', volume='in')
+    
+    # Enhanced style settings
+    return mpf.make_mpf_style(
+        marketcolors=mc,
+        gridstyle=':',
+        gridcolor='gray',
+        y_on_right=True,  # Move Y-axis to the right
+        rc={
+            'axes.titlesize': 16,
+            'axes.titleweight': 'bold'
+        }
+    )
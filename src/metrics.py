@@ -0,0 +1,179 @@
+# metrics.py
+"""Per-stage timing and counters for a pipeline run, with a JSON metrics file."""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """One timed occurrence of a stage; counters are added with add()."""
+
+    __slots__ = ('metrics', 'name', 'fields', 'started')
+
+    def __init__(self, metrics, name, fields):
+        self.metrics = metrics
+        self.name = name
+        self.fields = fields
+
+    def add(self, **counters):
+        """Add to numeric counters (bytes, tokens, retries, ...) of this occurrence."""
+        for field, value in counters.items():
+            self.fields[field] = self.fields.get(field, 0) + value
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, time.perf_counter() - self.started,
+                            error=exc_type is not None, **self.fields)
+        return False
+
+
+class _NullStage:
+    """Stand-in returned while metrics are disabled; every call is a no-op."""
+
+    __slots__ = ()
+
+    def add(self, **counters):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class RunMetrics:
+    """
+    Collects stage events for one run: fetch, detect, render, encode, llm,
+    telegram, hebrew_fix, ... Each event has its wall time, an error flag,
+    string labels (ticker, call_type) and numeric counters that are summed
+    per stage in the summary.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = Settings.METRICS_ENABLED if enabled is None else enabled
+        self.started_at = datetime.now()
+        self.events = []
+
+    def stage(self, name, **fields):
+        """Context manager timing one occurrence of a stage."""
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, fields)
+
+    def record(self, name, seconds=0.0, error=False, **fields):
+        """Add an event measured elsewhere."""
+        if self.enabled:
+            self.events.append({'stage': name, 'seconds': seconds, 'error': error, **fields})
+
+    def summary(self):
+        """
+        Per-stage totals.
+
+        Returns:
+            Dict of stage -> {'count', 'errors', 'seconds', 'max_seconds', <summed counters>}
+        """
+        stages = {}
+        for event in self.events:
+            totals = stages.setdefault(event['stage'], {'count': 0, 'errors': 0, 'seconds': 0.0,
+                                                        'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['errors'] += int(event['error'])
+            totals['seconds'] += event['seconds']
+            totals['max_seconds'] = max(totals['max_seconds'], event['seconds'])
+            for field, value in event.items():
+                if field not in ('stage', 'seconds', 'error') and isinstance(value, (int, float)):
+                    totals[field] = totals.get(field, 0) + value
+        return stages
+
+    def log_summary(self):
+        """Log one line per stage, slowest first."""
+        if not self.events:
+            return
+        stages = sorted(self.summary().items(), key=lambda item: item[1]['seconds'], reverse=True)
+        logger.info(f"Run metrics ({(datetime.now() - self.started_at).total_seconds():.1f}s wall):")
+        for name, totals in stages:
+            counters = ', '.join(f"{field} {value}" for field, value in totals.items()
+                                 if field not in ('count', 'errors', 'seconds', 'max_seconds'))
+            logger.info(
+                f"  {name}: {totals['count']}x, {totals['seconds']:.2f}s total, "
+                f"{totals['max_seconds']:.2f}s max, {totals['errors']} errors"
+                f"{', ' + counters if counters else ''}"
+            )
+
+    def write(self, path=None):
+        """Write summary and events as JSON; returns the path (None when disabled or on error)."""
+        if not self.enabled:
+            return None
+        path = path or os.path.join(Settings.METRICS_DIR,
+                                    f"run-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({
+                    'started_at': self.started_at.isoformat(),
+                    'finished_at': datetime.now().isoformat(),
+                    'summary': self.summary(),
+                    'events': self.events,
+                }, f, indent=2)
+            logger.info(f"Metrics written to {path}")
+            return path
+        except Exception as e:
+            logger.error(f"Error writing metrics to {path}: {e}")
+            return None
+
+
+# Fallback for code running outside a scheduled job (CLI runs, tests)
+_run_metrics = None
+
+# RunMetrics of the job running in the current asyncio task; tasks and
+# asyncio.to_thread calls started by the job inherit it
+_current_run = ContextVar('run_metrics', default=None)
+
+
+def get_metrics():
+    """RunMetrics of the current job run, or the process-wide one outside a job."""
+    current = _current_run.get()
+    if current is not None:
+        return current
+    global _run_metrics
+    if _run_metrics is None:
+        _run_metrics = RunMetrics()
+    return _run_metrics
+
+
+@contextmanager
+def start_run(enabled=None):
+    """
+    Collect metrics into a fresh RunMetrics for the code inside the block
+    (one per scheduled job run). Concurrent runs in other tasks keep their own.
+    """
+    with use_run(RunMetrics(enabled)) as metrics:
+        yield metrics
+
+
+@contextmanager
+def use_run(metrics):
+    """
+    Record into an existing RunMetrics inside the block, e.g. in a long-lived
+    worker task serving requests queued by different runs.
+    """
+    token = _current_run.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_run.reset(token)
@@ -0,0 +1,254 @@
+# ohlcv_cache.py
+"""On-disk OHLCV cache with incremental tail refresh."""
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import Settings
+from data_sources import COLUMNS, align_time
+
+logger = logging.getLogger(__name__)
+
+RECORD_DTYPE = np.dtype([('Date', 'i8')] + [(column, 'f8') for column in COLUMNS])
+
+# Relative price difference on an overlapping bar that counts as revised history
+# (split or dividend adjustment) rather than rounding
+REVISION_TOLERANCE = 1e-4
+
+
+class OHLCVCache:
+    """
+    Per-ticker daily bars stored as memory-mappable NumPy record files.
+
+    Each ticker has `<ticker>.npy` (UTC timestamps plus OHLCV columns) and a
+    `<ticker>.json` sidecar with the index timezone and last fetch time. For a
+    ticker whose history starts after the requested start, the sidecar also
+    records that first bar, so its cache counts as complete.
+    """
+
+    def __init__(self, cache_dir=None, ttl_hours=None, offline=None):
+        self.cache_dir = cache_dir or Settings.DATA_CACHE_DIR
+        self.ttl_seconds = 3600 * (Settings.DATA_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours)
+        self.offline = Settings.OFFLINE_MODE if offline is None else offline
+
+    def _paths(self, ticker):
+        safe = ticker.replace('^', '_').replace('/', '_')
+        base = os.path.join(self.cache_dir, safe)
+        return base + '.npy', base + '.json'
+
+    def load(self, ticker):
+        """Load cached bars as a DataFrame, or None if not cached."""
+        data_path, meta_path = self._paths(ticker)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            records = np.load(data_path, mmap_mode='r')
+            index = pd.to_datetime(np.asarray(records['Date']), unit='ns', utc=True)
+            if meta.get('tz'):
+                index = index.tz_convert(meta['tz'])
+            else:
+                index = index.tz_localize(None)
+            frame = pd.DataFrame({column: np.asarray(records[column]) for column in COLUMNS},
+                                 index=index)
+            frame.index.name = 'Date'
+            return frame
+        except Exception as e:
+            logger.error(f"Error reading cache for {ticker}: {e}")
+            return None
+
+    def save(self, ticker, data, first_bar=None):
+        """
+        Write bars for a ticker, replacing any cached copy.
+        `first_bar` is the provider's first available bar, if known.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._paths(ticker)
+
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        utc_index = index.tz_convert('UTC') if tz else index
+        records = np.empty(len(data), dtype=RECORD_DTYPE)
+        records['Date'] = utc_index.tz_localize(None).as_unit('ns').asi8
+        for column in COLUMNS:
+            records[column] = data[column].to_numpy(dtype=np.float64)
+
+        # Write to unique temp files first so a concurrent reader never sees half a
+        # file and concurrent writers of the same ticker never share a temp file
+        tmp_paths = []
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                tmp_paths.append(f.name)
+                np.save(f, records)
+            with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                tmp_paths.append(f.name)
+                meta = {'tz': tz, 'fetched_at': time.time()}
+                if first_bar is not None:
+                    meta['first_bar'] = pd.Timestamp(first_bar).isoformat()
+                json.dump(meta, f)
+        except Exception:
+            for tmp_path in tmp_paths:
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_paths[0], data_path)
+        os.replace(tmp_paths[1], meta_path)
+
+    def _meta(self, ticker):
+        _, meta_path = self._paths(ticker)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fetched_at(self, ticker):
+        return self._meta(ticker).get('fetched_at', 0.0)
+
+    def first_bar(self, ticker):
+        """The provider's first available bar recorded for a young ticker, or None."""
+        first_bar = self._meta(ticker).get('first_bar')
+        return pd.Timestamp(first_bar) if first_bar else None
+
+    def is_fresh(self, ticker):
+        """True if the ticker was fetched within the TTL."""
+        return time.time() - self.fetched_at(ticker) < self.ttl_seconds
+
+    @staticmethod
+    def _slice(data, start_date, end_date):
+        start = align_time(start_date, data.index)
+        end = align_time(end_date, data.index)
+        return data[(data.index >= start) & (data.index < end)]
+
+    @staticmethod
+    def _starts_late(data, start_date):
+        """True if the bars begin more than a week after start_date."""
+        return data.index[0] > align_time(start_date, data.index) + pd.Timedelta(days=7)
+
+    def _listing_bar(self, data, start_date):
+        """First bar of a download from start_date if the provider has nothing earlier, else None."""
+        return data.index[0] if self._starts_late(data, start_date) else None
+
+    def _fetch_start(self, ticker, cached, start_date):
+        """Where a download has to start for this ticker, or None if the cache will do."""
+        # A ticker listed after start_date is complete once it holds the provider's first bar
+        covers_start = (cached is not None and not cached.empty and
+                        (not self._starts_late(cached, start_date) or
+                         cached.index[0] == self.first_bar(ticker)))
+        if not covers_start:
+            return start_date
+        if self.is_fresh(ticker):
+            return None
+        # Refetch from the bar before the last one: the last cached bar may have
+        # been partial, and the complete one before it shows whether history was revised
+        overlap_bar = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+        return datetime(overlap_bar.year, overlap_bar.month, overlap_bar.day)
+
+    @staticmethod
+    def _history_revised(cached, new):
+        """True if the first refetched bar differs from the complete cached bar at the same time."""
+        if new.empty or len(cached) < 2:
+            return False
+        first = new.index[0]
+        if first not in cached.index or first == cached.index[-1]:
+            return False
+        prices = ['Open', 'High', 'Low', 'Close']
+        return not np.allclose(new.loc[first, prices].to_numpy(dtype=np.float64),
+                               cached.loc[first, prices].to_numpy(dtype=np.float64),
+                               rtol=REVISION_TOLERANCE, atol=0)
+
+    def get_many(self, tickers, start_date, end_date, fetch_many):
+        """
+        Return bars in [start_date, end_date) for many tickers, fetching only what is missing.
+        Tickers that need the same download range are fetched in one call.
+
+        Args:
+            tickers: Symbols to load
+            start_date: First datetime wanted
+            end_date: End datetime (exclusive)
+            fetch_many: Callable(tickers, start, end) -> {ticker: DataFrame}
+
+        Returns:
+            Dict of ticker -> DataFrame for every ticker with data
+        """
+        cached = {ticker: self.load(ticker) for ticker in tickers}
+
+        if self.offline:
+            missing = [t for t, data in cached.items() if data is None]
+            if missing:
+                logger.error(f"Offline mode: no cached data for {', '.join(missing)}")
+            return {t: self._slice(data, start_date, end_date)
+                    for t, data in cached.items() if data is not None}
+
+        groups = {}
+        for ticker, data in cached.items():
+            groups.setdefault(self._fetch_start(ticker, data, start_date), []).append(ticker)
+
+        results = {}
+        revised = []
+        for fetch_start, group in groups.items():
+            fetched = {} if fetch_start is None else (fetch_many(group, fetch_start, end_date) or {})
+            for ticker in group:
+                data = cached[ticker]
+                new = fetched.get(ticker)
+                if fetch_start is None:
+                    merged = data
+                elif fetch_start != start_date:
+                    if new is None:
+                        logger.warning(f"Tail refresh failed for {ticker}, serving cached data")
+                        results[ticker] = self._slice(data, start_date, end_date)
+                        continue
+                    logger.info(f"Fetched {len(new)} new bars for {ticker}")
+                    new = new[COLUMNS]
+                    if new.index.tz is not None and data.index.tz is not None:
+                        new = new.tz_convert(data.index.tz)
+                    if self._history_revised(data, new):
+                        logger.info(f"Cached history of {ticker} was adjusted upstream, refetching it")
+                        revised.append(ticker)
+                        continue
+                    merged = pd.concat([data, new])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                    self.save(ticker, merged, first_bar=self.first_bar(ticker))
+                else:
+                    if new is None or new.empty:
+                        continue
+                    merged = new[COLUMNS]
+                    self.save(ticker, merged, first_bar=self._listing_bar(merged, start_date))
+                results[ticker] = self._slice(merged, start_date, end_date)
+
+        # Splits and dividends rescale all of the history, so it is replaced, not merged
+        if revised:
+            fetched = fetch_many(revised, start_date, end_date) or {}
+            for ticker in revised:
+                new = fetched.get(ticker)
+                if new is None or new.empty:
+                    logger.warning(f"Full refresh failed for {ticker}, serving cached data")
+                    results[ticker] = self._slice(cached[ticker], start_date, end_date)
+                    continue
+                self.save(ticker, new[COLUMNS], first_bar=self._listing_bar(new, start_date))
+                results[ticker] = self._slice(new[COLUMNS], start_date, end_date)
+        return results
+
+    def get(self, ticker, start_date, end_date, fetch):
+        """
+        Return bars in [start_date, end_date) for one ticker, fetching only what is missing.
+
+        Args:
+            ticker: Symbol to load
+            start_date: First datetime wanted
+            end_date: End datetime (exclusive)
+            fetch: Callable(ticker, start, end) -> DataFrame used for downloads
+
+        Returns:
+            DataFrame of OHLCV bars, or None if unavailable
+        """
+        def fetch_many(tickers, start, end):
+            return {t: fetch(t, start, end) for t in tickers}
+
+        return self.get_many([ticker], start_date, end_date, fetch_many).get(ticker)
@@ -0,0 +1,42 @@
+# overlap_index.py
+"""Sorted interval index for the greedy non-overlapping channel selection."""
+from bisect import bisect_left, bisect_right
+
+
+class OverlapIndex:
+    """
+    Selected intervals as integer (start, end) pairs, kept sorted.
+
+    Answers "does [start, end] overlap any selected interval by more than
+    max_overlap of the shorter one" with the same arithmetic as
+    MarketAnalysis.has_significant_overlap. Because a contained interval
+    overlaps by 100%, selected intervals never nest when max_overlap < 1,
+    so sorting by start also sorts by end and the intervals that overlap a
+    query form one contiguous run found with two bisects.
+    """
+
+    def __init__(self, max_overlap=0.3):
+        if not max_overlap < 1:
+            raise ValueError("max_overlap must be below 1")
+        self.max_overlap = max_overlap
+        self.starts = []
+        self.ends = []
+
+    def overlaps(self, start, end):
+        """True if the interval overlaps a selected one by more than max_overlap."""
+        first = bisect_right(self.ends, start)   # selected intervals ending after start
+        last = bisect_left(self.starts, end)     # selected intervals starting before end
+        for k in range(first, last):
+            overlap_length = min(end, self.ends[k]) - max(start, self.starts[k])
+            shorter_length = min(end - start, self.ends[k] - self.starts[k])
+            if overlap_length / shorter_length > self.max_overlap:
+                return True
+        return False
+
+    def add(self, start, end):
+        k = bisect_left(self.starts, start)
+        self.starts.insert(k, start)
+        self.ends.insert(k, end)
+
+    def __len__(self):
+        return len(self.starts)
@@ -0,0 +1,248 @@
+# parameter_sweep.py
+"""
+Grid or random search over the validate_trend thresholds and the
+identify_channels window, step and quality cutoff on historical data.
+
+Every parameter set is scored by how well its selected channels hold out
+of sample: the share of the next `horizon` closes that stay between the
+channel lines extended past the window.
+
+Usage:
+    python src/parameter_sweep.py --years 5 --samples 300 --output sweep.csv
+    python src/parameter_sweep.py --tickers ^GSPC ^NDX --grid
+"""
+import argparse
+import itertools
+import logging
+import random
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import Settings
+from market_analysis import MarketAnalysis
+from shared_ohlcv import map_tickers
+from trend_engine import TREND_THRESHOLDS, TrendEngine
+
+logger = logging.getLogger(__name__)
+
+# Values tried for each parameter; each list includes the current default
+DEFAULT_GRID = {
+    'recent_r_squared': [0.2, 0.3, 0.4],
+    'recent_slope': [0.004, 0.008, 0.015],
+    'recent_movement': [0.02, 0.03, 0.05],
+    'older_r_squared': [0.3, 0.4, 0.5],
+    'older_slope': [0.008, 0.015, 0.03],
+    'older_movement': [0.03, 0.05, 0.08],
+    'window_size': [20, 40, 80],
+    'step': [10, 20],
+    'min_score': [0.2, 0.3, 0.4],
+}
+
+# Per-ticker sums returned by the workers, one row per parameter set
+_SUMS = ('channels', 'score', 'forward_containment', 'evaluated', 'tickers')
+
+
+def parameter_sets(grid=None, samples=None, seed=0):
+    """
+    Parameter dicts to evaluate: the full grid, or `samples` distinct random grid points.
+    """
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    total = int(np.prod([len(values) for values in grid.values()]))
+    if not samples or samples >= total:
+        return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    rng = random.Random(seed)
+    chosen = set()
+    while len(chosen) < samples:
+        chosen.add(tuple(rng.randrange(len(grid[name])) for name in names))
+    return [{name: grid[name][i] for name, i in zip(names, point)} for point in sorted(chosen)]
+
+
+def thresholds_of(params):
+    """TREND_THRESHOLDS-shaped dict of a parameter set."""
+    return {
+        True: (params['recent_r_squared'], params['recent_slope'], params['recent_movement']),
+        False: (params['older_r_squared'], params['older_slope'], params['older_movement']),
+    }
+
+
+def _forward_containment(closes, starts, window_size, slope, upper, lower, horizon):
+    """Share of the `horizon` closes after each window that stay inside its extended lines (NaN without enough data)."""
+    result = np.full(len(starts), np.nan)
+    after = starts + window_size
+    available = after + horizon <= len(closes)
+    if not available.any() or len(closes) < horizon:
+        return result
+    future = sliding_window_view(closes, horizon)[after[available]]
+    x = window_size + np.arange(horizon)
+    upper_line = slope[available, None] * x + upper[available, None]
+    lower_line = slope[available, None] * x + lower[available, None]
+    result[available] = np.mean((future <= upper_line) & (future >= lower_line), axis=1)
+    return result
+
+
+def _scale_candidates(data, engine, window_size, step, horizon):
+    """
+    Everything about one (window, step) scan that does not depend on the
+    thresholds: statistics, channel lines and scores of every window, and
+    their out-of-sample containment.
+    """
+    stats = engine.scan(window_size, step)
+    all_windows = np.arange(len(stats['start']))
+    indices, slope, upper, lower, scores = MarketAnalysis._window_channels(data, stats, all_windows, window_size)
+    starts = stats['start'][indices]
+    forward = _forward_containment(data['Close'].to_numpy(dtype=np.float64), starts, window_size,
+                                   slope, upper, lower, horizon)
+    candidates = [
+        (
+            ((float(slope[k]), float(upper[k])), (float(slope[k]), float(lower[k])),
+             (data.index[start], data.index[start + window_size - 1])),
+            float(scores[k]),
+            int(start),
+        )
+        for k, start in enumerate(starts)
+    ]
+    return {
+        'stats': stats,
+        'is_recent': stats['start'] > len(data) * 2/3,
+        'candidates': candidates,
+        # Selected channels are mapped back to their window by start date
+        'by_start': {candidate[0][2][0]: k for k, candidate in enumerate(candidates)},
+        'forward': forward,
+        'score': scores,
+    }
+
+
+def evaluate_ticker(item, params, horizon):
+    """
+    Worker: sums of the sweep metrics of one ticker for every parameter set.
+    Scans are computed once per (window, step) and shared by all threshold sets.
+
+    Returns:
+        (ticker, array of shape (len(params), len(_SUMS))) or (ticker, None) on error
+    """
+    ticker, data = item
+    try:
+        engine = TrendEngine.from_data(data)
+        scales = {}
+        sums = np.zeros((len(params), len(_SUMS)))
+        for row, p in enumerate(params):
+            key = (p['window_size'], p['step'])
+            if key not in scales:
+                scales[key] = _scale_candidates(data, engine, p['window_size'], p['step'], horizon)
+            scale = scales[key]
+            mask = TrendEngine.trend_mask(scale['stats'], scale['is_recent'], thresholds_of(p))
+            candidates = [scale['candidates'][k] for k in np.flatnonzero(mask)]
+            selected = MarketAnalysis.select_channels(candidates, min_score=p['min_score'])
+            if not selected:
+                continue
+            chosen = np.array([scale['by_start'][channel[2][0]] for channel in selected])
+            forward = scale['forward'][chosen]
+            evaluated = ~np.isnan(forward)
+            sums[row] = (len(chosen), scale['score'][chosen].sum(), forward[evaluated].sum(),
+                         evaluated.sum(), 1)
+        return ticker, sums
+    except Exception as e:
+        logger.error(f"Error sweeping parameters for {ticker}: {e}")
+        return ticker, None
+
+
+def run_sweep(frames, params=None, horizon=None, workers=None, min_channels=None):
+    """
+    Evaluate parameter sets over a universe and rank them.
+
+    Args:
+        frames: {ticker: OHLC DataFrame}
+        params: Parameter dicts (default: the full DEFAULT_GRID)
+        horizon: Bars after each channel used to score it (default Settings.SWEEP_HORIZON)
+        workers: Process pool size (1 runs in this process)
+        min_channels: Channels a set must select to be ranked ahead of the rest
+            (default: one per ticker)
+
+    Returns:
+        DataFrame with one row per parameter set, best first
+    """
+    params = params or parameter_sets()
+    horizon = horizon or Settings.SWEEP_HORIZON
+    workers = workers or Settings.SCAN_WORKERS
+    min_channels = len(frames) if min_channels is None else min_channels
+    evaluate = partial(evaluate_ticker, params=params, horizon=horizon)
+    items = list(frames.items())
+    logger.info(f"Sweeping {len(params)} parameter sets over {len(items)} tickers with {workers} workers...")
+    if workers == 1:
+        results = [evaluate(item) for item in items]
+    else:
+        # Workers read the bars from shared memory instead of unpickling every frame
+        results = map_tickers(evaluate, frames, workers)
+
+    totals = np.zeros((len(params), len(_SUMS)))
+    for _, sums in results:
+        if sums is not None:
+            totals += sums
+    channels, score, forward, evaluated, tickers = totals.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table = pd.DataFrame(params).assign(
+            channels=channels.astype(int),
+            tickers_with_channels=tickers.astype(int),
+            mean_score=score / channels,
+            forward_containment=forward / evaluated,
+            evaluated=evaluated.astype(int),
+        )
+    table['ranked'] = table['channels'] >= max(min_channels, 1)
+    table = table.sort_values(['ranked', 'forward_containment', 'channels'], ascending=False,
+                              na_position='last', kind='stable')
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table.drop(columns='ranked').reset_index(drop=True)
+
+
+def format_thresholds(params):
+    """The TREND_THRESHOLDS literal of a parameter set, for trend_engine.py."""
+    thresholds = thresholds_of(params)
+    return (
+        "TREND_THRESHOLDS = {\n"
+        f"    True: {thresholds[True]},    # recent period\n"
+        f"    False: {thresholds[False]},   # older / long-term period\n"
+        "}"
+    )
+
+
+if __name__ == "__main__":
+    from backtest import load_history
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Search validate_trend and channel parameters")
+    parser.add_argument('--tickers', nargs='+', default=list(Settings.INDICES), help="Symbols to use")
+    parser.add_argument('--universe', action='store_true', help="Use the index constituents instead")
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--data-dir', help="Read <ticker>.csv/.parquet files instead of the cache")
+    search = parser.add_mutually_exclusive_group()
+    search.add_argument('--grid', action='store_true', help="Evaluate the full grid")
+    search.add_argument('--samples', type=int, default=300, help="Random grid points to evaluate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--horizon', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', default='sweep.csv', help="Ranked results table (CSV)")
+    args = parser.parse_args()
+
+    tickers = args.tickers
+    if args.universe:
+        from universe_scanner import load_universes
+        tickers = load_universes()
+    frames = load_history(tickers, args.years, args.data_dir)
+    logger.info(f"Loaded history for {len(frames)}/{len(tickers)} tickers")
+    params = parameter_sets(samples=None if args.grid else args.samples, seed=args.seed)
+    table = run_sweep(frames, params, args.horizon, args.workers)
+    table.to_csv(args.output, index=False)
+    logger.info(f"Ranked results written to {args.output}")
+    logger.info(f"Top parameter sets:\n{table.head(10).to_string(index=False)}")
+    if not table.empty:
+        best = table.iloc[0].to_dict()
+        logger.info(f"Current thresholds: {TREND_THRESHOLDS}")
+        logger.info(f"Best thresholds (window {best['window_size']}, step {best['step']}, "
+                    f"min_score {best['min_score']}):\n{format_thresholds(best)}")
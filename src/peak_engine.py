@@ -0,0 +1,187 @@
+# peak_engine.py
+"""Peak-based channel lines: find_peaks once per series, lines fitted on pivot points."""
+import numpy as np
+from scipy.signal import find_peaks
+
+from trend_engine import window_starts
+
+try:
+    import numba
+except ImportError:  # Optional: the NumPy path is used without it
+    numba = None
+
+
+def _ragged(first, counts):
+    """Flat positions and segment ids for the index ranges [first, first + counts)."""
+    segment = np.repeat(np.arange(len(counts)), counts)
+    begin = np.cumsum(counts) - counts
+    return first[segment] + np.arange(counts.sum()) - begin[segment], segment, begin
+
+
+def _fit_windows_loop(highs, lows, peaks, troughs, starts, length, slope, upper, lower):
+    """Per-window fit as plain loops; compiled with numba when it is installed."""
+    for k in range(len(starts)):
+        s = starts[k]
+        e = s + length
+        p0 = np.searchsorted(peaks, s)
+        p1 = np.searchsorted(peaks, e)
+        t0 = np.searchsorted(troughs, s)
+        t1 = np.searchsorted(troughs, e)
+        n = p1 - p0
+        if n < 2 or t1 == t0:
+            continue
+        sx = 0.0
+        sy = 0.0
+        sxx = 0.0
+        sxy = 0.0
+        for j in range(p0, p1):
+            x = peaks[j] - s
+            y = highs[peaks[j]]
+            sx += x
+            sy += y
+            sxx += x * x
+            sxy += x * y
+        m = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        slope[k] = m
+        upper[k] = (sy - m * sx) / n
+        low = np.inf
+        for j in range(t0, t1):
+            value = lows[troughs[j]] - m * (troughs[j] - s)
+            if value < low:
+                low = value
+        lower[k] = low
+
+
+_fit_windows_jit = numba.njit(cache=True)(_fit_windows_loop) if numba is not None else None
+
+
+class PeakEngine:
+    """
+    Peaks of High and troughs of Low found once per series (the same
+    find_peaks call as MarketAnalysis.find_significant_points). A window's
+    channel is construct_channel on the pivots inside it: a least-squares
+    upper line through the peaks, and a parallel lower line through the
+    lowest trough.
+
+    Several series can share one engine: they are laid end to end in one
+    buffer and pivots are searched per series, so windows of many tickers
+    are fitted in a single call.
+    """
+
+    def __init__(self, highs, lows, distance=10, lengths=None):
+        self.highs = np.ascontiguousarray(highs, dtype=np.float64)
+        self.lows = np.ascontiguousarray(lows, dtype=np.float64)
+        lengths = [len(self.highs)] if lengths is None else list(lengths)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+        peaks, troughs = [], []
+        for begin, end in zip(self.offsets[:-1], self.offsets[1:]):
+            peaks.append(find_peaks(self.highs[begin:end], distance=distance)[0] + begin)
+            troughs.append(find_peaks(-self.lows[begin:end], distance=distance)[0] + begin)
+        self.peaks = np.concatenate(peaks).astype(np.int64)
+        self.troughs = np.concatenate(troughs).astype(np.int64)
+
+    @classmethod
+    def from_data(cls, data, distance=10):
+        return cls(data['High'].values, data['Low'].values, distance)
+
+    @classmethod
+    def from_many(cls, frames, distance=10):
+        """One engine over several OHLC DataFrames; offsets[i] is where frame i starts."""
+        frames = list(frames)
+        return cls(np.concatenate([f['High'].values for f in frames]),
+                   np.concatenate([f['Low'].values for f in frames]),
+                   distance, [len(f) for f in frames])
+
+    def fit(self, starts, length, jit=None):
+        """
+        Channel lines for the windows [start, start + length).
+
+        Args:
+            starts: Window start indices into the engine buffer
+            length: Window length in bars
+            jit: Use the numba kernel (default: when numba is installed)
+
+        Returns:
+            Dict of arrays 'slope', 'upper_intercept', 'lower_intercept' (NaN where
+            a window has fewer than two peaks or no trough) and the 'valid' mask
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        slope = np.full(len(starts), np.nan)
+        upper = np.full(len(starts), np.nan)
+        lower = np.full(len(starts), np.nan)
+
+        if jit is None:
+            jit = _fit_windows_jit is not None
+        if jit:
+            if _fit_windows_jit is None:
+                raise ImportError("numba is not installed")
+            _fit_windows_jit(self.highs, self.lows, self.peaks, self.troughs,
+                             starts, length, slope, upper, lower)
+        else:
+            self._fit_numpy(starts, length, slope, upper, lower)
+
+        return {
+            'slope': slope,
+            'upper_intercept': upper,
+            'lower_intercept': lower,
+            'valid': ~np.isnan(upper),
+        }
+
+    def _fit_numpy(self, starts, length, slope, upper, lower):
+        ends = starts + length
+        p0 = np.searchsorted(self.peaks, starts)
+        p_count = np.searchsorted(self.peaks, ends) - p0
+        t0 = np.searchsorted(self.troughs, starts)
+        t_count = np.searchsorted(self.troughs, ends) - t0
+        windows = np.flatnonzero((p_count >= 2) & (t_count > 0))
+        if len(windows) == 0:
+            return
+
+        # Least-squares line through every window's peaks, in window-local x
+        position, segment, _ = _ragged(p0[windows], p_count[windows])
+        x = (self.peaks[position] - starts[windows][segment]).astype(np.float64)
+        y = self.highs[self.peaks[position]]
+        n = p_count[windows].astype(np.float64)
+        sx = np.bincount(segment, x, len(windows))
+        sy = np.bincount(segment, y, len(windows))
+        sxx = np.bincount(segment, x * x, len(windows))
+        sxy = np.bincount(segment, x * y, len(windows))
+        m = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+
+        # Parallel lower line through the lowest trough
+        position, segment, begin = _ragged(t0[windows], t_count[windows])
+        values = self.lows[self.troughs[position]] - m[segment] * (
+            self.troughs[position] - starts[windows][segment])
+
+        slope[windows] = m
+        upper[windows] = (sy - m * sx) / n
+        lower[windows] = np.minimum.reduceat(values, begin)
+
+
+def peak_channels_many(frames, window_size=40, step=20, distance=10, jit=None):
+    """
+    Peak-based channel lines for the window grid of several tickers in one fit.
+
+    Args:
+        frames: Dict of ticker -> OHLC DataFrame
+        window_size: Window length in bars
+        step: Distance between window starts
+
+    Returns:
+        Dict of ticker -> dict with local 'start' indices and the PeakEngine.fit arrays
+    """
+    tickers = list(frames)
+    engine = PeakEngine.from_many(frames.values(), distance)
+    grids = [window_starts(len(frames[t]), window_size, step) for t in tickers]
+    fit = engine.fit(np.concatenate(
+        [grid + engine.offsets[i] for i, grid in enumerate(grids)] or [np.empty(0, np.int64)]),
+        window_size, jit)
+
+    results = {}
+    position = 0
+    for ticker, grid in zip(tickers, grids):
+        results[ticker] = {'start': grid,
+                           **{key: value[position:position + len(grid)] for key, value in fit.items()}}
+        position += len(grid)
+    return results
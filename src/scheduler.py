@@ -0,0 +1,207 @@
+# scheduler.py
+"""
+Resident scheduler: loads the services once and runs the bot's jobs from
+Settings.SCHEDULE instead of a cold main.py start per invocation.
+
+Usage:
+    python src/scheduler.py
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from config import Settings
+from metrics import start_run
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep, so wall-clock jumps (suspend, DST) are noticed
+MAX_SLEEP_SECONDS = 300
+
+
+def _occurrences(spec, first_day, days):
+    """Scheduled datetimes of a job on `days` consecutive days from first_day, in order."""
+    times = sorted(datetime.strptime(t, '%H:%M').time() for t in spec['times'])
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        if 'day' in spec and day.day != spec['day']:
+            continue
+        if 'weekday' in spec and day.weekday() != spec['weekday']:
+            continue
+        for at in times:
+            yield datetime.combine(day, at)
+
+
+def next_run(spec, after):
+    """First scheduled time strictly after `after` (None if the spec never matches)."""
+    for when in _occurrences(spec, after.date(), 400):
+        if when > after:
+            return when
+    return None
+
+
+def previous_run(spec, now):
+    """Latest scheduled time at or before `now` (None if there is none within a year)."""
+    latest = None
+    for when in _occurrences(spec, now.date() - timedelta(days=400), 401):
+        if when > now:
+            break
+        latest = when
+    return latest
+
+
+class Scheduler:
+    """
+    Runs each job at its scheduled times plus a random jitter. A job that
+    is still running when it comes due again is skipped, while different
+    jobs may overlap. The last start of every job is persisted, so a run
+    missed while the daemon was down is caught up at startup if it is
+    younger than the catch-up window (only the latest missed run).
+    """
+
+    def __init__(self, jobs, schedule=None, state_path=None, jitter=None, catchup_hours=None,
+                 clock=datetime.now, sleep=asyncio.sleep):
+        self.jobs = jobs
+        self.schedule = schedule or Settings.SCHEDULE
+        self.state_path = state_path or Settings.SCHEDULER_STATE_PATH
+        self.jitter = Settings.SCHEDULER_JITTER_SECONDS if jitter is None else jitter
+        self.catchup = timedelta(hours=Settings.SCHEDULER_CATCHUP_HOURS if catchup_hours is None
+                                 else catchup_hours)
+        self.clock = clock
+        self.sleep = sleep
+        self.running = {}
+        self._tasks = set()
+        self.last_run = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return {name: datetime.fromisoformat(value) for name, value in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        try:
+            directory = os.path.dirname(self.state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=directory or '.', suffix='.tmp', delete=False) as f:
+                json.dump({name: value.isoformat() for name, value in self.last_run.items()}, f)
+            os.replace(f.name, self.state_path)
+        except Exception as e:
+            logger.error(f"Error saving scheduler state: {e}")
+
+    def missed(self, name, now):
+        """True if the job's latest scheduled run was missed and is still inside the catch-up window."""
+        due = previous_run(self.schedule[name], now)
+        if due is None or now - due > self.catchup:
+            return False
+        last = self.last_run.get(name)
+        return last is None or last < due
+
+    async def run_job(self, name):
+        """Run one job now unless it is still running; metrics are collected per run."""
+        if name in self.running:
+            logger.warning(f"{name} is still running, skipping this run")
+            return
+        self.running[name] = asyncio.current_task()
+        self.last_run[name] = self.clock()
+        self._save_state()
+        with start_run() as metrics:
+            logger.info(f"Starting {name}")
+            try:
+                await self.jobs[name]()
+                logger.info(f"Finished {name}")
+            except Exception as e:
+                logger.error(f"Job {name} failed: {e}")
+            finally:
+                del self.running[name]
+                metrics.log_summary()
+                metrics.write(os.path.join(
+                    Settings.METRICS_DIR, f"{name}-{metrics.started_at.strftime('%Y%m%d-%H%M%S')}.json"))
+
+    def _start(self, name):
+        task = asyncio.create_task(self.run_job(name))
+        # Keep a reference until the task is done so it is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _sleep_until(self, when):
+        while True:
+            remaining = (when - self.clock()).total_seconds()
+            if remaining <= 0:
+                return
+            await self.sleep(min(remaining, MAX_SLEEP_SECONDS))
+
+    async def _job_loop(self, name):
+        spec = self.schedule[name]
+        if self.missed(name, self.clock()):
+            logger.info(f"Catching up missed run of {name}")
+            self._start(name)
+        while True:
+            due = next_run(spec, self.clock())
+            if due is None:
+                logger.error(f"{name} has no upcoming run, check its schedule")
+                return
+            when = due + timedelta(seconds=random.uniform(0, self.jitter))
+            logger.info(f"Next {name} run at {when:%Y-%m-%d %H:%M:%S}")
+            await self._sleep_until(when)
+            # Jobs run as tasks so a long run does not delay the next occurrence check
+            self._start(name)
+
+    async def run_forever(self):
+        await asyncio.gather(*(self._job_loop(name) for name in self.jobs))
+
+
+def build_jobs():
+    """Create the services once and return the enabled jobs as coroutine functions."""
+    # Heavy imports happen once here, not on every scheduled run
+    import main
+    from breakout_alerts import BreakoutWatcher
+    from chart_analyzer import ChartAnalyzer
+    from macro_analyzer import MacroAnalyzer
+    from market_analysis import MarketAnalysis
+    from telegram_bot import TelegramBot
+    from universe_scanner import load_universes
+
+    market = MarketAnalysis()
+    chart_analyzer = ChartAnalyzer()
+    macro_analyzer = MacroAnalyzer()
+    telegram = TelegramBot()
+    instagram = None
+    # Channels are rebuilt once a day, cooldowns carry over between ticks
+    breakouts = BreakoutWatcher(lambda: list(dict.fromkeys([*Settings.INDICES, *load_universes()])), telegram)
+
+    async def technical_analysis():
+        await main.run_technical_analysis(market, chart_analyzer, telegram)
+        if Settings.SCAN_UNIVERSE:
+            await main.run_universe_scan(chart_analyzer, telegram)
+
+    async def motivation_post():
+        nonlocal instagram
+        if instagram is None:
+            from instagram_service import InstagramService
+            instagram = InstagramService()
+        await main.run_motivation_post(instagram)
+
+    jobs = {
+        'macro_analysis': lambda: main.run_macro_analysis(macro_analyzer, telegram),
+        'technical_analysis': technical_analysis,
+        'motivation_post': motivation_post,
+        'breakout_alerts': breakouts.tick,
+    }
+    return {name: jobs[name] for name in Settings.SCHEDULER_JOBS if name in jobs}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    scheduler = Scheduler(build_jobs())
+    logger.info(f"Scheduler started with jobs: {', '.join(scheduler.jobs)}")
+    asyncio.run(scheduler.run_forever())
@@ -0,0 +1,164 @@
+# shared_ohlcv.py
+"""
+Universe OHLCV packed into shared memory, so worker processes read every
+ticker's bars as NumPy views instead of receiving pickled DataFrames.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('High', 'Low', 'Close', 'Volume')
+
+
+class SharedOHLCV:
+    """
+    All tickers' bars in two shared blocks: a (columns x bars) float64 price
+    block and an int64 block of bar times (UTC nanoseconds), with every
+    ticker's bars stored contiguously at its (start, length) offset.
+
+    The creating process owns the blocks and unlinks them on close(); worker
+    processes attach() with the small, picklable `spec` and get read-only views.
+    """
+
+    def __init__(self, spec, prices_block, times_block, owner):
+        self.spec = spec
+        self.offsets = spec['offsets']
+        self.columns = spec['columns']
+        self._blocks = (prices_block, times_block)
+        self._owner = owner
+        total = spec['total']
+        self.prices = np.ndarray((len(self.columns), total), dtype=np.float64, buffer=prices_block.buf)
+        self.times = np.ndarray(total, dtype=np.int64, buffer=times_block.buf)
+        if not owner:
+            self.prices.flags.writeable = False
+            self.times.flags.writeable = False
+
+    @classmethod
+    def create(cls, frames, columns=COLUMNS):
+        """
+        Copy {ticker: DataFrame} into new shared blocks. Bar times are
+        returned in the time zone and resolution of the first frame.
+
+        Returns:
+            SharedOHLCV owning the blocks (use as a context manager or call close())
+        """
+        offsets = {}
+        total = 0
+        for ticker, data in frames.items():
+            offsets[ticker] = (total, len(data))
+            total += len(data)
+        first = next(iter(frames.values()), None)
+        tz = str(first.index.tz) if first is not None and first.index.tz is not None else None
+        unit = first.index.unit if first is not None else 'ns'
+
+        # Zero-size blocks are not allowed
+        prices_block = shared_memory.SharedMemory(create=True, size=max(1, total * len(columns) * 8))
+        times_block = shared_memory.SharedMemory(create=True, size=max(1, total * 8))
+        spec = {
+            'prices': prices_block.name,
+            'times': times_block.name,
+            'total': total,
+            'columns': tuple(columns),
+            'offsets': offsets,
+            'tz': tz,
+            'unit': unit,
+        }
+        shared = cls(spec, prices_block, times_block, owner=True)
+        for ticker, data in frames.items():
+            start, length = offsets[ticker]
+            for row, column in enumerate(columns):
+                shared.prices[row, start:start + length] = data[column].to_numpy(dtype=np.float64)
+            index = data.index.tz_convert('UTC') if data.index.tz is not None else data.index
+            shared.times[start:start + length] = index.as_unit('ns').asi8
+        logger.info(f"Shared {total} bars of {len(offsets)} tickers ({(total * (len(columns) + 1) * 8) / 1e6:.1f} MB)")
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Open blocks created elsewhere, read-only."""
+        prices_block = shared_memory.SharedMemory(name=spec['prices'])
+        times_block = shared_memory.SharedMemory(name=spec['times'])
+        return cls(spec, prices_block, times_block, owner=False)
+
+    def __contains__(self, ticker):
+        return ticker in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def arrays(self, ticker):
+        """{column: view} of one ticker's bars; no data is copied."""
+        start, length = self.offsets[ticker]
+        return {column: self.prices[row, start:start + length] for row, column in enumerate(self.columns)}
+
+    def frame(self, ticker):
+        """One ticker as a DataFrame whose columns are views on the shared block."""
+        start, length = self.offsets[ticker]
+        index = pd.DatetimeIndex(self.times[start:start + length].view('datetime64[ns]')).as_unit(self.spec['unit'])
+        if self.spec['tz']:
+            index = index.tz_localize('UTC').tz_convert(self.spec['tz'])
+        return pd.DataFrame(self.arrays(ticker), index=index, copy=False)
+
+    def close(self):
+        """Drop the views and release the blocks; the owner also unlinks them."""
+        self.prices = self.times = None
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:
+                # A frame() of this process is still alive; the mapping goes when it does
+                logger.warning("Shared OHLCV views still in use while closing")
+            if self._owner:
+                block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# Attached blocks of a pool worker, set once by the pool initializer
+_worker_shared = None
+
+
+def _attach_worker(spec):
+    global _worker_shared
+    _worker_shared = SharedOHLCV.attach(spec)
+
+
+def _call_shared(func, ticker):
+    return func((ticker, _worker_shared.frame(ticker)))
+
+
+def map_tickers(func, frames, workers, chunksize=None, columns=COLUMNS):
+    """
+    Run func((ticker, data)) for every ticker in a process pool. The frames
+    are shared once, and tasks carry only ticker names.
+
+    Args:
+        func: Picklable (module-level) function of a (ticker, DataFrame) item
+        frames: {ticker: DataFrame} with the `columns`
+        workers: Process pool size
+        chunksize: Tickers per task (default spreads them ~4 tasks per worker)
+        columns: Columns shared with the workers (default COLUMNS)
+
+    Returns:
+        List of results in ticker order
+    """
+    tickers = list(frames)
+    chunksize = chunksize or max(1, len(tickers) // (workers * 4))
+    with SharedOHLCV.create(frames, columns) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                 initargs=(shared.spec,)) as pool:
+            return list(pool.map(partial(_call_shared, func), tickers, chunksize=chunksize))
@@ -1,61 +1,136 @@
 # telegram_bot.py
 import logging
-from telegram import Bot
-from telegram.error import TelegramError
+from telegram import Bot, InputMediaPhoto
 from config import Settings
+from chart_image import ChartImage
+from telegram_queue import TelegramSendQueue
+from telegram_file_cache import FileIdCache, photo_file_ids
 
 logger = logging.getLogger(__name__)
 
+# Telegram albums hold 2-10 items
+MEDIA_GROUP_SIZE = 10
+
 class TelegramBot:
-    def __init__(self):
-        self.bot = Bot(token=Settings.TELEGRAM_BOT_TOKEN)
-    
-    async def send_image(self, image_path):
-        """Send an image to the private channel."""
-        try:
-            logger.info(f"Attempting to send image: {image_path}")
-            with open(image_path, 'rb') as image_file:
-                await self.bot.send_photo(
-                    chat_id=Settings.CHANNEL_ID_PRIVATE, 
-                    photo=image_file
-                )
-            logger.info("Image sent successfully")
-        except Exception as e:
-            logger.error(f"Error sending image: {e}")
-    
+    """
+    Sends to the private and public channels through a shared TelegramSendQueue.
+    The queue_* methods return a future right away, so callers can keep working
+    while messages go out; the send_* methods wait for delivery.
+    Images already uploaded (same bytes) are sent by their Telegram file_id.
+    """
+
+    def __init__(self, bot=None, queue=None, file_ids=None):
+        self.bot = bot or Bot(token=Settings.TELEGRAM_BOT_TOKEN)
+        self.queue = queue or TelegramSendQueue(self.bot)
+        # file_ids=False disables reuse; None uses the configured default
+        if file_ids is None and Settings.TELEGRAM_FILE_ID_REUSE:
+            file_ids = FileIdCache()
+        self.file_ids = file_ids or None
+
+    @staticmethod
+    def _as_image(image):
+        """Accept an in-memory ChartImage or load one from a file path."""
+        return image if isinstance(image, ChartImage) else ChartImage.from_file(image)
+
+    @staticmethod
+    def _chat(public):
+        return Settings.CHANNEL_ID_PUBLIC if public else Settings.CHANNEL_ID_PRIVATE
+
+    def queue_image(self, image, public=False, caption=None):
+        """Queue an image (ChartImage or file path); returns a future of the sent message."""
+        image = self._as_image(image)
+        logger.info(f"Queueing {'public ' if public else ''}image: {image.name}")
+        chat = self._chat(public)
+        if self.file_ids is None:
+            return self.queue.submit(chat, 'send_photo', size=len(image), photo=image.data, caption=caption)
+
+        upload = ({'photo': image.data}, len(image))
+        file_id = self.file_ids.get(image.sha256)
+        in_flight = self.file_ids.pending(image.sha256)
+        if file_id:
+            # The bytes are only sent again if Telegram no longer knows the file_id
+            future = self.queue.submit(chat, 'send_photo', photo=file_id, caption=caption, fallback=upload)
+        elif in_flight is not None:
+            # Same bytes queued earlier: wait for that upload and send its file_id
+            async def reuse_upload():
+                result = await in_flight
+                file_id = photo_file_ids(result)[0] if result else None
+                return ({'photo': file_id}, 0) if file_id else upload
+            future = self.queue.submit(chat, 'send_photo', resolve=reuse_upload, fallback=upload,
+                                       photo=None, caption=caption)
+        else:
+            future = self.queue.submit(chat, 'send_photo', size=len(image), photo=image.data, caption=caption)
+        self.file_ids.track([image.sha256], future)
+        return future
+
+    def queue_text(self, text, public=False):
+        """Queue a text message; returns a future of the sent message."""
+        return self.queue.submit(self._chat(public), 'send_message', size=len(text.encode()), text=text)
+
+    def queue_album(self, images, captions=None, public=False):
+        """
+        Queue several images as media groups of up to ten.
+
+        Args:
+            images: ChartImages or file paths
+            captions: Optional caption per image
+            public: Send to the public channel instead of the private one
+
+        Returns:
+            List of futures, one per album (a lone image is sent as a photo)
+        """
+        images = [self._as_image(image) for image in images]
+        captions = list(captions) if captions else [None] * len(images)
+        futures = []
+        for i in range(0, len(images), MEDIA_GROUP_SIZE):
+            group = images[i:i + MEDIA_GROUP_SIZE]
+            group_captions = captions[i:i + MEDIA_GROUP_SIZE]
+            if len(group) == 1:
+                futures.append(self.queue_image(group[0], public, group_captions[0]))
+                continue
+            logger.info(f"Queueing album of {len(group)} images")
+            file_ids = [self.file_ids.get(image.sha256) if self.file_ids else None for image in group]
+            media = [InputMediaPhoto(file_id or image.data, caption=caption, filename=image.name)
+                     for image, caption, file_id in zip(group, group_captions, file_ids)]
+            size = sum(len(image) for image, file_id in zip(group, file_ids) if not file_id)
+            fallback = None
+            if any(file_ids):
+                fallback = ({'media': [InputMediaPhoto(image.data, caption=caption, filename=image.name)
+                                       for image, caption in zip(group, group_captions)]},
+                            sum(len(image) for image in group))
+            future = self.queue.submit(self._chat(public), 'send_media_group', size=size,
+                                       fallback=fallback, media=media)
+            if self.file_ids is not None:
+                self.file_ids.track([image.sha256 for image in group], future)
+            futures.append(future)
+        return futures
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent."""
+        await self.queue.join()
+
+    async def send_image(self, image):
+        """Send an image (ChartImage or file path) to the private channel."""
+        return await self._deliver(lambda: self.queue_image(image), "Image")
+
     async def send_text(self, text):
         """Send a text message to the private channel."""
-        try:
-            logger.info("Attempting to send text message")
-            await self.bot.send_message(
-                chat_id=Settings.CHANNEL_ID_PRIVATE, 
-                text=text
-            )
-            logger.info("Message sent successfully")
-        except Exception as e:
-            logger.error(f"Error sending message: {e}")
+        return await self._deliver(lambda: self.queue_text(text), "Message")
 
     async def send_public_message(self, text):
         """Send a text message to the public channel."""
-        try:
-            logger.info("Attempting to send public message")
-            await self.bot.send_message(
-                chat_id=Settings.CHANNEL_ID_PUBLIC, 
-                text=text
-            )
-            logger.info("Public message sent successfully")
-        except Exception as e:
-            logger.error(f"Error sending public message: {e}")
+        return await self._deliver(lambda: self.queue_text(text, public=True), "Public message")
+
+    async def send_public_image(self, image):
+        """Send an image (ChartImage or file path) to the public channel."""
+        return await self._deliver(lambda: self.queue_image(image, public=True), "Public image")
 
-    async def send_public_image(self, image_path):
-        """Send an image to the public channel."""
+    async def _deliver(self, enqueue, description):
+        """Queue a send and wait for it; True once delivered."""
         try:
-            logger.info(f"Attempting to send public image: {image_path}")
-            with open(image_path, 'rb') as image_file:
-                await self.bot.send_photo(
-                    chat_id=Settings.CHANNEL_ID_PUBLIC, 
-                    photo=image_file
-                )
-            logger.info("Public image sent successfully")
+            if await enqueue():
+                logger.info(f"{description} sent successfully")
+                return True
         except Exception as e:
-            logger.error(f"Error sending public image: {e}")
\ No newline at end of file
+            logger.error(f"Error sending {description.lower()}: {e}")
+        return False
@@ -0,0 +1,90 @@
+# telegram_file_cache.py
+"""Content hash -> Telegram file_id, so repeated media is sent by reference."""
+import json
+import logging
+import os
+import tempfile
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def photo_file_ids(result):
+    """file_ids of the largest photo size in a send_photo / send_media_group result."""
+    messages = result if isinstance(result, (list, tuple)) else [result]
+    file_ids = []
+    for message in messages:
+        photo = getattr(message, 'photo', None)
+        file_ids.append(photo[-1].file_id if photo else None)
+    return file_ids
+
+
+class FileIdCache:
+    """
+    file_ids returned by Telegram for uploaded images, keyed by the SHA-256
+    of the image bytes. file_ids are only valid for the bot that uploaded
+    them, so entries are kept per bot id in one JSON file. Uploads still in
+    flight are tracked too, so a second send of the same bytes can wait for
+    the first upload instead of uploading again.
+    """
+
+    def __init__(self, path=None, bot_id=None, max_entries=10000):
+        self.path = path or Settings.TELEGRAM_FILE_ID_CACHE
+        self.bot_id = bot_id or (Settings.TELEGRAM_BOT_TOKEN or 'default').split(':')[0]
+        self.max_entries = max_entries
+        self._uploads = {}
+        try:
+            with open(self.path) as f:
+                self._all = json.load(f)
+        except (OSError, ValueError):
+            self._all = {}
+        self.entries = self._all.setdefault(self.bot_id, {})
+
+    def get(self, digest):
+        return self.entries.get(digest)
+
+    def put(self, digest, file_id):
+        self.entries.pop(digest, None)
+        self.entries[digest] = file_id
+        # Oldest entries go first once the cache is full
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+        self._save()
+
+    def discard(self, digest):
+        if self.entries.pop(digest, None) is not None:
+            self._save()
+
+    def pending(self, digest):
+        """Future of an upload of these bytes that is still in flight, if any."""
+        return self._uploads.get(digest)
+
+    def track(self, digests, future):
+        """Record the file_ids of a queued upload of `digests` once it is sent."""
+        for digest in digests:
+            self._uploads.setdefault(digest, future)
+
+        def uploaded(done):
+            for digest in digests:
+                if self._uploads.get(digest) is done:
+                    del self._uploads[digest]
+            if done.cancelled() or not done.result():
+                return
+            for digest, file_id in zip(digests, photo_file_ids(done.result())):
+                if file_id:
+                    self.put(digest, file_id)
+
+        future.add_done_callback(uploaded)
+
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # A unique temp file per writer, so concurrent saves never share one
+            with tempfile.NamedTemporaryFile('w', dir=directory or '.', suffix='.tmp', delete=False) as f:
+                json.dump(self._all, f)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Error saving Telegram file_id cache: {e}")
@@ -0,0 +1,169 @@
+# telegram_queue.py
+"""Rate-limited Telegram send queue: one ordered worker per chat, shared global limit."""
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from config import Settings
+from metrics import get_metrics, use_run
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Tolerance for rounding, or an exact clock could wait forever for the last 1e-16
+                if self.tokens >= 1 - 1e-9:
+                    self.tokens = max(self.tokens - 1, 0.0)
+                    return
+                await self.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after_seconds(error):
+    """Server-supplied RetryAfter delay (an int or a timedelta, depending on the PTB settings)."""
+    if isinstance(error.retry_after, timedelta):
+        return error.retry_after.total_seconds()
+    return float(error.retry_after)
+
+
+class TelegramSendQueue:
+    """
+    Sends Bot API requests through one worker per chat, so messages to a
+    chat keep their order while different chats are served concurrently.
+    Every request takes a token from its chat's bucket and from the global
+    bucket. RetryAfter is retried after the server-supplied delay, and
+    timeouts and network errors are retried with jittered backoff. A request
+    that still fails is logged and resolves to False.
+
+    A request can carry a `resolve` coroutine, run by the worker just before
+    sending, that returns final (kwargs, size) - e.g. a file_id of an upload
+    still in flight when the request was queued - and a `fallback`
+    (kwargs, size) sent once instead if Telegram rejects the request.
+    """
+
+    def __init__(self, bot, global_rate=None, chat_rate=None, max_retries=None, backoff=None,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        self.bot = bot
+        # Injectable so tests can run the rate limits on virtual time
+        self.clock = clock
+        self.sleep = sleep
+        self.global_rate = global_rate or Settings.TELEGRAM_GLOBAL_RATE
+        self.chat_rate = chat_rate or Settings.TELEGRAM_CHAT_RATE
+        self.max_retries = Settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Settings.TELEGRAM_BACKOFF_SECONDS if backoff is None else backoff
+        self._global_bucket = None
+        self._chats = {}
+
+    def submit(self, chat_id, method, size=0, resolve=None, fallback=None, **kwargs):
+        """
+        Queue one Bot API call.
+
+        Args:
+            chat_id: Target chat
+            method: Bot method name, e.g. 'send_photo', 'send_message', 'send_media_group'
+            size: Payload bytes, for the run metrics
+            resolve: Optional coroutine function returning (kwargs updates, size)
+            fallback: Optional (kwargs updates, size) to send if the request is rejected
+            **kwargs: Passed to the Bot method along with chat_id
+
+        Returns:
+            Future resolving to the Bot method's result, or False if the send failed
+        """
+        if self._global_bucket is None:
+            # Created lazily so the buckets bind to the running event loop
+            self._global_bucket = TokenBucket(self.global_rate, max(1, int(self.global_rate)),
+                                              self.clock, self.sleep)
+        if chat_id not in self._chats:
+            queue = asyncio.Queue()
+            worker = asyncio.create_task(self._worker(chat_id, queue, TokenBucket(self.chat_rate, clock=self.clock, sleep=self.sleep)))
+            self._chats[chat_id] = (queue, worker)
+        future = asyncio.get_running_loop().create_future()
+        # The worker outlives the run that created it, so each request carries its submitter's metrics
+        self._chats[chat_id][0].put_nowait((method, size, kwargs, resolve, fallback, get_metrics(), future))
+        return future
+
+    async def join(self):
+        """Wait until every queued request has been sent or has failed."""
+        await asyncio.gather(*(queue.join() for queue, _ in self._chats.values()))
+
+    async def close(self):
+        """Send what is queued, then stop the workers."""
+        await self.join()
+        for _, worker in self._chats.values():
+            worker.cancel()
+        self._chats = {}
+
+    async def _worker(self, chat_id, queue, chat_bucket):
+        while True:
+            method, size, kwargs, resolve, fallback, metrics, future = await queue.get()
+            try:
+                with use_run(metrics):
+                    if resolve is not None:
+                        updates, size = await resolve()
+                        kwargs = {**kwargs, **updates}
+                    result = await self._send(chat_id, chat_bucket, method, size, kwargs, fallback)
+            except Exception as e:
+                # One bad request must not stop the chat's worker and strand the requests behind it
+                logger.error(f"Error preparing {method} for {chat_id}: {e}")
+                result = False
+            finally:
+                queue.task_done()
+            if not future.done():
+                future.set_result(result)
+
+    async def _send(self, chat_id, chat_bucket, method, size, kwargs, fallback=None):
+        kind = method.replace('send_', '')
+        with get_metrics().stage('telegram', kind=kind, bytes=size) as stage:
+            attempt = 0
+            while True:
+                await chat_bucket.acquire()
+                await self._global_bucket.acquire()
+                try:
+                    return await getattr(self.bot, method)(chat_id=chat_id, **kwargs)
+                except RetryAfter as e:
+                    delay = retry_after_seconds(e)
+                except BadRequest as e:
+                    if fallback is not None:
+                        logger.warning(f"Telegram rejected {kind} for {chat_id} ({e}), sending fallback")
+                        kwargs = {**kwargs, **fallback[0]}
+                        stage.add(bytes=fallback[1], fallbacks=1)
+                        fallback = None
+                        continue
+                    logger.error(f"Telegram rejected {kind} for {chat_id}: {e}")
+                    stage.add(failures=1)
+                    return False
+                except NetworkError as e:
+                    delay = random.uniform(0, self.backoff * (2 ** attempt))
+                except Exception as e:
+                    logger.error(f"Error sending {kind} to {chat_id}: {e}")
+                    stage.add(failures=1)
+                    return False
+                if attempt >= self.max_retries:
+                    logger.error(f"Giving up on {kind} for {chat_id} after {attempt} retries")
+                    stage.add(failures=1)
+                    return False
+                attempt += 1
+                stage.add(retries=1)
+                logger.warning(f"Telegram {kind} for {chat_id} delayed, retry {attempt}/{self.max_retries} "
+                               f"in {delay:.1f}s")
+                await self.sleep(delay)
@@ -0,0 +1,134 @@
+# trend_engine.py
+"""Batched sliding-window trend statistics built on prefix sums."""
+import numpy as np
+
+# (r_squared, slope, movement) thresholds used by validate_trend
+TREND_THRESHOLDS = {
+    True: (0.3, 0.008, 0.03),    # recent period
+    False: (0.4, 0.015, 0.05),   # older / long-term period
+}
+
+
+def window_starts(data_length, window_size, step=20, offset=0):
+    """Candidate window start indices, matching the identify_channels scan."""
+    return np.arange(offset, data_length - window_size, step, dtype=np.int64)
+
+
+class TrendEngine:
+    """
+    Precomputes prefix sums of the Close series so that the linear regression,
+    R-squared and movement significance of any window are O(1) to evaluate.
+    """
+
+    def __init__(self, closes):
+        y = np.ascontiguousarray(closes, dtype=np.float64)
+        self.closes = y
+        self.length = len(y)
+
+        # Shift prices before summing to keep the sums well conditioned
+        self._offset = float(y[0]) if len(y) else 0.0
+        yc = y - self._offset
+        i = np.arange(len(y), dtype=np.float64)
+
+        self._sum_y = np.concatenate(([0.0], np.cumsum(yc)))
+        self._sum_iy = np.concatenate(([0.0], np.cumsum(i * yc)))
+        self._sum_yy = np.concatenate(([0.0], np.cumsum(yc * yc)))
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data['Close'].values)
+
+    def window_stats(self, starts, ends):
+        """
+        Regression statistics for the windows [starts, ends).
+
+        Args:
+            starts: Array of window start indices
+            ends: Array of window end indices (exclusive)
+
+        Returns:
+            Dict of arrays with 'start', 'end', 'slope', 'intercept',
+            'r_squared' and 'movement_significance'
+        """
+        s = np.asarray(starts, dtype=np.int64)
+        e = np.asarray(ends, dtype=np.int64)
+        n = (e - s).astype(np.float64)
+
+        # Local x runs 0..n-1 inside every window
+        sx = n * (n - 1) / 2
+        sxx = (n - 1) * n * (2 * n - 1) / 6
+
+        sy = self._sum_y[e] - self._sum_y[s]
+        sxy = (self._sum_iy[e] - self._sum_iy[s]) - s * sy
+        syy = self._sum_yy[e] - self._sum_yy[s]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sxy_c = sxy - sx * sy / n
+            sxx_c = sxx - sx * sx / n
+            ss_tot = syy - sy * sy / n
+
+            slope = sxy_c / sxx_c
+            intercept = (sy - slope * sx) / n + self._offset
+            ss_res = np.maximum(ss_tot - slope * sxy_c, 0.0)
+            r_squared = 1 - ss_res / ss_tot
+
+            avg_price = sy / n + self._offset
+            last = self.closes[np.maximum(e - 1, 0)]
+            first = self.closes[np.minimum(s, max(self.length - 1, 0))]
+            movement_significance = np.abs(last - first) / avg_price
+
+        return {
+            'start': s,
+            'end': e,
+            'slope': slope,
+            'intercept': intercept,
+            'r_squared': r_squared,
+            'movement_significance': movement_significance,
+        }
+
+    def scan(self, window_size=40, step=20, offset=0):
+        """Statistics for every candidate window of a fixed size."""
+        starts = window_starts(self.length, window_size, step, offset)
+        return self.window_stats(starts, starts + window_size)
+
+    @staticmethod
+    def trend_mask(stats, is_recent, thresholds=None):
+        """
+        Apply the validate_trend thresholds to a batch of window statistics.
+
+        Args:
+            stats: Output of window_stats / scan
+            is_recent: Bool or boolean array selecting the recent thresholds
+            thresholds: Optional replacement for TREND_THRESHOLDS
+
+        Returns:
+            Boolean array, True where the window is a valid trend
+        """
+        thresholds = thresholds or TREND_THRESHOLDS
+        is_recent = np.broadcast_to(np.asarray(is_recent, dtype=bool), stats['slope'].shape)
+        recent = thresholds[True]
+        older = thresholds[False]
+
+        r2_threshold = np.where(is_recent, recent[0], older[0])
+        slope_threshold = np.where(is_recent, recent[1], older[1])
+        movement_threshold = np.where(is_recent, recent[2], older[2])
+
+        n = stats['end'] - stats['start']
+        with np.errstate(invalid='ignore'):
+            return (
+                (n >= 2) &
+                (stats['r_squared'] > r2_threshold) &
+                (np.abs(stats['slope']) > slope_threshold) &
+                (stats['movement_significance'] > movement_threshold)
+            )
+
+    @staticmethod
+    def validation_at(stats, idx, is_trend):
+        """Single-window result in the validate_trend dict format."""
+        return {
+            'isTrend': bool(is_trend),
+            'slope': float(stats['slope'][idx]),
+            'intercept': float(stats['intercept'][idx]),
+            'r_squared': float(stats['r_squared'][idx]),
+            'movement_significance': float(stats['movement_significance'][idx]),
+        }
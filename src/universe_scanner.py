@@ -0,0 +1,158 @@
+# universe_scanner.py
+"""Scan index constituent lists for channels using a process pool."""
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import pandas as pd
+import requests
+
+from config import Settings
+from market_analysis import MarketAnalysis
+from shared_ohlcv import COLUMNS, map_tickers
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_COLUMNS = ('Symbol', 'Ticker')
+
+
+def load_universe(url):
+    """
+    Load constituent tickers from a Wikipedia index page.
+
+    Args:
+        url: Page containing a constituents table with a Symbol/Ticker column
+
+    Returns:
+        List of yfinance-compatible tickers (empty on failure)
+    """
+    try:
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+        response.raise_for_status()
+        for table in pd.read_html(io.StringIO(response.text)):
+            for column in SYMBOL_COLUMNS:
+                if column in table.columns:
+                    # Yahoo uses '-' where the index lists use '.' (BRK.B -> BRK-B)
+                    return [str(t).strip().replace('.', '-') for t in table[column].dropna()]
+        logger.error(f"No constituents table found at {url}")
+    except Exception as e:
+        logger.error(f"Error loading universe from {url}: {e}")
+    return []
+
+
+def load_universes(universes=None):
+    """Merge several constituent lists into one de-duplicated ticker list."""
+    universes = universes or Settings.UNIVERSES
+    tickers = []
+    for name, url in universes.items():
+        members = load_universe(url)
+        logger.info(f"Loaded {len(members)} tickers for {name}")
+        tickers.extend(members)
+    return list(dict.fromkeys(tickers))
+
+
+def channel_strength(data, long_term_channel, intermediate_channels):
+    """Best quality score among the detected channels (0 if none)."""
+    scores = []
+    for channel in filter(None, [long_term_channel, *intermediate_channels]):
+        start_date, end_date = channel[2]
+        start_idx = data.index.get_loc(start_date)
+        end_idx = data.index.get_loc(end_date) + 1
+        scores.append(MarketAnalysis.calculate_channel_quality(data, start_idx, end_idx, channel))
+    return max(scores, default=0.0)
+
+
+def _detect_ticker(item):
+    """Worker: detect channels for one (ticker, data) item; the channels come back for rendering."""
+    ticker, data = item
+    if data.empty:
+        return None
+    try:
+        long_term_channel, intermediate_channels = MarketAnalysis().identify_channels(data, ticker=ticker)
+        return {
+            'ticker': ticker,
+            'last_price': float(data['Close'].iloc[-1]),
+            'long_term': long_term_channel is not None,
+            'channels': len(intermediate_channels),
+            'strength': channel_strength(data, long_term_channel, intermediate_channels),
+            'detected': (long_term_channel, intermediate_channels),
+        }
+    except Exception as e:
+        logger.error(f"Error detecting channels for {ticker}: {e}")
+        return None
+
+
+def _render_ticker(item, detected):
+    """Worker: render the chart of one (ticker, data) item with its already detected channels."""
+    ticker, data = item
+    try:
+        long_term_channel, intermediate_channels = detected[ticker]
+        return MarketAnalysis.plot_with_channels(data, ticker, long_term_channel, intermediate_channels,
+                                                 in_memory=True)
+    except Exception as e:
+        logger.error(f"Error rendering chart for {ticker}: {e}")
+        return None
+
+
+def rank_results(results, top_n=None):
+    """Sort scan results by channel strength, strongest first."""
+    ranked = sorted((r for r in results if r), key=lambda r: r['strength'], reverse=True)
+    return ranked[:top_n] if top_n else ranked
+
+
+def run_pool(func, tickers, workers):
+    """Run func(ticker) for every ticker in a process pool; returns {ticker: result or None}."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                logger.error(f"Worker failed for {ticker}: {e}")
+                results[ticker] = None
+    return results
+
+
+def scan_universe(tickers, workers=None, top_n=None):
+    """
+    Detect channels for every ticker and render charts for the strongest.
+    The bars are downloaded once in this process and shared with the
+    workers; the charts reuse the channels found by the detection pass.
+
+    Args:
+        tickers: Symbols to scan
+        workers: Process pool size (defaults to Settings.SCAN_WORKERS)
+        top_n: How many tickers to keep (defaults to Settings.SCAN_TOP_N)
+
+    Returns:
+        Ranked list of summary dicts for the top-N tickers, each with an
+        'image' (ChartImage) of its rendered chart
+    """
+    workers = workers or Settings.SCAN_WORKERS
+    top_n = top_n or Settings.SCAN_TOP_N
+
+    logger.info(f"Scanning {len(tickers)} tickers with {workers} workers...")
+    frames = MarketAnalysis().fetch_many(tickers)
+    logger.info(f"Bulk-fetched data for {len(frames)}/{len(tickers)} tickers")
+    if not frames:
+        return []
+    detected = map_tickers(_detect_ticker, frames, workers)
+    ranked = rank_results(detected, top_n)
+    logger.info(f"Channels found for {sum(1 for r in detected if r)} tickers, "
+                f"rendering top {len(ranked)}")
+
+    # Only the top-N frames are shared again, with Open for the candles
+    channels = {r['ticker']: r['detected'] for r in ranked}
+    charts = map_tickers(partial(_render_ticker, detected=channels),
+                         {ticker: frames[ticker] for ticker in channels}, workers,
+                         columns=('Open',) + COLUMNS)
+    summary = []
+    for result, image in zip(ranked, charts):
+        if image is None:
+            logger.error(f"Failed to create chart for {result['ticker']}")
+            continue
+        summary.append({**{k: v for k, v in result.items() if k != 'detected'}, 'image': image})
+    return summary
@@ -0,0 +1,111 @@
+"""
+Shared test helpers: synthetic OHLC data and local fakes for the Bot API and Claude.
+"""
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+import anthropic
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chart_image import ChartImage
+from config import Settings
+from telegram_bot import TelegramBot
+from telegram_queue import TelegramSendQueue
+
+
+def make_ohlc(length=250, seed=0, drift=0.0008):
+    rng = np.random.default_rng(seed)
+    # Alternate trending and flat regimes so both outcomes of validation occur
+    drifts = np.where((np.arange(length) // 60) % 2 == 0, drift, -drift / 2)
+    close = 4000 * np.exp(np.cumsum(drifts + rng.normal(0, 0.01, length)))
+    spread = np.abs(rng.normal(0, 0.006, length)) * close
+    index = pd.date_range('2024-01-01', periods=length, freq='B')
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, length),
+    }, index=index)
+
+
+def make_recent_history(seed):
+    """make_ohlc bars re-dated to end today, so they fall in the one-year fetch range."""
+    data = make_ohlc(length=250, seed=seed)
+    data.index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=len(data), name='Date')
+    return data
+
+
+class FakeBot:
+    """Records Bot API calls; `failures` are raised, in order, by the first calls."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = []
+
+    async def _call(self, method, chat_id, **kwargs):
+        await asyncio.sleep(0)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.calls.append((time.monotonic(), method, chat_id, kwargs))
+        return f"message {len(self.calls)}"
+
+    async def send_photo(self, chat_id, **kwargs):
+        return await self._call('send_photo', chat_id, **kwargs)
+
+    async def send_message(self, chat_id, **kwargs):
+        return await self._call('send_message', chat_id, **kwargs)
+
+    async def send_media_group(self, chat_id, **kwargs):
+        return await self._call('send_media_group', chat_id, **kwargs)
+
+
+@pytest.fixture
+def channels(monkeypatch):
+    monkeypatch.setattr(Settings, 'CHANNEL_ID_PRIVATE', '-100private')
+    monkeypatch.setattr(Settings, 'CHANNEL_ID_PUBLIC', '@public')
+
+
+def make_telegram(bot, file_ids=False, clock=None, **options):
+    options = {'global_rate': 1000, 'chat_rate': 1000, 'max_retries': 3, 'backoff': 0.001, **options}
+    if clock is not None:
+        options.update(clock=clock, sleep=clock.sleep)
+    return TelegramBot(bot=bot, queue=TelegramSendQueue(bot, **options), file_ids=file_ids)
+
+
+def image(n):
+    return ChartImage(bytes([n]) * 100, 'image/png', f'chart{n}.png')
+
+
+def status_error(status_code, headers=None):
+    response = SimpleNamespace(status_code=status_code, headers=headers or {}, request=None)
+    return anthropic.APIStatusError(f"status {status_code}", response=response, body=None)
+
+
+class FakeMessages:
+    def __init__(self, failures=(), delay=0.0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                raise self.failures.pop(0)
+            return SimpleNamespace(content=[SimpleNamespace(type='text', text='ok')])
+        finally:
+            self.in_flight -= 1
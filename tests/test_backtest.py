@@ -0,0 +1,100 @@
+"""
+Tests for the walk-forward backtester: no look-ahead, the vectorized
+position state machine against a loop, and trade/portfolio accounting.
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtest import (evaluate, equity_curve, max_drawdown, positions, run_backtest, signals, trades,
+                      walk_forward_lines)
+from conftest import make_ohlc
+
+
+def reference_positions(entry, exit_):
+    position = np.zeros(entry.shape, dtype=np.int8)
+    for row in range(entry.shape[0]):
+        held = 0
+        for bar in range(entry.shape[1]):
+            if exit_[row, bar]:
+                held = 0
+            elif entry[row, bar]:
+                held = 1
+            position[row, bar] = held
+    return position
+
+
+def test_walk_forward_lines_do_not_look_ahead():
+    data = make_ohlc(400, seed=5)
+    upper, lower = walk_forward_lines(data, lookback=120, step=20, max_age=60)
+    assert np.all(np.isnan(upper[:120]))
+    assert np.isfinite(upper[120:]).any()
+
+    # Changing prices from bar 250 on cannot change any line before bar 260 (next detection)
+    changed = data.copy()
+    changed.iloc[250:, :4] *= 1.5
+    changed_upper, changed_lower = walk_forward_lines(changed, lookback=120, step=20, max_age=60)
+    np.testing.assert_array_equal(changed_upper[:260], upper[:260])
+    np.testing.assert_array_equal(changed_lower[:260], lower[:260])
+
+
+def test_positions_match_loop():
+    rng = np.random.default_rng(0)
+    entry = rng.random((20, 300)) < 0.05
+    exit_ = rng.random((20, 300)) < 0.05
+    np.testing.assert_array_equal(positions(entry, exit_), reference_positions(entry, exit_))
+
+
+def test_trade_and_portfolio_accounting():
+    close = np.array([[100.0, 110.0, 121.0, 100.0, 90.0, 99.0],
+                      [50.0, 50.0, 50.0, 50.0, 50.0, 50.0]])
+    position = np.array([[1, 1, 0, 0, 1, 1],
+                         [0, 0, 0, 0, 0, 0]], dtype=np.int8)
+    round_trips = trades(position, close)
+    assert round_trips['ticker'].tolist() == [0, 0]
+    assert round_trips['entry'].tolist() == [0, 4]
+    assert round_trips['exit'].tolist() == [2, 5]   # the open trade is closed at the last bar
+    np.testing.assert_allclose(round_trips['return'], [0.21, 0.10])
+
+    equity = equity_curve(position, close)
+    # Half the capital sits in the idle ticker
+    np.testing.assert_allclose(equity, [1, 1.05, 1.1025, 1.1025, 1.1025, 1.1025 * 1.05])
+    assert max_drawdown(np.array([1.0, 1.2, 0.9, 1.3, 1.04])) == pytest.approx(0.25)
+
+    metrics = evaluate(position, close, cost=0.001)
+    assert metrics['trades'] == 2 and metrics['hit_rate'] == 1.0
+    assert metrics['avg_trade_return'] < np.mean([0.21, 0.10])
+
+
+def test_signal_rules():
+    high = np.array([[105.0, 101.0, 111.0, 115.0]])
+    low = np.array([[99.0, 89.0, 100.0, 108.0]])
+    close = np.array([[100.0, 95.0, 110.0, 112.0]])
+    upper = np.array([[110.0, 110.0, 110.0, np.nan]])
+    lower = np.array([[90.0, 90.0, 90.0, np.nan]])
+    entry, exit_ = signals('touch', high, low, close, upper, lower, stop_margin=0.1)
+    assert entry.tolist() == [[False, True, False, False]]
+    assert exit_.tolist() == [[False, False, True, True]]
+    entry, exit_ = signals('breakout', high, low, close, upper, lower)
+    assert entry.tolist() == [[False, False, False, False]]
+    with pytest.raises(ValueError):
+        signals('momentum', high, low, close, upper, lower)
+
+
+def test_run_backtest_in_process():
+    frames = {f'SYN{i}': make_ohlc(500, seed=i) for i in range(3)}
+    frames['SHORT'] = make_ohlc(100, seed=9)   # too short for any detection
+    result = run_backtest(frames, lookback=150, step=25, workers=1, cost_bps=5)
+    assert set(result['summary']) == {'touch', 'breakout'}
+    for metrics in result['summary'].values():
+        assert 0 <= metrics['hit_rate'] <= 1
+        assert 0 <= metrics['max_drawdown'] < 1
+        assert 0 <= metrics['exposure'] <= 1
+    trades_table = result['trades']
+    assert len(trades_table) == sum(m['trades'] for m in result['summary'].values()) > 0
+    assert (trades_table['exit'] >= trades_table['entry']).all()
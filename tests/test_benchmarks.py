@@ -0,0 +1,38 @@
+"""
+Smoke tests for the benchmark suite and its synthetic data.
+"""
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+# Add src and benchmarks directories to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from bench_hot_path import run_suite
+from synthetic import LENGTHS, synthetic_ohlcv, synthetic_universe
+
+
+@pytest.mark.parametrize('regime', ['random_walk', 'trending'])
+def test_synthetic_series_are_valid_and_reproducible(regime):
+    data = synthetic_ohlcv(LENGTHS['1y'], regime, seed=7)
+    assert len(data) == 252 and data.index.tz is not None
+    assert (data['High'] >= data[['Open', 'Close']].max(axis=1)).all()
+    assert (data['Low'] <= data[['Open', 'Close']].min(axis=1)).all()
+    assert np.array_equal(data.values, synthetic_ohlcv(252, regime, seed=7).values)
+    tickers = [ticker for ticker, _ in synthetic_universe(3, 100, regime)]
+    assert len(set(tickers)) == 3
+
+
+def test_run_suite_report():
+    report = run_suite(['validate_trend', 'identify_channels'], ['trending'], ['1y'], [1, 3],
+                       window_limit=2)
+    json.dumps(report)
+    rows = {(row['function'], row['tickers']): row for row in report['results']}
+    assert len(rows) == 4
+    assert rows[('validate_trend', 3)]['tickers_timed'] == 2
+    assert rows[('identify_channels', 3)]['operations'] == 3
+    assert all(row['ops_per_second'] > 0 and row['peak_memory_bytes'] > 0 for row in rows.values())
@@ -0,0 +1,200 @@
+"""
+Tests for the vectorized breakout alert engine: line projection,
+de-duplication, cooldowns and delivery through a fake Bot.
+"""
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from breakout_alerts import (BreakoutAlertEngine, MAX_MESSAGE_LENGTH, active_channel, build_engine,
+                             format_alerts, project_channel, send_alerts, session_offsets)
+from config import Settings
+from market_analysis import MarketAnalysis
+from ohlcv_cache import OHLCVCache
+from conftest import FakeBot, make_ohlc, make_recent_history, make_telegram
+
+pytestmark = pytest.mark.usefixtures('channels')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_engine(**options):
+    # Flat channels 90-110 for A and B, rising 100 + bar for C
+    bars = np.arange(5)
+    upper = np.array([np.full(5, 110.0), np.full(5, 110.0), 110 + bars])
+    lower = np.array([np.full(5, 90.0), np.full(5, 90.0), 90 + bars])
+    clock = FakeClock()
+    options = {'margin': 0.1, 'cooldown': 3600, 'clock': clock, **options}
+    return BreakoutAlertEngine(['A', 'B', 'C'], upper, lower, **options), clock
+
+
+def test_projection_continues_the_channel_lines():
+    data = make_ohlc(300, seed=4)
+    market = MarketAnalysis()
+    long_term, intermediate = market.identify_channels(data, window_sizes=[])
+    channel = active_channel(data, long_term, intermediate, max_age=len(data))
+    assert channel is not None
+    (slope, upper_intercept), (_, lower_intercept), (start, _) = channel
+    start_idx = data.index.get_loc(start)
+    upper, lower = project_channel(data, channel, 3)
+    for k in range(3):
+        x = len(data) - 1 - start_idx + k
+        assert np.isclose(upper[k], slope * x + upper_intercept)
+        assert np.isclose(lower[k], slope * x + lower_intercept)
+
+    # Without a recent intermediate channel the long-term channel is used
+    assert active_channel(data, long_term, intermediate, max_age=-1) is long_term
+
+    engine = BreakoutAlertEngine.from_channels({'SYN': (data, long_term, intermediate), 'NONE': (data, None, [])},
+                                               horizon=3, max_age=len(data))
+    assert engine.tickers == ['SYN'] and engine.upper.shape == (1, 3)
+    assert engine.last_dates[0] == np.datetime64(data.index[-1].date())
+    assert np.allclose(engine.upper[0], upper)
+
+
+def test_breakouts_need_the_margin_and_fire_once():
+    engine, clock = make_engine()
+    # 111 is above A's line but inside the 2-point margin; C's line is higher at bar 2
+    assert engine.check(np.array([111.0, 100.0, 111.5]), bar=2) == []
+
+    alerts = engine.check(np.array([115.0, 80.0, 120.0]), bar=2)
+    assert [(a['ticker'], a['direction']) for a in alerts] == [('B', 'down'), ('C', 'up'), ('A', 'up')]
+    assert alerts[1]['line'] == 112.0
+
+    # Still outside: no repeat, even after the cooldown
+    clock.now += 7200
+    assert engine.check(np.array([116.0, 79.0, 121.0]), bar=2) == []
+
+
+def test_rearm_after_reentry_respects_cooldown():
+    engine, clock = make_engine()
+    assert len(engine.check({'A': 115.0}, bar=0)) == 1
+    engine.check({'A': 100.0}, bar=0)
+    clock.now += 600
+    # Re-armed, but inside the cooldown
+    assert engine.check({'A': 115.0}, bar=0) == []
+    engine.check({'A': 100.0}, bar=0)
+    clock.now += 3600
+    assert [a['ticker'] for a in engine.check({'A': 115.0, 'X': 1.0}, bar=0)] == ['A']
+    # Past the projected bars nothing is checked
+    assert engine.check({'A': 200.0}, bar=5) == []
+
+
+def test_carry_state_keeps_cooldowns():
+    engine, clock = make_engine()
+    engine.check({'A': 115.0}, bar=0)
+    rebuilt, _ = make_engine(clock=clock)
+    rebuilt.carry_state(engine)
+    assert rebuilt.check({'A': 115.0}, bar=0) == []
+
+
+def test_thousands_of_tickers_per_tick():
+    tickers = 5000
+    rng = np.random.default_rng(0)
+    center = rng.uniform(10, 500, (tickers, 1)) + np.arange(20) * 0.1
+    engine = BreakoutAlertEngine([f'T{i}' for i in range(tickers)], center * 1.05, center * 0.95,
+                                 margin=0.0, cooldown=0)
+    closes = center[:, 3] * rng.uniform(0.9, 1.1, tickers)
+    started = time.perf_counter()
+    alerts = engine.check(closes, bar=3)
+    elapsed = time.perf_counter() - started
+    expected = np.sum((closes > center[:, 3] * 1.05) | (closes < center[:, 3] * 0.95))
+    assert len(alerts) == expected > 0
+    assert elapsed < 0.5
+
+
+def test_alerts_are_sent_in_few_messages():
+    alerts = [{'ticker': f'T{i}', 'direction': 'up' if i % 2 else 'down', 'close': 101.0, 'line': 100.0}
+              for i in range(200)]
+    messages = format_alerts(alerts)
+    assert len(messages) > 1
+    assert all(len(message) <= MAX_MESSAGE_LENGTH for message in messages)
+    assert sum(message.count('\n') + 1 for message in messages) == 200
+
+    async def run():
+        bot = FakeBot()
+        telegram = make_telegram(bot)
+        send_alerts(telegram, alerts)
+        await telegram.flush()
+        return bot
+
+    bot = asyncio.run(run())
+    assert [call[3]['text'] for call in bot.calls] == messages
+    assert {call[2] for call in bot.calls} == {'-100private'}
+
+
+def test_session_offsets_skip_holidays_and_follow_each_ticker():
+    # Thanksgiving 2026-11-26 has no bars; C's data stops a session early
+    sessions = np.array(['2026-11-23', '2026-11-24', '2026-11-25', '2026-11-27'], dtype='datetime64[D]')
+    last_dates = np.array(['2026-11-25', '2026-11-27', '2026-11-24', '2026-11-27'], dtype='datetime64[D]')
+    quotes = np.array(['2026-11-27', '2026-11-27', '2026-11-27', 'NaT'], dtype='datetime64[D]')
+    assert list(session_offsets(last_dates, quotes, sessions)) == [1, 0, 2, 0]
+    # The Monday quote is the next session after Friday's bar
+    monday = np.array(['2026-11-30'] * 4, dtype='datetime64[D]')
+    assert list(session_offsets(last_dates, monday, sessions)) == [2, 1, 3, 1]
+
+
+def test_per_ticker_bars_read_each_tickers_own_line():
+    engine, _ = make_engine()
+    # C's upper line is 110 + bar and the margin is 2: 114 breaks out at C's bar 1 only
+    alerts = engine.check(np.array([100.0, 100.0, 114.0]), bar=np.array([0, 0, 1]))
+    assert [(a['ticker'], a['line']) for a in alerts] == [('C', 111.0)]
+    # Past its projection a ticker is skipped while the others are still checked
+    alerts = engine.check(np.array([80.0, 100.0, 200.0]), bar=np.array([0, 0, 5]))
+    assert [a['ticker'] for a in alerts] == ['A']
+
+
+def test_watcher_uses_each_tickers_last_bar(monkeypatch):
+    import breakout_alerts
+
+    engine, _ = make_engine(cooldown=0)
+    # C's daily data lags a session behind A and B
+    engine.last_dates = np.array(['2026-11-24', '2026-11-24', '2026-11-23'], dtype='datetime64[D]')
+    sessions = np.array(['2026-11-23', '2026-11-24'], dtype='datetime64[D]')
+    monkeypatch.setattr(breakout_alerts, 'build_engine', lambda tickers: (engine, sessions))
+    today = np.datetime64('2026-11-25').item()
+    # C's line is 110 + bar with a 2-point margin: 113.5 breaks out at bar 1 but not at C's bar 2
+    source = SimpleNamespace(latest_quotes=lambda tickers: {'A': (80.0, today), 'C': (113.5, today)})
+
+    async def run():
+        telegram = make_telegram(FakeBot())
+        watcher = breakout_alerts.BreakoutWatcher(lambda: ['A', 'B', 'C'], telegram, source)
+        return await watcher.tick()
+
+    assert [(a['ticker'], a['direction']) for a in asyncio.run(run())] == [('A', 'down')]
+
+
+def test_build_engine_fetches_once_and_detects_in_pool(tmp_path, monkeypatch):
+    frames = {ticker: make_recent_history(seed) for ticker, seed in (('AAA', 2), ('BBB', 4))}
+    cache = OHLCVCache(cache_dir=str(tmp_path / 'ohlcv'))
+    for ticker, data in frames.items():
+        cache.save(ticker, data)
+    monkeypatch.setattr(Settings, 'DATA_CACHE_ENABLED', True)
+    monkeypatch.setattr(Settings, 'OFFLINE_MODE', True)
+    monkeypatch.setattr(Settings, 'DATA_CACHE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(Settings, 'INCREMENTAL_CHANNELS', False)
+    monkeypatch.setattr(Settings, 'ALERT_MAX_CHANNEL_AGE', 250)
+    monkeypatch.setattr(MarketAnalysis, 'fetch_data', lambda *args: pytest.fail("per-ticker fetch"))
+
+    engine, sessions = build_engine(['AAA', 'MISSING', 'BBB'], workers=2)
+
+    expected = BreakoutAlertEngine.from_channels(
+        {ticker: (data, *MarketAnalysis().identify_channels(data)) for ticker, data in frames.items()})
+    assert engine.tickers == expected.tickers == ['AAA', 'BBB']
+    assert np.allclose(engine.upper, expected.upper) and np.allclose(engine.lower, expected.lower)
+    assert list(engine.last_dates) == list(expected.last_dates)
+    assert sessions[-1] == engine.last_dates.max()
@@ -0,0 +1,42 @@
+"""
+Tests for batched channel construction and quality scoring against the per-window functions.
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from channel_scoring import as_buffers, batch_channels, batch_quality
+from market_analysis import MarketAnalysis
+from trend_engine import TrendEngine
+from conftest import make_ohlc
+
+
+@pytest.mark.parametrize('is_long_term', [False, True])
+def test_matches_per_window_functions(is_long_term):
+    data = make_ohlc(length=400, seed=3)
+    stats = TrendEngine.from_data(data).scan(window_size=40, step=7)
+    buffers = as_buffers(data)
+
+    upper, lower = batch_channels(*buffers, stats['start'], 40, stats['slope'],
+                                  stats['intercept'], is_long_term=is_long_term)
+    quality = batch_quality(*buffers, stats['start'], 40, stats['slope'], upper, lower)
+
+    for k, start in enumerate(stats['start']):
+        validation = TrendEngine.validation_at(stats, k, True)
+        channel = MarketAnalysis.calculate_channel(data, start, start + 40, is_long_term,
+                                                   validation=validation)
+        assert np.isclose(channel[0][1], upper[k]) and np.isclose(channel[1][1], lower[k])
+        score = MarketAnalysis.calculate_channel_quality(data, start, start + 40, channel)
+        assert np.isclose(score, quality['score'][k])
+
+
+def test_empty_batch():
+    buffers = as_buffers(make_ohlc(length=50))
+    upper, lower = batch_channels(*buffers, [], 40, [], [])
+    assert len(upper) == len(lower) == 0
+    assert len(batch_quality(*buffers, [], 40, [], upper, lower)['score']) == 0
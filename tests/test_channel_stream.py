@@ -0,0 +1,105 @@
+"""
+Tests for the streaming channel tracker against the batch validate_trend /
+calculate_channel, including replay from a file.
+"""
+import sys
+import os
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from market_analysis import MarketAnalysis
+from channel_stream import StreamingChannel, poll_bars, replay_bars, resample
+from data_sources import LocalFileSource
+from conftest import make_ohlc
+
+
+def batch_state(data, end, window_size, is_long_term=False):
+    start = end - window_size
+    validation = MarketAnalysis.validate_trend(data, start, end, is_recent=not is_long_term)
+    channel = MarketAnalysis.calculate_channel(data, start, end, is_long_term,
+                                               validation={**validation, 'isTrend': True})
+    return validation, channel
+
+
+@pytest.mark.parametrize('is_long_term', [False, True])
+def test_stream_matches_batch(is_long_term):
+    data = make_ohlc(600, seed=3)
+    window_size = 40
+    # A short refresh interval exercises the rebuilt sums as well
+    tracker = StreamingChannel(window_size, is_long_term=is_long_term, refresh_every=97)
+    trends = 0
+    for end, bar in enumerate(data.itertuples(), start=1):
+        state = tracker.update(bar.High, bar.Low, bar.Close, bar.Index)
+        if end < window_size:
+            assert state is None
+            continue
+        validation, channel = batch_state(data, end, window_size, is_long_term)
+        for key in ('slope', 'intercept', 'r_squared', 'movement_significance'):
+            assert np.isclose(state[key], validation[key], rtol=1e-6, atol=1e-6), (end, key)
+        assert state['isTrend'] == validation['isTrend']
+        (_, upper), (_, lower), (start, stop) = channel
+        assert np.isclose(state['intercept'] + state['width'] / 2, upper, rtol=1e-6)
+        assert np.isclose(state['intercept'] - state['width'] / 2, lower, rtol=1e-6)
+        assert (state['start'], state['end']) == (start, stop)
+        trends += state['isTrend']
+        assert (tracker.channel() is not None) == state['isTrend']
+    assert 0 < trends < len(data) - window_size + 1
+
+
+def test_long_stream_stays_accurate():
+    rng = np.random.default_rng(1)
+    closes = 20000 + np.cumsum(rng.normal(0, 5, 50_000))
+    tracker = StreamingChannel(60)
+    for close in closes:
+        state = tracker.update(close + 3, close - 3, close)
+    x = np.arange(60)
+    slope, intercept = np.polyfit(x, closes[-60:], 1)
+    assert np.isclose(state['slope'], slope, atol=1e-8)
+    assert np.isclose(state['intercept'], intercept, rtol=1e-9)
+
+
+def test_replay_resamples_intraday_file(tmp_path):
+    rng = np.random.default_rng(2)
+    index = pd.date_range('2026-10-12 13:30', periods=390 * 2, freq='1min')
+    close = 5800 + np.cumsum(rng.normal(0, 1, len(index)))
+    data = pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5,
+                         'Close': close, 'Volume': 100}, index=index)
+    path = str(tmp_path / 'GSPC_1m.csv')
+    data.to_csv(path)
+
+    bars = list(replay_bars(path, '5m'))
+    expected = resample(data, '5m')
+    assert len(bars) == len(expected) == 156
+    assert bars[1].high == expected['High'].iloc[1] == data['High'].iloc[5:10].max()
+    assert bars[1].close == data['Close'].iloc[9]
+
+    tracker = StreamingChannel(12)
+    for bar in bars:
+        tracker.update_bar(bar)
+    assert tracker.state()['end'] == expected.index[-1]
+
+
+def test_poll_bars_from_local_source(tmp_path):
+    index = pd.date_range('2026-10-12 13:30', periods=300, freq='5min')
+    close = 5800 + np.arange(len(index)) * 0.5
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': 100}, index=index)
+    data.to_csv(tmp_path / '_GSPC.csv')
+
+    async def first_bars(count):
+        bars = []
+        async for bar in poll_bars('^GSPC', '5m', poll_seconds=0.01, source=LocalFileSource(str(tmp_path))):
+            bars.append(bar)
+            if len(bars) == count:
+                return bars
+
+    bars = asyncio.run(first_bars(len(data)))
+    # The whole period ('30d' for 5m bars) is served in order on the first poll
+    assert [bar.time for bar in bars] == list(index)
+    assert bars[-1].close == close[-1]
@@ -0,0 +1,68 @@
+"""
+Tests for chart render profiles and in-memory rendering.
+"""
+import sys
+import os
+import io
+import base64
+
+from PIL import Image
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chart_image import ChartImage
+from config import Settings
+from market_analysis import MarketAnalysis
+from conftest import make_ohlc
+
+
+def test_render_profiles_return_images_without_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = make_ohlc(seed=3)
+    long_term, channels = MarketAnalysis.identify_channels(MarketAnalysis(), data)
+
+    sizes = {}
+    for profile in ('vision', 'publish'):
+        image = MarketAnalysis.plot_with_channels(data, 'TEST', long_term, channels,
+                                                  profile=profile, in_memory=True)
+        assert image.media_type == 'image/' + Settings.RENDER_PROFILES[profile]['format']
+        assert base64.b64decode(image.base64) == image.data
+        with Image.open(io.BytesIO(image.data)) as img:
+            sizes[profile] = img.size
+
+    assert max(sizes['vision']) <= 1568
+    assert sizes['publish'][0] > sizes['vision'][0]
+    assert not os.listdir(tmp_path)
+
+
+def test_render_to_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = make_ohlc(seed=3)
+    assert MarketAnalysis.plot_with_channels(data, '^TEST', None, [], profile='vision') is True
+    assert os.listdir(tmp_path) == [MarketAnalysis.chart_filename('^TEST')]
+
+
+def test_vision_image_is_downscaled_publish_render():
+    data = make_ohlc(seed=3)
+    published = MarketAnalysis.plot_with_channels(data, 'TEST', None, [], profile='publish', in_memory=True)
+    vision = MarketAnalysis.vision_image(published)
+
+    profile = Settings.RENDER_PROFILES['vision']
+    with Image.open(io.BytesIO(published.data)) as full, Image.open(io.BytesIO(vision.data)) as small:
+        assert small.width <= profile['figsize'][0] * profile['dpi']
+        assert small.height <= profile['figsize'][1] * profile['dpi']
+        assert small.width < full.width
+        assert abs(small.width / small.height - full.width / full.height) < 0.01
+    assert vision.media_type == published.media_type
+    # Already small enough: no re-encode
+    assert MarketAnalysis.vision_image(vision) is vision
+
+
+def test_chart_image_from_file_converts_unsupported_formats(tmp_path):
+    path = tmp_path / 'chart.bmp'
+    Image.new('RGB', (10, 10), 'white').save(path)
+    image = ChartImage.from_file(str(path))
+    assert image.media_type == 'image/png'
+    with Image.open(io.BytesIO(image.data)) as img:
+        assert img.format == 'PNG'
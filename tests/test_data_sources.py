@@ -0,0 +1,86 @@
+"""
+Tests for pluggable data sources and bulk fetching. No network access is needed.
+"""
+import sys
+import os
+from datetime import timedelta
+
+import pandas as pd
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_sources import DataSource, LocalFileSource, YFinanceSource, split_download
+from ohlcv_cache import OHLCVCache
+from conftest import make_ohlc
+
+
+def test_local_file_source_reads_csv(tmp_path):
+    data = make_ohlc(length=100)
+    data.to_csv(tmp_path / '_GSPC.csv')
+    source = LocalFileSource(str(tmp_path))
+    loaded = source.fetch('^GSPC', data.index[10], data.index[20])
+    assert len(loaded) == 10
+    assert list(loaded.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert source.fetch('MISSING', data.index[0], data.index[-1]) is None
+
+
+def test_local_file_source_latest_quotes(tmp_path):
+    data = make_ohlc(length=100)
+    data.to_csv(tmp_path / '_GSPC.csv')
+    quotes = LocalFileSource(str(tmp_path)).latest_quotes(['^GSPC', 'MISSING'])
+    assert quotes == {'^GSPC': (data['Close'].iloc[-1], data.index[-1].date())}
+
+
+def test_split_download_multiindex():
+    a, b = make_ohlc(length=50, seed=1), make_ohlc(length=50, seed=2)
+    b.iloc[:5, b.columns.get_loc('Close')] = float('nan')
+    raw = pd.concat({'AAA': a, 'BBB': b}, axis=1)
+    frames = split_download(raw, ['AAA', 'BBB', 'CCC'])
+    assert set(frames) == {'AAA', 'BBB'}
+    assert len(frames['AAA']) == 50 and len(frames['BBB']) == 45
+
+
+def test_bulk_retry_only_requests_missing(monkeypatch):
+    source = YFinanceSource(chunk_size=2, max_workers=2, retries=2, backoff=0)
+    data = make_ohlc(length=20)
+    calls = []
+    flaky = {'BBB'}
+
+    def fake_chunk(tickers, start, end):
+        calls.append(list(tickers))
+        frames = {t: data for t in tickers if t not in flaky}
+        flaky.clear()
+        return frames
+
+    monkeypatch.setattr(source, '_download_chunk', fake_chunk)
+    frames = source.fetch_many(['AAA', 'BBB', 'CCC'], data.index[0], data.index[-1])
+    assert set(frames) == {'AAA', 'BBB', 'CCC'}
+    assert ['BBB'] in calls
+    assert sum(len(c) for c in calls) == 4
+
+
+class CountingSource(DataSource):
+    def __init__(self, frames):
+        self.frames = frames
+        self.bulk_calls = []
+
+    def fetch_many(self, tickers, start_date, end_date):
+        self.bulk_calls.append(list(tickers))
+        return {t: self.frames[t] for t in tickers if t in self.frames}
+
+
+def test_cache_get_many_groups_downloads(tmp_path):
+    frames = {t: make_ohlc(length=120, seed=i) for i, t in enumerate(['AAA', 'BBB', 'CCC'])}
+    source = CountingSource(frames)
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=12, offline=False)
+    start = frames['AAA'].index[0].to_pydatetime()
+    end = frames['AAA'].index[-1].to_pydatetime() + timedelta(days=1)
+
+    result = cache.get_many(list(frames), start, end, source.fetch_many)
+    assert set(result) == set(frames)
+    assert source.bulk_calls == [['AAA', 'BBB', 'CCC']]
+
+    # Everything is fresh now, so a second call never downloads
+    cache.get_many(list(frames), start, end, source.fetch_many)
+    assert len(source.bulk_calls) == 1
@@ -0,0 +1,103 @@
+"""
+Tests for incremental channel detection against a full recompute.
+"""
+import sys
+import os
+
+import numpy as np
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from channel_store import ChannelStore
+import market_analysis
+from market_analysis import MarketAnalysis
+from conftest import make_ohlc
+
+
+def assert_same_channels(got, want):
+    assert (got[0] is None) == (want[0] is None)
+    assert [c[2] for c in got[1]] == [c[2] for c in want[1]]
+    for a, b in zip(got[1], want[1]):
+        assert np.allclose(a[0], b[0]) and np.allclose(a[1], b[1])
+
+
+def test_first_run_matches_full_scan(tmp_path):
+    market = MarketAnalysis(channel_store=ChannelStore(str(tmp_path)))
+    data = make_ohlc(seed=4)
+    assert_same_channels(market.identify_channels(data, ticker='SPY'),
+                         market.identify_channels(data))
+
+
+def test_next_week_reuses_windows_and_matches_anchored_scan(tmp_path, monkeypatch):
+    market = MarketAnalysis(channel_store=ChannelStore(str(tmp_path)))
+    history = make_ohlc(length=320, seed=4)
+    market.identify_channels(history.iloc[0:250], ticker='SPY')
+
+    # Later run: five bars dropped off the horizon, twenty new bars, last stored bar revised
+    next_week = history.iloc[5:270].copy()
+    next_week.iloc[244, next_week.columns.get_loc('Close')] *= 1.01
+
+    calls = []
+    original = market_analysis.batch_quality
+    monkeypatch.setattr(market_analysis, 'batch_quality',
+                        lambda *args: calls.extend(args[3]) or original(*args))
+    incremental = market.identify_channels(next_week, ticker='SPY')
+    recomputed = len(calls)
+
+    # Grid keeps last week's phase: old starts 0, 20, ... are now at 15, 35, ...
+    full = market.identify_channels(next_week, offset=15)
+    assert_same_channels(incremental, full)
+    assert 0 < recomputed < len(calls) - recomputed
+
+    state = market.channel_store.load('SPY', 40, 20)
+    assert state['last_bar'] == next_week.index[-1].isoformat()
+    assert state['windows'][0]['start'] == next_week.index[15].isoformat()
+
+
+def test_changed_parameters_recompute(tmp_path):
+    store = ChannelStore(str(tmp_path))
+    market = MarketAnalysis(channel_store=store)
+    data = make_ohlc(seed=2)
+    market.identify_channels(data, ticker='SPY')
+    assert store.load('SPY', 40, 20) is not None
+    assert store.load('SPY', 40, 10) is None
+    assert_same_channels(market.identify_channels(data, step=10, ticker='SPY'),
+                         market.identify_channels(data, step=10))
+
+
+def test_explicit_offset_off_the_stored_grid_recomputes(tmp_path, caplog):
+    market = MarketAnalysis(channel_store=ChannelStore(str(tmp_path)))
+    data = make_ohlc(length=250, seed=4)
+    market.identify_channels(data, offset=0, ticker='SPY')
+
+    with caplog.at_level('INFO', logger='market_analysis'):
+        same_phase = market.identify_channels(data, offset=20, ticker='SPY')
+        shifted = market.identify_channels(data, offset=5, ticker='SPY')
+    assert_same_channels(same_phase, market.identify_channels(data, offset=20))
+    assert_same_channels(shifted, market.identify_channels(data, offset=5))
+    scans = [r.message for r in caplog.records if 'windows): reused' in r.message]
+    assert 'reused 0,' not in scans[0] and 'reused 0,' in scans[1]
+
+
+def test_adjusted_prices_invalidate_stored_windows(tmp_path, caplog):
+    market = MarketAnalysis(channel_store=ChannelStore(str(tmp_path)))
+    data = make_ohlc(length=250, seed=4)
+    market.identify_channels(data, ticker='SPY')
+
+    # A 2:1 split rescales the whole history, so no stored window may be reused
+    adjusted = data.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    with caplog.at_level('INFO', logger='market_analysis'):
+        incremental = market.identify_channels(adjusted, ticker='SPY')
+    assert_same_channels(incremental, market.identify_channels(adjusted))
+    scans = [r.message for r in caplog.records if 'windows): reused' in r.message]
+    assert scans and all('reused 0,' in message for message in scans)
+
+
+def test_false_disables_cache_and_store(monkeypatch):
+    monkeypatch.setattr(market_analysis.Settings, 'DATA_CACHE_ENABLED', True)
+    monkeypatch.setattr(market_analysis.Settings, 'INCREMENTAL_CHANNELS', True)
+    assert MarketAnalysis().channel_store is not None
+    market = MarketAnalysis(cache=False, channel_store=False)
+    assert market.cache is None and market.channel_store is None
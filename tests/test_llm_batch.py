@@ -0,0 +1,76 @@
+"""
+Tests for batch chart analysis with the local stub client.
+"""
+import sys
+import os
+import asyncio
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chart_analyzer import ChartAnalyzer
+from chart_image import ChartImage
+from llm_cache import ResponseCache
+from llm_client import LLMClient, StubAsyncAnthropic
+
+
+def make_charts():
+    return {
+        'S&P 500': (ChartImage(b'spx', 'image/png'), 'Last Price: 1'),
+        '^NDX': (ChartImage(b'ndx', 'image/png'), 'Last Price: 2'),
+    }
+
+
+def test_batch_maps_results_back_to_tickers(tmp_path):
+    stub = StubAsyncAnthropic(responder=lambda request: request['messages'][0]['content'][1]['text'],
+                              polls_until_done=3)
+    cache = ResponseCache(path=str(tmp_path / 'responses.sqlite3'))
+    analyzer = ChartAnalyzer(llm=LLMClient(client=stub, cache=cache))
+
+    results = asyncio.run(analyzer.llm.create_message_batch(
+        {name: analyzer._build_request(image, 'persona', prompt) for name, (image, prompt) in make_charts().items()},
+        call_type='chart_analysis', poll_interval=0.001
+    ))
+    assert results['S&P 500'].content[0].text == 'Last Price: 1'
+    assert results['^NDX'].content[0].text == 'Last Price: 2'
+    assert len(stub.batches.submitted) == 1
+
+    # Second run is answered from the response cache without a new batch
+    texts = asyncio.run(analyzer.analyze_charts_batch(make_charts(), 'persona'))
+    assert texts == {'S&P 500': 'Last Price: 1', '^NDX': 'Last Price: 2'}
+    assert len(stub.batches.submitted) == 1
+
+
+def test_missed_deadline_falls_back_to_direct_calls(monkeypatch):
+    stub = StubAsyncAnthropic(polls_until_done=10 ** 6)
+    client = LLMClient(client=stub, cache=False)
+    analyzer = ChartAnalyzer(llm=client)
+
+    original = client.create_message_batch
+
+    async def short_deadline(requests, **kwargs):
+        return await original(requests, deadline=0.01, poll_interval=0.005, **kwargs)
+
+    monkeypatch.setattr(client, 'create_message_batch', short_deadline)
+    texts = asyncio.run(analyzer.analyze_charts_batch(make_charts(), 'persona'))
+    assert all(text.startswith('Stub response') for text in texts.values())
+    assert len(stub.requests) == 2
+
+
+def test_every_chart_without_a_batch_result_is_handled(tmp_path, monkeypatch, caplog):
+    stub = StubAsyncAnthropic()
+    client = LLMClient(client=stub, cache=False)
+    analyzer = ChartAnalyzer(llm=client)
+
+    async def partial_batch(requests, **kwargs):
+        # The batch answers nothing, not even with an errored entry
+        return {}
+
+    monkeypatch.setattr(client, 'create_message_batch', partial_batch)
+    charts = {**make_charts(), 'MISSING': (str(tmp_path / 'missing.png'), 'Last Price: 3')}
+    with caplog.at_level('WARNING', logger='chart_analyzer'):
+        texts = asyncio.run(analyzer.analyze_charts_batch(charts, 'persona'))
+    assert texts['S&P 500'].startswith('Stub response') and texts['^NDX'].startswith('Stub response')
+    assert texts['MISSING'] is None
+    assert len(stub.requests) == 2
+    assert any('No analysis for MISSING' in r.message for r in caplog.records)
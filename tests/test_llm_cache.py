@@ -0,0 +1,73 @@
+"""
+Tests for the persistent Claude response cache, filled by the local stub client.
+"""
+import sys
+import os
+import asyncio
+import time
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chart_analyzer import ChartAnalyzer
+from chart_image import ChartImage
+from llm_cache import ResponseCache
+from llm_client import LLMClient, StubAsyncAnthropic
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(path=str(tmp_path / 'responses.sqlite3'), **kwargs)
+
+
+def test_key_covers_prompts_and_image():
+    base = {'model': 'm', 'system': 's', 'messages': [{'role': 'user', 'content': 'p'}]}
+    assert ResponseCache.key(base) == ResponseCache.key(dict(reversed(list(base.items()))))
+    assert ResponseCache.key(base) != ResponseCache.key({**base, 'system': 's2'})
+    assert ResponseCache.key(base) != ResponseCache.key({**base, 'model': 'm2'})
+
+
+def test_stub_fills_cache_and_second_run_hits(tmp_path):
+    stub = StubAsyncAnthropic()
+    cache = make_cache(tmp_path)
+    analyzer = ChartAnalyzer(llm=LLMClient(client=stub, cache=cache))
+    image = ChartImage(b'\x89PNG fake bytes', 'image/png')
+
+    first = asyncio.run(analyzer.analyze_chart(image, 'persona', 'prompt'))
+    second = asyncio.run(analyzer.analyze_chart(image, 'persona', 'prompt'))
+    other = asyncio.run(analyzer.analyze_chart(ChartImage(b'other', 'image/png'), 'persona', 'prompt'))
+
+    assert first == second and first.startswith('Stub response')
+    assert other != first
+    assert len(stub.requests) == 2
+
+
+def test_bypass_skips_cache(tmp_path):
+    stub = StubAsyncAnthropic()
+    client = LLMClient(client=stub, cache=make_cache(tmp_path))
+    for _ in range(2):
+        asyncio.run(client.create_message(use_cache=False, model='m', messages=[]))
+    assert len(stub.requests) == 2
+
+
+def test_ttl_per_call_type(tmp_path):
+    cache = make_cache(tmp_path, ttls={'short': 0.01, 'default': None})
+    cache.put('a', 'value', 'short')
+    cache.put('b', 'value', 'long')
+    time.sleep(0.02)
+    assert cache.get('a', 'short') is None
+    assert cache.get('b', 'long') == 'value'
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=25, ttls={'default': None})
+    cache.put('a', 'x' * 10)
+    time.sleep(0.001)
+    cache.put('b', 'x' * 10)
+    time.sleep(0.001)
+    cache.get('a')
+    time.sleep(0.001)
+    cache.put('c', 'x' * 10)
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+    assert cache.total_bytes() <= 25
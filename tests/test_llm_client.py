@@ -0,0 +1,80 @@
+"""
+Tests for the shared async Claude client, using a local fake instead of the API.
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from llm_client import LLMClient, cacheable_system
+from conftest import FakeMessages, status_error
+
+
+def make_client(messages, **kwargs):
+    options = dict(max_concurrency=2, max_retries=3, backoff=0.001, max_backoff=0.01, timeout=5,
+                   cache=False)
+    options.update(kwargs)
+    return LLMClient(client=SimpleNamespace(messages=messages), **options)
+
+
+def test_retries_rate_limit_and_overloaded():
+    messages = FakeMessages(failures=[status_error(429, {'retry-after': '0'}), status_error(529)])
+    result = asyncio.run(make_client(messages).create_message(model='m', messages=[]))
+    assert result.content[0].text == 'ok'
+    assert len(messages.calls) == 3
+    assert all(call['timeout'] == 5 for call in messages.calls)
+
+
+def test_other_errors_are_not_retried():
+    messages = FakeMessages(failures=[status_error(400)])
+    with pytest.raises(anthropic.APIStatusError):
+        asyncio.run(make_client(messages).create_message(model='m', messages=[]))
+    assert len(messages.calls) == 1
+
+
+def test_gives_up_after_max_retries():
+    messages = FakeMessages(failures=[status_error(529)] * 5)
+    with pytest.raises(anthropic.APIStatusError):
+        asyncio.run(make_client(messages, max_retries=2).create_message(model='m', messages=[]))
+    assert len(messages.calls) == 3
+
+
+def test_concurrency_is_bounded():
+    messages = FakeMessages(delay=0.01)
+    client = make_client(messages, max_concurrency=3)
+
+    async def run_many():
+        await asyncio.gather(*(client.create_message(model='m', messages=[]) for _ in range(10)))
+
+    asyncio.run(run_many())
+    assert len(messages.calls) == 10
+    assert messages.max_in_flight == 3
+
+
+def test_cacheable_system_marks_prefix_end():
+    blocks = cacheable_system('persona', None, 'format rules')
+    assert [b['text'] for b in blocks] == ['persona', 'format rules']
+    assert 'cache_control' not in blocks[0]
+    assert blocks[-1]['cache_control'] == {'type': 'ephemeral'}
+
+
+def test_usage_tracks_prompt_cache_tokens():
+    class UsageMessages:
+        async def create(self, **kwargs):
+            usage = SimpleNamespace(input_tokens=50, output_tokens=200,
+                                    cache_creation_input_tokens=0, cache_read_input_tokens=1500)
+            return SimpleNamespace(content=[], usage=usage)
+
+    client = make_client(UsageMessages())
+    for _ in range(2):
+        asyncio.run(client.create_message(call_type='chart_analysis', model='m', messages=[]))
+    assert client.usage['chart_analysis']['calls'] == 2
+    assert client.usage['chart_analysis']['cache_read_input_tokens'] == 3000
+    summary = client.usage_summary()
+    assert summary['cache_hit_ratio'] == 3000 / 3100
@@ -49,7 +49,7 @@ async def test_macro_analysis():
         
         # Format Hebrew text
         logger.info("Formatting Hebrew text...")
-        formatted_report = macro_analyzer.fix_hebrew_text(
+        formatted_report = await macro_analyzer.fix_hebrew_text(
             macro_response,
             dani_financial_description
         )
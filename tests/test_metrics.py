@@ -0,0 +1,71 @@
+"""
+Tests for per-stage run metrics.
+"""
+import sys
+import os
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import metrics
+from llm_client import LLMClient, StubAsyncAnthropic
+from metrics import RunMetrics, NULL_STAGE
+from conftest import FakeMessages, status_error
+
+
+@pytest.fixture
+def run_metrics(monkeypatch):
+    run = RunMetrics(enabled=True)
+    monkeypatch.setattr(metrics, '_run_metrics', run)
+    return run
+
+
+def test_stages_are_timed_and_summed(tmp_path):
+    run = RunMetrics(enabled=True)
+    for size in (100, 250):
+        with run.stage('render', ticker='SPY') as stage:
+            stage.add(bytes=size)
+    with pytest.raises(ValueError):
+        with run.stage('fetch'):
+            raise ValueError("no data")
+
+    summary = run.summary()
+    assert summary['render']['count'] == 2 and summary['render']['bytes'] == 350
+    assert summary['render']['seconds'] >= summary['render']['max_seconds'] >= 0
+    assert summary['fetch']['errors'] == 1
+
+    path = run.write(str(tmp_path / 'run.json'))
+    report = json.load(open(path))
+    assert report['summary']['render']['bytes'] == 350
+    assert report['events'][0]['ticker'] == 'SPY'
+
+
+def test_disabled_records_nothing(tmp_path):
+    run = RunMetrics(enabled=False)
+    stage = run.stage('render')
+    assert stage is NULL_STAGE
+    with stage:
+        stage.add(bytes=1)
+    run.record('fetch', 1.0)
+    assert run.events == [] and run.write(str(tmp_path / 'run.json')) is None
+
+
+def test_llm_calls_record_tokens_and_retries(run_metrics):
+    messages = FakeMessages(failures=[status_error(529)])
+    client = LLMClient(client=SimpleNamespace(messages=messages), max_retries=2, backoff=0.001,
+                       max_backoff=0.01, timeout=5, cache=False)
+    asyncio.run(client.create_message(call_type='chart_analysis', model='m', messages=[]))
+
+    stub = StubAsyncAnthropic()
+    asyncio.run(LLMClient(client=stub, cache=False).create_message(
+        call_type='hebrew_fix', model='m', messages=[]))
+
+    events = [event for event in run_metrics.events if event['stage'] == 'llm']
+    assert [event['call_type'] for event in events] == ['chart_analysis', 'hebrew_fix']
+    assert events[0]['retries'] == 1
+    assert events[1]['input_tokens'] == 0 and 'output_tokens' in events[1]
@@ -0,0 +1,71 @@
+"""
+Tests for multi-scale channel detection over a window pyramid.
+"""
+import sys
+import os
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from channel_store import ChannelStore
+from config import Settings
+from market_analysis import MarketAnalysis
+from overlap_index import OverlapIndex
+from trend_engine import TrendEngine
+from conftest import make_ohlc
+
+
+def test_single_scale_pyramid_matches_default_scan():
+    market = MarketAnalysis()
+    data = make_ohlc(length=500, seed=1)
+    assert market.identify_channels(data, window_sizes=[40])[1] == market.identify_channels(data)[1]
+
+
+def test_explicit_window_arguments_override_configured_pyramid(monkeypatch):
+    market = MarketAnalysis()
+    data = make_ohlc(length=600, seed=2)
+    pyramid = market.identify_channels(data, window_sizes=[20, 40, 80])[1]
+    single = market.identify_channels(data, window_sizes=[], step=10)[1]
+    monkeypatch.setattr(Settings, 'CHANNEL_WINDOW_SIZES', [20, 40, 80])
+
+    # Defaults follow the configured pyramid, explicit single-scale arguments win over it
+    assert market.identify_channels(data)[1] == pyramid
+    assert market.identify_channels(data, step=10)[1] == single
+    assert market.identify_channels(data, window_size=40, step=20)[1] == \
+        market.identify_channels(data, window_sizes=[])[1]
+    # An explicit pyramid wins over everything
+    assert market.identify_channels(data, step=10, window_sizes=[20, 40, 80])[1] == pyramid
+
+
+def test_pyramid_merges_scales_in_one_ranking():
+    market = MarketAnalysis()
+    data = make_ohlc(length=1000, seed=5)
+    engine = TrendEngine.from_data(data)
+
+    candidates = []
+    for size in (20, 40, 80, 160):
+        candidates += market._window_candidates(data, engine, size, size // 2)
+    _, channels = market.identify_channels(data, window_sizes=[20, 40, 80, 160])
+
+    assert channels == MarketAnalysis.select_channels(candidates)
+    lengths = {data.index.get_loc(c[2][1]) - data.index.get_loc(c[2][0]) + 1 for c in channels}
+    assert len(lengths) > 1
+
+    # Selected channels never overlap by more than 30%, whatever their scale
+    index = OverlapIndex(0.3)
+    for channel in channels:
+        start, end = (data.index.get_loc(t) for t in channel[2])
+        assert not index.overlaps(start, end)
+        index.add(start, end)
+
+
+def test_pyramid_with_channel_store(tmp_path):
+    store = ChannelStore(str(tmp_path))
+    market = MarketAnalysis(channel_store=store)
+    data = make_ohlc(length=600, seed=2)
+    sizes = [20, 40, 80]
+    first = market.identify_channels(data, ticker='SPY', window_sizes=sizes)
+    for size in sizes:
+        assert store.load('SPY', size, size // 2) is not None
+    assert market.identify_channels(data, ticker='SPY', window_sizes=sizes)[1] == first[1]
+    assert MarketAnalysis().identify_channels(data, window_sizes=sizes)[1] == first[1]
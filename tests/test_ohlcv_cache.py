@@ -0,0 +1,147 @@
+"""
+Tests for the on-disk OHLCV cache. No network access is needed.
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ohlcv_cache import OHLCVCache
+from market_analysis import MarketAnalysis
+from conftest import make_ohlc
+
+
+class FakeSource:
+    """Serves slices of a fixed history and records every request."""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        start = pd.Timestamp(start).tz_localize(self.data.index.tz)
+        end = pd.Timestamp(end).tz_localize(self.data.index.tz)
+        return self.data[(self.data.index >= start) & (self.data.index < end)]
+
+
+def make_history():
+    data = make_ohlc(length=300)
+    data.index = data.index.tz_localize('America/New_York').rename('Date')
+    return data
+
+
+def test_roundtrip_preserves_bars_and_timezone(tmp_path):
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=1, offline=False)
+    data = make_history()
+    cache.save('^GSPC', data)
+    loaded = cache.load('^GSPC')
+    assert str(loaded.index.tz) == 'America/New_York'
+    pd.testing.assert_frame_equal(loaded, data[loaded.columns], check_freq=False,
+                                  check_dtype=False, check_index_type=False)
+
+
+def test_stale_cache_fetches_only_tail(tmp_path):
+    data = make_history()
+    source = FakeSource(data)
+    start = data.index[0].tz_localize(None).to_pydatetime()
+    end = data.index[-1].tz_localize(None).to_pydatetime() + timedelta(days=1)
+    cutoff = data.index[250].tz_localize(None).to_pydatetime()
+
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=0, offline=False)
+    first = cache.get('SPY', start, cutoff, source)
+    assert len(first) == 250
+
+    second = cache.get('SPY', start, end, source)
+    assert len(second) == len(data)
+    tail_start = source.calls[-1][1]
+    assert tail_start >= datetime(2024, 1, 1) + timedelta(days=300)
+    assert tail_start <= cutoff
+
+
+def test_young_ticker_gets_tail_refresh(tmp_path):
+    data = make_history()
+    source = FakeSource(data)
+    # Requested a year before the listing, so the cache can never start at `start`
+    start = data.index[0].tz_localize(None).to_pydatetime() - timedelta(days=365)
+    end = data.index[-1].tz_localize(None).to_pydatetime() + timedelta(days=1)
+    cutoff = data.index[250].tz_localize(None).to_pydatetime()
+
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=0, offline=False)
+    cache.get('NEW', start, cutoff, source)
+    assert cache.first_bar('NEW') == data.index[0]
+
+    second = cache.get('NEW', start, end, source)
+    assert len(second) == len(data)
+    assert start < source.calls[-1][1] <= cutoff
+    assert cache.first_bar('NEW') == data.index[0]
+
+
+def test_fresh_cache_skips_network(tmp_path):
+    data = make_history()
+    source = FakeSource(data)
+    start = data.index[0].tz_localize(None).to_pydatetime()
+    end = data.index[-1].tz_localize(None).to_pydatetime() + timedelta(days=1)
+
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=12, offline=False)
+    cache.get('SPY', start, end, source)
+    cache.get('SPY', start, end, source)
+    assert len(source.calls) == 1
+
+
+def test_offline_mode_serves_cache_only(tmp_path):
+    data = make_history()
+    OHLCVCache(cache_dir=str(tmp_path)).save('SPY', data)
+    offline = OHLCVCache(cache_dir=str(tmp_path), offline=True)
+
+    def no_network(*args):
+        raise AssertionError("network used in offline mode")
+
+    start = data.index[0].tz_localize(None).to_pydatetime()
+    end = data.index[-1].tz_localize(None).to_pydatetime() + timedelta(days=1)
+    assert len(offline.get('SPY', start, end, no_network)) == len(data)
+    assert offline.get('QQQ', start, end, no_network) is None
+
+    # The channel pipeline runs straight from the cache
+    market = MarketAnalysis(cache=offline)
+    cached = offline.get('SPY', start, end, no_network)
+    long_term, channels = market.identify_channels(cached)
+    assert channels
+
+
+def test_adjusted_history_is_refetched_in_full(tmp_path):
+    data = make_history()
+    source = FakeSource(data)
+    start = data.index[0].tz_localize(None).to_pydatetime()
+    end = data.index[-1].tz_localize(None).to_pydatetime() + timedelta(days=1)
+    cutoff = data.index[250].tz_localize(None).to_pydatetime()
+
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=0, offline=False)
+    cache.get('SPY', start, cutoff, source)
+
+    # A 2:1 split: the source now serves the whole history at half the price
+    adjusted = data.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    source.data = adjusted
+
+    refreshed = cache.get('SPY', start, end, source)
+    assert source.calls[-1][1] == start
+    assert len(refreshed) == len(data)
+    assert refreshed['Close'].to_numpy() == pytest.approx(adjusted['Close'].to_numpy())
+    assert cache.load('SPY')['Close'].iloc[0] == pytest.approx(adjusted['Close'].iloc[0])
+
+
+def test_concurrent_saves_use_separate_temp_files(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = OHLCVCache(cache_dir=str(tmp_path), ttl_hours=1, offline=False)
+    data = make_history()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: cache.save('SPY', data), range(16)))
+    assert len(cache.load('SPY')) == len(data)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
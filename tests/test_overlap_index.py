@@ -0,0 +1,57 @@
+"""
+Tests for the interval-index channel selection against the quadratic greedy scan.
+"""
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from market_analysis import MarketAnalysis
+from overlap_index import OverlapIndex
+
+
+def reference_select(potential_channels):
+    """Greedy selection as implemented before the interval index."""
+    potential_channels = sorted(potential_channels, key=lambda x: x[1], reverse=True)
+    selected = []
+    for channel, score, _ in potential_channels:
+        if score > 0.3 and not any(MarketAnalysis.has_significant_overlap(channel, existing)
+                                   for existing in selected):
+            selected.append(channel)
+    return selected
+
+
+def random_candidates(seed, count=400):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-01', periods=2600, freq='B', tz='America/New_York')
+    candidates = []
+    for k in range(count):
+        length = int(rng.choice([20, 40, 80, 160]))
+        start = int(rng.integers(0, len(dates) - length))
+        # Rounded scores create ties, which must keep their original order
+        score = round(float(rng.uniform(0, 1)), 2)
+        channel = ((0.1, 100.0 + k), (0.1, 90.0 + k), (dates[start], dates[start + length - 1]))
+        candidates.append((channel, score, start))
+    return candidates
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_quadratic_greedy(seed):
+    candidates = random_candidates(seed)
+    assert MarketAnalysis.select_channels(candidates) == reference_select(candidates)
+
+
+def test_overlap_boundaries():
+    index = OverlapIndex(0.3)
+    index.add(0, 100)
+    assert not index.overlaps(100, 200)     # touching only
+    assert not index.overlaps(70, 170)      # exactly 30%
+    assert index.overlaps(69, 169)          # just above 30%
+    assert index.overlaps(10, 20)           # contained
+    with pytest.raises(ValueError):
+        OverlapIndex(1.0)
@@ -0,0 +1,64 @@
+"""
+Tests for the parameter sweep: the default parameter set reproduces
+identify_channels, and the ranking and search modes behave.
+"""
+import sys
+import os
+
+import numpy as np
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from market_analysis import MarketAnalysis
+from parameter_sweep import (DEFAULT_GRID, evaluate_ticker, format_thresholds, parameter_sets, run_sweep,
+                             thresholds_of)
+from trend_engine import TREND_THRESHOLDS
+from conftest import make_ohlc
+
+REPO_DEFAULTS = {
+    'recent_r_squared': 0.3, 'recent_slope': 0.008, 'recent_movement': 0.03,
+    'older_r_squared': 0.4, 'older_slope': 0.015, 'older_movement': 0.05,
+    'window_size': 40, 'step': 20, 'min_score': 0.3,
+}
+
+
+def test_default_set_matches_identify_channels():
+    assert thresholds_of(REPO_DEFAULTS) == TREND_THRESHOLDS
+    market = MarketAnalysis()
+    strict = {**REPO_DEFAULTS, 'recent_r_squared': 0.99, 'older_r_squared': 0.99}
+    for seed in range(4):
+        data = make_ohlc(500, seed=seed)
+        _, channels = market.identify_channels(data, window_sizes=[])
+        _, sums = evaluate_ticker((f'SYN{seed}', data), [REPO_DEFAULTS, strict], horizon=20)
+        assert sums[0, 0] == len(channels)
+        assert sums[1, 0] <= sums[0, 0]
+        if channels:
+            assert 0 <= sums[0, 2] / sums[0, 3] <= 1
+
+
+def test_parameter_sets():
+    grid = {'a': [1, 2, 3], 'b': [10, 20]}
+    assert len(parameter_sets(grid)) == 6
+    sampled = parameter_sets(grid, samples=4, seed=1)
+    assert len(sampled) == 4 and len({tuple(p.values()) for p in sampled}) == 4
+    assert parameter_sets(grid, samples=4, seed=1) == sampled
+    assert len(parameter_sets(grid, samples=100)) == 6
+    assert len(parameter_sets(samples=5)) == 5 and set(parameter_sets(samples=5)[0]) == set(DEFAULT_GRID)
+
+
+def test_run_sweep_ranks_results():
+    frames = {f'SYN{i}': make_ohlc(400, seed=i) for i in range(3)}
+    params = [REPO_DEFAULTS, {**REPO_DEFAULTS, 'window_size': 20, 'step': 10},
+              {**REPO_DEFAULTS, 'min_score': 0.99}]
+    table = run_sweep(frames, params, horizon=20, workers=1, min_channels=1)
+    assert table['rank'].tolist() == [1, 2, 3]
+    # A cutoff no channel reaches selects nothing and ranks last
+    assert table.iloc[-1]['min_score'] == 0.99 and table.iloc[-1]['channels'] == 0
+    ranked = table[table['channels'] >= 1]['forward_containment'].to_numpy()
+    assert np.all(np.diff(ranked) <= 0)
+
+    code = format_thresholds(table.iloc[0].to_dict())
+    namespace = {}
+    exec(code, namespace)
+    assert namespace['TREND_THRESHOLDS'] == thresholds_of(table.iloc[0].to_dict())
@@ -0,0 +1,100 @@
+"""
+Tests for the peak-based channel engine against construct_channel.
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import peak_engine
+from channel_store import ChannelStore
+from market_analysis import MarketAnalysis
+from peak_engine import PeakEngine, peak_channels_many
+from trend_engine import window_starts
+from conftest import make_ohlc
+
+
+def test_fit_matches_construct_channel():
+    market = MarketAnalysis()
+    data = make_ohlc(length=400, seed=3)
+    engine = PeakEngine.from_data(data)
+    peaks, troughs = market.find_significant_points(data)
+    assert list(engine.peaks) == list(peaks) and list(engine.troughs) == list(troughs)
+
+    starts = window_starts(len(data), 60, 5)
+    fit = engine.fit(starts, 60, jit=False)
+    assert fit['valid'].any()
+    for k, s in enumerate(starts):
+        local_peaks = peaks[(peaks >= s) & (peaks < s + 60)] - s
+        local_troughs = troughs[(troughs >= s) & (troughs < s + 60)] - s
+        if len(local_peaks) < 2 or len(local_troughs) == 0:
+            assert not fit['valid'][k]
+            continue
+        upper, lower = market.construct_channel(data.iloc[s:s + 60], local_peaks, local_troughs)
+        assert np.isclose(fit['slope'][k], upper[0])
+        assert np.isclose(fit['upper_intercept'][k], upper[1])
+        assert np.isclose(fit['lower_intercept'][k], lower[1])
+
+
+def test_loop_kernel_matches_numpy_path():
+    data = make_ohlc(length=300, seed=6)
+    engine = PeakEngine.from_data(data)
+    starts = window_starts(len(data), 40, 3)
+    expected = engine.fit(starts, 40, jit=False)
+    got = {key: np.full(len(starts), np.nan) for key in ('slope', 'upper', 'lower')}
+    peak_engine._fit_windows_loop(engine.highs, engine.lows, engine.peaks, engine.troughs,
+                                  starts, 40, got['slope'], got['upper'], got['lower'])
+    assert np.allclose(got['slope'], expected['slope'], equal_nan=True)
+    assert np.allclose(got['upper'], expected['upper_intercept'], equal_nan=True)
+    assert np.allclose(got['lower'], expected['lower_intercept'], equal_nan=True)
+
+
+def test_many_tickers_match_single_series():
+    frames = {f'T{seed}': make_ohlc(length=200 + 50 * seed, seed=seed) for seed in range(4)}
+    results = peak_channels_many(frames, window_size=40, step=10, jit=False)
+    for ticker, data in frames.items():
+        starts = window_starts(len(data), 40, 10)
+        single = PeakEngine.from_data(data).fit(starts, 40, jit=False)
+        assert list(results[ticker]['start']) == list(starts)
+        assert np.allclose(results[ticker]['upper_intercept'], single['upper_intercept'], equal_nan=True)
+        assert np.allclose(results[ticker]['lower_intercept'], single['lower_intercept'], equal_nan=True)
+
+
+def test_jit_matches_python_kernel():
+    pytest.importorskip('numba')
+    data = make_ohlc(length=400, seed=6)
+    engine = PeakEngine.from_data(data)
+    starts = window_starts(len(data), 40, 3)
+    expected = engine.fit(starts, 40, jit=False)
+    got = engine.fit(starts, 40, jit=True)
+    assert np.array_equal(got['valid'], expected['valid'])
+    for key in ('slope', 'upper_intercept', 'lower_intercept'):
+        assert np.allclose(got[key], expected[key], equal_nan=True)
+
+
+@pytest.mark.skipif(peak_engine.numba is not None, reason="numba is installed")
+def test_jit_without_numba():
+    engine = PeakEngine.from_data(make_ohlc(length=100))
+    with pytest.raises(ImportError):
+        engine.fit([0], 40, jit=True)
+
+
+def test_identify_channels_with_peak_engine(tmp_path):
+    data = make_ohlc(length=500, seed=2)
+    market = MarketAnalysis(channel_store=ChannelStore(str(tmp_path)), channel_engine='peaks')
+    long_term, channels = market.identify_channels(data)
+    assert channels
+    engine = PeakEngine.from_data(data)
+    for (slope, upper), (_, lower), (start_date, _) in channels:
+        start = data.index.get_loc(start_date)
+        fit = engine.fit([start], 40, jit=False)
+        assert np.isclose(fit['upper_intercept'][0], upper) and np.isclose(fit['lower_intercept'][0], lower)
+
+    # Stored regression windows are not reused by the peak engine and vice versa
+    assert market.identify_channels(data, ticker='SPY')[1] == channels
+    assert ChannelStore(str(tmp_path)).load('SPY', 40, 20) is None
+    assert ChannelStore(str(tmp_path)).load('SPY', 40, 20, 'peaks') is not None
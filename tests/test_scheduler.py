@@ -0,0 +1,157 @@
+"""
+Tests for the resident scheduler, using a fake clock instead of waiting.
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import Settings
+from metrics import get_metrics
+from scheduler import Scheduler, next_run, previous_run
+
+SCHEDULE = {
+    'macro_analysis': {'day': 1, 'times': ['10:00']},
+    'technical_analysis': {'weekday': 6, 'times': ['10:00']},
+    'motivation_post': {'times': ['19:00', '09:00', '15:00']},
+}
+
+
+class FakeClock:
+    """Clock whose sleep advances time immediately."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        # Let tasks started before this sleep see the current time first
+        await asyncio.sleep(0)
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, 'METRICS_DIR', str(tmp_path / 'metrics'))
+
+
+def make_scheduler(tmp_path, jobs, now, **options):
+    clock = FakeClock(now)
+    options = {'schedule': SCHEDULE, 'state_path': str(tmp_path / 'state.json'), 'jitter': 0,
+               'catchup_hours': 6, 'clock': clock, 'sleep': clock.sleep, **options}
+    return Scheduler(jobs, **options), clock
+
+
+def test_next_and_previous_run():
+    saturday = datetime(2026, 10, 17, 12, 0)
+    assert next_run(SCHEDULE['technical_analysis'], saturday) == datetime(2026, 10, 18, 10, 0)
+    assert next_run(SCHEDULE['macro_analysis'], saturday) == datetime(2026, 11, 1, 10, 0)
+    assert next_run(SCHEDULE['motivation_post'], saturday) == datetime(2026, 10, 17, 15, 0)
+    assert next_run(SCHEDULE['motivation_post'], datetime(2026, 10, 17, 15, 0)) == datetime(2026, 10, 17, 19, 0)
+    assert previous_run(SCHEDULE['motivation_post'], saturday) == datetime(2026, 10, 17, 9, 0)
+    assert previous_run(SCHEDULE['technical_analysis'], saturday) == datetime(2026, 10, 11, 10, 0)
+    assert next_run({'day': 31, 'times': ['10:00']}, datetime(2026, 11, 1)) == datetime(2026, 12, 31, 10, 0)
+
+
+def test_catch_up_only_recent_missed_runs(tmp_path):
+    scheduler, clock = make_scheduler(tmp_path, {}, datetime(2026, 10, 18, 13, 0))
+    assert scheduler.missed('technical_analysis', clock())       # 3 hours ago, never run
+    assert not scheduler.missed('macro_analysis', clock())       # a month ago
+    scheduler.last_run['technical_analysis'] = datetime(2026, 10, 18, 10, 1)
+    assert not scheduler.missed('technical_analysis', clock())
+
+
+def test_runs_on_schedule_and_persists_state(tmp_path):
+    runs = []
+
+    async def technical():
+        runs.append(clock())
+
+    async def run():
+        loop = asyncio.create_task(scheduler.run_forever())
+        while len(runs) < 2:
+            await asyncio.sleep(0)
+        loop.cancel()
+
+    scheduler, clock = make_scheduler(tmp_path, {'technical_analysis': technical},
+                                      datetime(2026, 10, 17, 12, 0))
+    asyncio.run(run())
+    assert runs == [datetime(2026, 10, 18, 10, 0), datetime(2026, 10, 25, 10, 0)]
+
+    # A restart inside the catch-up window does not repeat the run
+    restarted, _ = make_scheduler(tmp_path, {}, datetime(2026, 10, 25, 11, 0))
+    assert restarted.last_run['technical_analysis'] == datetime(2026, 10, 25, 10, 0)
+    assert not restarted.missed('technical_analysis', datetime(2026, 10, 25, 11, 0))
+
+
+def test_jitter_delays_within_bounds(tmp_path):
+    runs = []
+
+    async def post():
+        runs.append(clock())
+
+    async def run():
+        loop = asyncio.create_task(scheduler.run_forever())
+        while len(runs) < 3:
+            await asyncio.sleep(0)
+        loop.cancel()
+
+    scheduler, clock = make_scheduler(tmp_path, {'motivation_post': post},
+                                      datetime(2026, 10, 17, 8, 0), jitter=600)
+    asyncio.run(run())
+    for run_at, due in zip(runs, (9, 15, 19)):
+        assert timedelta(0) <= run_at - datetime(2026, 10, 17, due, 0) <= timedelta(seconds=600)
+
+
+def test_overlapping_run_of_same_job_is_skipped(tmp_path):
+    started = []
+
+    async def slow():
+        started.append(1)
+        await asyncio.sleep(0.05)
+
+    async def run():
+        await asyncio.gather(scheduler.run_job('macro_analysis'), scheduler.run_job('macro_analysis'))
+
+    scheduler, _ = make_scheduler(tmp_path, {'macro_analysis': slow}, datetime(2026, 10, 1, 10, 0))
+    asyncio.run(run())
+    assert started == [1] and scheduler.running == {}
+
+
+def test_overlapping_jobs_keep_separate_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, 'METRICS_ENABLED', True)
+    runs = {}
+
+    def record_in_thread(name):
+        with get_metrics().stage(name):
+            pass
+
+    def job(name, stages):
+        async def run_stages():
+            for stage in stages:
+                with get_metrics().stage(stage):
+                    # Let the other job record its stages in between
+                    await asyncio.sleep(0.01)
+            # Stages recorded from worker threads belong to the same run
+            await asyncio.to_thread(record_in_thread, f"{name}_thread")
+            runs[name] = get_metrics()
+        return run_stages
+
+    jobs = {'macro_analysis': job('macro', ['fetch', 'macro_llm']),
+            'technical_analysis': job('technical', ['fetch', 'render', 'vision_llm'])}
+
+    async def run():
+        await asyncio.gather(scheduler.run_job('macro_analysis'), scheduler.run_job('technical_analysis'))
+
+    scheduler, _ = make_scheduler(tmp_path, jobs, datetime(2026, 10, 1, 10, 0))
+    asyncio.run(run())
+    assert set(runs['macro'].summary()) == {'fetch', 'macro_llm', 'macro_thread'}
+    assert set(runs['technical'].summary()) == {'fetch', 'render', 'vision_llm', 'technical_thread'}
+    assert get_metrics() not in (runs['macro'], runs['technical'])
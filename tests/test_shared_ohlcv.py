@@ -0,0 +1,69 @@
+"""
+Tests for the shared-memory OHLCV layer: read-only zero-copy views,
+round trips of the frames and pool workers reading from shared memory.
+"""
+import sys
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtest import run_backtest
+from shared_ohlcv import COLUMNS, SharedOHLCV, map_tickers
+from conftest import make_ohlc
+
+
+def make_frames():
+    frames = {f'SYN{i}': make_ohlc(100 + 50 * i, seed=i) for i in range(3)}
+    frames['SYN1'].index = frames['SYN1'].index + pd.Timedelta(hours=16)
+    return {ticker: data.tz_localize('America/New_York') for ticker, data in frames.items()}
+
+
+def close_summary(item):
+    """Pool worker: what the worker sees of one ticker."""
+    ticker, data = item
+    return ticker, float(data['Close'].sum()), data.index[0], data['Close'].to_numpy().flags.writeable
+
+
+def test_views_round_trip_read_only():
+    frames = make_frames()
+    with SharedOHLCV.create(frames) as shared:
+        attached = SharedOHLCV.attach(shared.spec)
+        assert list(attached) == list(frames) and 'SYN2' in attached
+        for ticker, data in frames.items():
+            frame = attached.frame(ticker)
+            pd.testing.assert_frame_equal(frame, data[list(COLUMNS)].astype(np.float64), check_freq=False)
+            views = attached.arrays(ticker)
+            assert all(np.shares_memory(views[column], attached.prices) for column in COLUMNS)
+            assert np.shares_memory(frame['Close'].to_numpy(), attached.prices)
+        with pytest.raises(ValueError):
+            attached.arrays('SYN0')['Close'][0] = 0.0
+        del frame, views
+        attached.close()
+        name = shared.spec['prices']
+    # The owner unlinks the blocks
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_pool_workers_read_shared_frames():
+    frames = make_frames()
+    results = map_tickers(close_summary, frames, workers=2)
+    assert [r[0] for r in results] == list(frames)
+    for ticker, total, first, writeable in results:
+        assert total == pytest.approx(frames[ticker]['Close'].sum())
+        assert first == frames[ticker].index[0]
+        assert not writeable
+
+
+def test_backtest_in_pool_matches_in_process():
+    frames = {f'SYN{i}': make_ohlc(400, seed=i) for i in range(3)}
+    pooled = run_backtest(frames, lookback=150, step=25, workers=2)
+    local = run_backtest(frames, lookback=150, step=25, workers=1)
+    assert pooled['summary'] == local['summary']
+    pd.testing.assert_frame_equal(pooled['trades'], local['trades'])
@@ -0,0 +1,116 @@
+"""
+Tests for Telegram file_id reuse, using a local fake Bot.
+"""
+import sys
+import os
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from telegram_file_cache import FileIdCache
+from conftest import FakeBot, image, make_telegram
+
+pytestmark = pytest.mark.usefixtures('channels')
+
+
+class PhotoBot(FakeBot):
+    """FakeBot that hands out file_ids for uploads and rejects unknown ones."""
+
+    def __init__(self, known=None):
+        super().__init__()
+        self.known = known if known is not None else set()
+        self.uploaded = 0
+
+    def _photo(self, media):
+        media = getattr(media, 'input_file_content', media)  # Album items wrap bytes in an InputFile
+        if isinstance(media, bytes):
+            self.uploaded += len(media)
+            file_id = f'file-{len(self.known)}'
+            self.known.add(file_id)
+        elif media in self.known:
+            file_id = media
+        else:
+            raise BadRequest('Wrong file identifier/http url specified')
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=file_id + '-thumb'),
+                                      SimpleNamespace(file_id=file_id)])
+
+    async def send_photo(self, chat_id, **kwargs):
+        message = self._photo(kwargs['photo'])
+        await self._call('send_photo', chat_id, **kwargs)
+        return message
+
+    async def send_media_group(self, chat_id, **kwargs):
+        messages = tuple(self._photo(item.media) for item in kwargs['media'])
+        await self._call('send_media_group', chat_id, **kwargs)
+        return messages
+
+
+def send(telegram, *sends):
+    async def run():
+        futures = [telegram.queue_image(img, public=public) for img, public in sends]
+        await telegram.flush()
+        return [future.result() for future in futures]
+    return asyncio.run(run())
+
+
+def test_second_channel_reuses_upload_in_flight(tmp_path):
+    bot = PhotoBot()
+    telegram = make_telegram(bot, file_ids=FileIdCache(str(tmp_path / 'ids.json'), 'bot1'))
+    results = send(telegram, (image(1), False), (image(1), True))
+    assert all(results)
+    assert bot.uploaded == 100
+    assert [call[3]['photo'] for call in bot.calls][1] == 'file-0'
+
+
+def test_file_ids_persist_across_runs(tmp_path):
+    known = set()
+    path = str(tmp_path / 'ids.json')
+    send(make_telegram(PhotoBot(known), file_ids=FileIdCache(path, 'bot1')), (image(2), False))
+
+    bot = PhotoBot(known)
+    send(make_telegram(bot, file_ids=FileIdCache(path, 'bot1')), (image(2), False), (image(2), True))
+    assert bot.uploaded == 0
+
+    # Another bot cannot use these file_ids
+    assert FileIdCache(path, 'bot2').get(image(2).sha256) is None
+
+
+def test_concurrent_saves_leave_a_valid_file(tmp_path):
+    path = str(tmp_path / 'ids.json')
+    caches = [FileIdCache(path, f'bot{n}') for n in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda n: caches[n % 4].put(f'digest{n}', f'file{n}'), range(40)))
+    with open(path) as f:
+        assert set(json.load(f)) <= {'bot0', 'bot1', 'bot2', 'bot3'}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_stale_file_id_falls_back_to_upload(tmp_path):
+    path = str(tmp_path / 'ids.json')
+    cache = FileIdCache(path, 'bot1')
+    cache.put(image(3).sha256, 'expired')
+    bot = PhotoBot()
+    assert all(send(make_telegram(bot, file_ids=cache), (image(3), False)))
+    assert bot.uploaded == 100
+    assert FileIdCache(path, 'bot1').get(image(3).sha256) == 'file-0'
+
+
+def test_album_uploads_are_reused(tmp_path):
+    bot = PhotoBot()
+    telegram = make_telegram(bot, file_ids=FileIdCache(str(tmp_path / 'ids.json'), 'bot1'))
+
+    async def run():
+        telegram.queue_album([image(n) for n in range(3)])
+        await telegram.flush()
+
+    asyncio.run(run())
+    send(telegram, (image(1), True))
+    assert bot.uploaded == 300
+    assert bot.calls[-1][3]['photo'] == 'file-1'
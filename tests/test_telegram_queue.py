@@ -0,0 +1,183 @@
+"""
+Tests for the rate-limited Telegram send queue, using a local fake Bot.
+"""
+import sys
+import os
+import asyncio
+import heapq
+import itertools
+from datetime import timedelta
+
+import pytest
+from telegram.error import BadRequest, RetryAfter, TimedOut
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import Settings
+from main import publish_chart_analyses
+from metrics import start_run
+from telegram_queue import TelegramSendQueue
+from conftest import FakeBot, image, make_telegram
+
+pytestmark = pytest.mark.usefixtures('channels')
+
+
+class VirtualTime:
+    """
+    Clock and sleep for the send queue: sleeping tasks wake in deadline
+    order, and time jumps to the next deadline once every task is waiting.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+        self._order = itertools.count()
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        wake = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + seconds, next(self._order), wake))
+        await wake
+
+    def run(self, coroutine):
+        async def drive():
+            task = asyncio.ensure_future(coroutine)
+            while not task.done():
+                # Let every runnable task reach its next sleep before time moves
+                for _ in range(20):
+                    await asyncio.sleep(0)
+                if self._sleepers and not task.done():
+                    self.now, _, wake = heapq.heappop(self._sleepers)
+                    wake.set_result(None)
+            return task.result()
+        return asyncio.run(drive())
+
+
+def test_per_chat_order_and_chat_rate():
+    bot = FakeBot()
+    clock = VirtualTime()
+
+    async def run():
+        telegram = make_telegram(bot, clock=clock, chat_rate=20)
+        for n in range(6):
+            telegram.queue_text(f'private {n}')
+            telegram.queue_text(f'public {n}', public=True)
+        await telegram.flush()
+
+    clock.run(run())
+    for chat in (Settings.CHANNEL_ID_PRIVATE, Settings.CHANNEL_ID_PUBLIC):
+        texts = [call[3]['text'] for call in bot.calls if call[2] == chat]
+        assert [text.split()[1] for text in texts] == [str(n) for n in range(6)]
+    # Six messages per chat at 20/s take 5 intervals, chats in parallel
+    assert clock.now == pytest.approx(0.25)
+
+
+def test_global_rate_limit():
+    bot = FakeBot()
+    clock = VirtualTime()
+
+    async def run():
+        queue = TelegramSendQueue(bot, global_rate=20, chat_rate=1000, clock=clock, sleep=clock.sleep)
+        await asyncio.gather(*(queue.submit(f'chat{n % 10}', 'send_message', text='x')
+                               for n in range(30)))
+
+    clock.run(run())
+    # A burst of 20, then 10 more at 20/s
+    assert clock.now == pytest.approx(0.5)
+    assert len(bot.calls) == 30
+
+
+def test_retry_after_uses_server_delay_and_other_errors():
+    bot = FakeBot(failures=[RetryAfter(timedelta(seconds=0.2)), TimedOut()])
+    clock = VirtualTime()
+
+    async def run():
+        return await make_telegram(bot, clock=clock).send_text('hello')
+
+    assert clock.run(run())
+    # The server's 0.2s, then at most the second attempt's jittered backoff (2 x 0.001s)
+    assert 0.2 <= clock.now <= 0.202
+    assert [call[3]['text'] for call in bot.calls] == ['hello']
+
+
+def test_bad_request_fails_without_retry():
+    bot = FakeBot(failures=[BadRequest('chat not found')])
+    assert asyncio.run(make_telegram(bot).send_public_image(image(1))) is False
+    assert bot.calls == [] and bot.failures == []
+
+
+def test_failed_resolve_does_not_stop_the_chat_worker():
+    bot = FakeBot()
+
+    async def broken_upload():
+        raise OSError("chart file missing")
+
+    async def run():
+        queue = TelegramSendQueue(bot, global_rate=1000, chat_rate=1000)
+        failed = queue.submit('chat', 'send_photo', resolve=broken_upload)
+        sent = queue.submit('chat', 'send_message', text='still delivered')
+        results = await asyncio.wait_for(asyncio.gather(failed, sent), timeout=1)
+        await queue.close()
+        return results
+
+    assert asyncio.run(run()) == [False, 'message 1']
+    assert [call[3]['text'] for call in bot.calls] == ['still delivered']
+
+
+def test_albums_split_into_media_groups():
+    bot = FakeBot()
+
+    async def run():
+        telegram = make_telegram(bot)
+        telegram.queue_album([image(n) for n in range(11)], captions=[f'T{n}' for n in range(11)])
+        await telegram.flush()
+
+    asyncio.run(run())
+    assert [call[1] for call in bot.calls] == ['send_media_group', 'send_photo']
+    assert len(bot.calls[0][3]['media']) == 10
+    assert bot.calls[1][3]['caption'] == 'T10'
+
+
+def test_publish_keeps_chart_analysis_order():
+    bot = FakeBot()
+
+    async def analysis(text, delay):
+        await asyncio.sleep(delay)
+        return text
+
+    async def run(as_album):
+        telegram = make_telegram(bot)
+        charts = [(f'T{n}', image(n), asyncio.create_task(analysis(f'analysis {n}', 0.03 * (3 - n))))
+                  for n in range(3)]
+        await publish_chart_analyses(telegram, charts, as_album=as_album)
+
+    asyncio.run(run(False))
+    assert [call[1] for call in bot.calls] == ['send_photo', 'send_message'] * 3
+    assert [call[3]['text'] for call in bot.calls if call[1] == 'send_message'] == \
+        ['analysis 0', 'analysis 1', 'analysis 2']
+
+    bot.calls.clear()
+    asyncio.run(run(True))
+    assert [call[1] for call in bot.calls] == ['send_media_group'] + ['send_message'] * 3
+
+
+def test_sends_are_recorded_in_the_submitting_run():
+    bot = FakeBot()
+
+    async def run():
+        queue = TelegramSendQueue(bot, global_rate=1000, chat_rate=1000)
+        runs = []
+        # The chat's worker is created during the first run and serves the second one too
+        for text in ('first', 'second'):
+            with start_run(True) as metrics:
+                await queue.submit('chat', 'send_message', size=len(text), text=text)
+                runs.append(metrics)
+        await queue.close()
+        return runs
+
+    first, second = asyncio.run(run())
+    assert [event['bytes'] for event in first.events if event['stage'] == 'telegram'] == [5]
+    assert [event['bytes'] for event in second.events if event['stage'] == 'telegram'] == [6]
@@ -0,0 +1,69 @@
+"""
+Tests for the batched sliding-window trend engine.
+Compares TrendEngine against the per-window validate_trend path.
+"""
+import sys
+import os
+
+import numpy as np
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from market_analysis import MarketAnalysis
+from trend_engine import TrendEngine, window_starts
+from conftest import make_ohlc
+
+
+def reference_identify_channels(market, data, window_size=40, step=20):
+    """Per-window selection as it was implemented before the batched engine."""
+    data_length = len(data)
+    potential_channels = []
+    for i in range(0, data_length - window_size, step):
+        window_validation = market.validate_trend(data, i, i + window_size,
+                                                  is_recent=(i > data_length * 2/3))
+        if window_validation['isTrend']:
+            channel = market.calculate_channel(data, i, i + window_size, is_long_term=False)
+            if channel is not None:
+                score = market.calculate_channel_quality(data, i, i + window_size, channel)
+                potential_channels.append((channel, score, i))
+    potential_channels.sort(key=lambda x: x[1], reverse=True)
+    selected = []
+    for channel, score, _ in potential_channels:
+        if score > 0.3 and not any(market.has_significant_overlap(channel, existing)
+                                   for existing in selected):
+            selected.append(channel)
+    return selected
+
+
+def test_window_stats_match_validate_trend():
+    data = make_ohlc(seed=1)
+    engine = TrendEngine.from_data(data)
+    for step in (1, 7, 20):
+        stats = engine.scan(40, step)
+        recent = stats['start'] > len(data) * 2/3
+        mask = engine.trend_mask(stats, recent)
+        for idx, start in enumerate(stats['start']):
+            expected = MarketAnalysis.validate_trend(data, start, start + 40, is_recent=recent[idx])
+            assert np.isclose(stats['slope'][idx], expected['slope'], rtol=1e-7, atol=1e-9)
+            assert np.isclose(stats['intercept'][idx], expected['intercept'], rtol=1e-7)
+            assert np.isclose(stats['r_squared'][idx], expected['r_squared'], rtol=1e-7, atol=1e-9)
+            assert np.isclose(stats['movement_significance'][idx], expected['movement_significance'])
+            assert mask[idx] == expected['isTrend']
+
+
+def test_window_starts_match_range():
+    assert list(window_starts(250, 40, 20)) == list(range(0, 210, 20))
+    assert len(window_starts(30, 40, 20)) == 0
+
+
+def test_identify_channels_matches_reference():
+    market = MarketAnalysis()
+    for seed in range(5):
+        data = make_ohlc(seed=seed)
+        for step in (1, 20):
+            _, channels = market.identify_channels(data, step=step)
+            expected = reference_identify_channels(market, data, step=step)
+            assert [c[2] for c in channels] == [c[2] for c in expected]
+            for got, want in zip(channels, expected):
+                assert np.allclose(got[0], want[0]) and np.allclose(got[1], want[1])
@@ -0,0 +1,62 @@
+"""
+Tests for universe scan ranking and the pooled scan.
+"""
+import sys
+import os
+
+import pytest
+
+# Add src directory to path (parent directory of tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import Settings
+from market_analysis import MarketAnalysis
+from ohlcv_cache import OHLCVCache
+from universe_scanner import channel_strength, rank_results, scan_universe
+from conftest import make_ohlc, make_recent_history
+
+
+def test_channel_strength_is_best_channel_quality():
+    data = make_ohlc(seed=3)
+    long_term, channels = MarketAnalysis().identify_channels(data)
+    strength = channel_strength(data, long_term, channels)
+    assert channels
+    assert 0.3 < strength <= 1.0
+    assert channel_strength(data, None, []) == 0.0
+
+
+def test_rank_results_orders_and_truncates():
+    results = [
+        {'ticker': 'AAA', 'strength': 0.4},
+        None,
+        {'ticker': 'BBB', 'strength': 0.9},
+        {'ticker': 'CCC', 'strength': 0.6},
+    ]
+    assert [r['ticker'] for r in rank_results(results, top_n=2)] == ['BBB', 'CCC']
+    assert len(rank_results(results)) == 3
+
+
+def test_scan_universe_detects_once_and_renders_top_n_in_pool(tmp_path, monkeypatch):
+    frames = {ticker: make_recent_history(seed) for ticker, seed in (('AAA', 2), ('BBB', 3), ('CCC', 4))}
+    cache = OHLCVCache(cache_dir=str(tmp_path / 'ohlcv'))
+    for ticker, data in frames.items():
+        cache.save(ticker, data)
+    # Offline cache only; workers must not fetch or need the network
+    monkeypatch.setattr(Settings, 'DATA_CACHE_ENABLED', True)
+    monkeypatch.setattr(Settings, 'OFFLINE_MODE', True)
+    monkeypatch.setattr(Settings, 'DATA_CACHE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(Settings, 'INCREMENTAL_CHANNELS', False)
+    monkeypatch.setattr(MarketAnalysis, 'fetch_data', lambda *args: pytest.fail("per-ticker fetch"))
+
+    summary = scan_universe(list(frames) + ['MISSING'], workers=2, top_n=2)
+
+    expected = {}
+    for ticker, data in frames.items():
+        long_term, channels = MarketAnalysis().identify_channels(data)
+        expected[ticker] = channel_strength(data, long_term, channels)
+    top = sorted(expected, key=expected.get, reverse=True)[:2]
+    assert [r['ticker'] for r in summary] == top
+    for result in summary:
+        assert result['strength'] == pytest.approx(expected[result['ticker']])
+        assert result['image'].media_type == 'image/png' and len(result['image']) > 0
+        assert 'detected' not in result